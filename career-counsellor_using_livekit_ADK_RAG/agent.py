@@ -1,5 +1,6 @@
 import os
-from typing import Any
+import time
+from typing import Any, Optional
 from dotenv import load_dotenv
 from langchain_community.tools.google_jobs import GoogleJobsQueryRun
 from langchain_community.utilities.google_jobs import GoogleJobsAPIWrapper
@@ -17,20 +18,64 @@ from adk_agents import (
 )
 
 # Import RAG system for career advice
-from career_rag import initialize_career_rag, get_career_advice
+from career_rag import (HOT_RELOAD, prewarm_career_rag, aget_career_advice, aprefetch_career_context,
+                        astream_career_advice, classify_career_query, rag_memory_report, start_career_rag_watcher)
+from rag_memory import memory_delta
+from rag_speculative import SpeculativeRetriever
+from rag_telemetry import configure_tracing, current_trace_context, get_logger, start_metrics_server
+
+log = get_logger("agent")
 
 load_dotenv()
 
-# Initialize RAG system on module load
-try:
-    _rag_system = initialize_career_rag()
-    print("✓ Career RAG System loaded successfully!")
-except Exception as e:
-    print(f"Warning: RAG system initialization failed: {e}")
+# Speak RAG advice sentence by sentence as it is generated instead of
+# waiting for the full answer (lower time-to-first-audio). Streamed answers
+# bypass the agent LLM, so they are capped at RAG_VOICE_MAX_TOKENS.
+STREAM_RAG_ADVICE = os.getenv("RAG_STREAM_ADVICE", "1") == "1"
+
+# Start embedding and retrieval on the user's transcripts before the LLM calls
+# the RAG tool; the tool reuses the result when its query matches the utterance
+SPECULATIVE_RETRIEVAL = os.getenv("RAG_SPECULATIVE", "0") == "1"
+
+# Time allowed for a worker process to prewarm (a first-time index build embeds the corpus)
+PREWARM_TIMEOUT_SECONDS = float(os.getenv("RAG_PREWARM_TIMEOUT", "120"))
+
+
+def prewarm(proc: agents.JobProcess):
+    """
+    Load the RAG index, VAD model and provider clients once per worker process.
+    LiveKit only hands jobs to processes whose prewarm has finished, so the first
+    caller in a room never waits on model or index loading. A RAG load or build
+    failure is raised, so the process is never reported ready without an index.
+    """
+    start = time.perf_counter()
+    # RAG_METRICS_PORT / OTEL_EXPORTER_OTLP_ENDPOINT enable the exporters
+    start_metrics_server()
+    configure_tracing()
+    
+    vad_start = time.perf_counter()
+    proc.userdata["vad"] = silero.VAD.load()
+    timings = {"vad_ms": (time.perf_counter() - vad_start) * 1000}
+    
+    try:
+        timings.update(prewarm_career_rag())
+        log.info("Career RAG System loaded")
+        if HOT_RELOAD:
+            # Knowledge-base edits are picked up without restarting the worker
+            start_career_rag_watcher()
+    except Exception as e:
+        log.error("RAG system initialization failed; worker process not ready", error=str(e))
+        raise
+    
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    proc.userdata["prewarm_timings"] = timings
+    log.info("Worker process prewarmed", pid=os.getpid(),
+             **{name: round(ms) for name, ms in timings.items()})
 
 
 class Assistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, speculator: Optional[SpeculativeRetriever] = None) -> None:
+        self.speculator = speculator
         super().__init__(
             instructions="""
 # Persona 
@@ -239,7 +284,7 @@ Keep your response within 250 tokens.
         self,
         context: RunContext,
         query: str,
-    ) -> str:
+    ) -> Optional[str]:
         """Get evidence-based career advice using RAG (Retrieval-Augmented Generation).
         This tool provides specific, factual information about careers in India from a comprehensive knowledge base including:
         
@@ -306,7 +351,28 @@ Keep your response within 250 tokens.
             Detailed, evidence-based career information with specific facts and figures.
         """
         try:
-            result = get_career_advice(query, use_rag=True)
+            # Salary / government / remote / role questions only search the matching chunks
+            filters = classify_career_query(query)
+            if filters is not None:
+                log.info("Retrieval filter", filter=filters.describe())
+            
+            # Retrieval already started on the user's transcript, if it matches this query
+            prefetched = None
+            if self.speculator is not None:
+                prefetched = await self.speculator.lookup(query, filters.describe() if filters is not None else "")
+            
+            if STREAM_RAG_ADVICE:
+                # TTS starts on the first sentence while the rest is still generating.
+                # Returning no output means the LLM won't add a second reply on top.
+                # The stream runs after this tool returns, so its spans are parented explicitly.
+                context.session.say(
+                    astream_career_advice(query, filters=filters, trace_parent=current_trace_context(),
+                                          prefetched=prefetched),
+                    add_to_chat_ctx=True
+                )
+                return None
+            
+            result = await aget_career_advice(query, use_rag=True, filters=filters, prefetched=prefetched)
             
             if result['success']:
                 # Format response with source information
@@ -324,17 +390,44 @@ Sources: {len(result['sources'])} career knowledge documents referenced
             return f"Error in RAG career advice tool: {str(e)}"
 
 async def entrypoint(ctx: agents.JobContext):
+    # Per-session memory cost: private growth of this job process vs. the shared index pages
+    session_memory = rag_memory_report()
+    log.info("Session start memory", **session_memory)
+
+    async def log_session_memory():
+        report = rag_memory_report()
+        delta = memory_delta(session_memory, report)
+        log.info("Session end memory", session_uss_mb=delta["uss_mb"], **report)
+
+    ctx.add_shutdown_callback(log_session_memory)
+
     session = AgentSession(
         stt=groq.STT(model="whisper-large-v3",detect_language=True,),
         llm="openai/gpt-4.1-mini",
         tts="cartesia/sonic-3",
-        vad=silero.VAD.load(),
+        vad=ctx.proc.userdata["vad"],
        
     )
 
+    speculator = None
+    if SPECULATIVE_RETRIEVAL:
+        # Groq Whisper only emits a final transcript per speech segment; streaming STT
+        # plugins also emit interim ones. Either way retrieval runs while the turn is
+        # being endpointed and the LLM decides on the tool call.
+        speculator = SpeculativeRetriever(aprefetch_career_context)
+        session.on("user_input_transcribed", lambda ev: speculator.on_transcript(ev.transcript, ev.is_final))
+        session.on("agent_state_changed",
+                   lambda ev: speculator.end_turn() if ev.new_state == "thinking" else None)
+
+        async def close_speculator():
+            log.info("Speculative retrieval", **speculator.stats())
+            await speculator.aclose()
+
+        ctx.add_shutdown_callback(close_speculator)
+
     await session.start(
         room=ctx.room,
-        agent=Assistant(),
+        agent=Assistant(speculator),
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` instead for best results
             noise_cancellation=noise_cancellation.BVC(), 
@@ -346,4 +439,9 @@ async def entrypoint(ctx: agents.JobContext):
     )
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint,agent_name="pathfinder"))
+    agents.cli.run_app(agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        initialize_process_timeout=PREWARM_TIMEOUT_SECONDS,
+        agent_name="pathfinder",
+    ))
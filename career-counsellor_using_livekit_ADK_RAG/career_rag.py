@@ -4,26 +4,134 @@ Optimized for production use with minimal latency
 """
 
 import os
+import copy
 import json
+import asyncio
+import threading
 import pickle
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, List, Sequence, Tuple, Optional
 from dotenv import load_dotenv
+from opentelemetry.context import Context
 import faiss
-import google.generativeai as genai
-from functools import lru_cache
 import time
-import random
-from time import sleep
+
+from rag_embeddings import EmbeddingPipeline
+from rag_embedding_store import EmbeddingStore
+from rag_cache import QueryEmbeddingCache, SemanticAnswerCache, normalize_query
+from rag_streaming import SentenceChunker
+from rag_index import (apply_search_params, benchmark_index, build_faiss_index, choose_index_type,
+                       enable_reconstruct, filtered_search)
+from rag_postprocess import ContextPacker, apply_similarity_cutoff, mmr_rerank
+from rag_lexical import BM25Index, reciprocal_rank_fusion
+from rag_bundle import (TEXT_FILE, ChunkStore, bundle_lock, corpus_checksum, open_bundle, read_manifest,
+                        write_bundle)
+from rag_chunker import Chunk, StructuredChunker
+from rag_filters import TOPIC_TAGS, RetrievalFilter, chunk_tag_mask, classify_query, extract_roles, tag_bits
+from rag_memory import memory_report
+from rag_providers import EmbeddingProvider, create_embedding_provider
+from rag_resilience import EmbeddingUnavailable
+from rag_reload import KnowledgeBaseWatcher
+from rag_batch import BatchEngine
+from rag_speculative import SpeculativeContext
+from rag_generation import GenerationPool, shared_generation_pool
+from rag_context_cache import CacheHandle
+from rag_telemetry import (CONTEXT_TOKENS, EMBEDDING_FAILURES, EMBEDDING_LATENCY, FIRST_SENTENCE_LATENCY,
+                           GENERATION_LATENCY, INDEX_BYTES, INDEX_DOCUMENTS, REQUEST_LATENCY, RETRIEVAL_LATENCY, SEARCH_LATENCY,
+                           activate, detached_span, get_logger, span, timed, traced)
 
 load_dotenv()
 
-# Configure Gemini API
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY not set in environment variables")
+log = get_logger("career_rag")
+
+# Gemini is configured lazily (rag_providers.configure_gemini) so the local and
+# test embedding providers work without GEMINI_API_KEY.
+# Embedding provider: gemini | local | test (recorded with the index)
+EMBEDDING_PROVIDER = os.getenv("RAG_EMBEDDING_PROVIDER", "gemini")
+
+# Embedding throughput limits (tune to the provider quota)
+EMBED_REQUESTS_PER_SECOND = float(os.getenv("RAG_EMBED_RPS", "10"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "8"))
+EMBED_MAX_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "100"))
+EMBED_MAX_PAYLOAD_CHARS = int(os.getenv("RAG_EMBED_MAX_PAYLOAD_CHARS", "50000"))
+# Chunks whose embedding failed are left out of the vector index and re-embedded this often
+EMBED_RETRY_INTERVAL_SECONDS = float(os.getenv("RAG_EMBED_RETRY_INTERVAL", "300"))
+# Embeddings of other models (e.g. earlier local embedder fits) are evicted after this many idle days
+EMBEDDING_STORE_MAX_IDLE_DAYS = float(os.getenv("RAG_EMBEDDING_STORE_MAX_IDLE_DAYS", "30"))
+
+# Query embedding cache (repeated voice questions skip the embedding round trip)
+QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("RAG_QUERY_CACHE_TTL", "3600"))
+
+# Semantic answer cache (near-identical questions reuse generated advice)
+ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RAG_ANSWER_CACHE_TTL", "1800"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.95"))
+
+# FAISS backend: auto | flat | ivf_flat | hnsw | ivf_pq
+INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "auto")
+
+# Retrieval post-processing: candidate pool -> similarity cutoff -> MMR -> token-budget packing
+RETRIEVAL_CANDIDATES = int(os.getenv("RAG_RETRIEVAL_CANDIDATES", "8"))
+MAX_CONTEXT_DOCS = int(os.getenv("RAG_MAX_CONTEXT_DOCS", "4"))
+MIN_SIMILARITY = float(os.getenv("RAG_MIN_SIMILARITY", "0.0"))
+RELATIVE_SIMILARITY_CUTOFF = float(os.getenv("RAG_RELATIVE_SIMILARITY_CUTOFF", "0.85"))
+MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "450"))
+
+# Hybrid lexical + vector retrieval; confident keyword matches skip the embedding call
+HYBRID_RETRIEVAL = os.getenv("RAG_HYBRID", "1") == "1"
+LEXICAL_FAST_PATH = os.getenv("RAG_LEXICAL_FAST_PATH", "1") == "1"
+LEXICAL_MIN_COVERAGE = float(os.getenv("RAG_LEXICAL_MIN_COVERAGE", "1.0"))
+LEXICAL_MIN_MARGIN = float(os.getenv("RAG_LEXICAL_MIN_MARGIN", "0.2"))
+LEXICAL_MAX_TERMS = int(os.getenv("RAG_LEXICAL_MAX_TERMS", "4"))
 
-genai.configure(api_key=API_KEY)
+# Check bundle file checksums on load (file sizes are always checked)
+VERIFY_BUNDLE_CHECKSUMS = os.getenv("RAG_VERIFY_BUNDLE", "0") == "1"
+
+# Serve the index bundle through read-only mmaps so every worker process on the
+# host shares one copy of the vectors, chunk text and postings (0 = private copy)
+SHARED_INDEX = os.getenv("RAG_SHARED_INDEX", "1") == "1"
+
+# Structure-aware chunking: chunk size and overlap in (estimated) tokens.
+# The chunker version is recorded in the index bundle; a different one forces a re-index.
+CHUNK_MAX_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "180"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "30"))
+# Chunker that produced indexes saved before the bundle format
+LEGACY_CHUNKER_VERSION = "sections-500c-v1"
+
+# Hot reload: watch the knowledge base, rebuild in the background and swap the live index
+HOT_RELOAD = os.getenv("RAG_HOT_RELOAD", "0") == "1"
+HOT_RELOAD_DEBOUNCE_MS = int(os.getenv("RAG_HOT_RELOAD_DEBOUNCE_MS", "1600"))
+
+# Batch engine: Gemini generations in flight during batch_process_queries
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("RAG_BATCH_CONCURRENCY", "8"))
+
+# Generation settings
+GENERATION_MODEL = "gemini-2.0-flash"
+# Deadline for one generation call (a stream must finish within it)
+GENERATION_TIMEOUT_SECONDS = float(os.getenv("RAG_GENERATION_TIMEOUT", "20"))
+# Streamed advice is spoken as is, so it is kept to voice length (the agent's own replies stay within 250 tokens)
+VOICE_MAX_OUTPUT_TOKENS = int(os.getenv("RAG_VOICE_MAX_TOKENS", "250"))
+# Spoken when streamed advice can't be produced
+STREAM_FALLBACK_MESSAGE = "Sorry, I couldn't finish looking that up right now."
+SYSTEM_PROMPT = """You are an expert career advisor at Pathfinder AI. You have deep knowledge of career paths, 
+salary expectations, skill requirements, and career transitions in India. Provide practical, actionable career advice 
+based on the user's question. Be specific with salary ranges, timeline expectations, and actionable next steps."""
+
+# Context caching: the system prompt and pinned chunks are registered with the provider once (off | gemini | local)
+CONTEXT_CACHE = os.getenv("RAG_CONTEXT_CACHE", "off").lower()
+# Gemini caches need an explicit model version
+CONTEXT_CACHE_MODEL = os.getenv("RAG_CONTEXT_CACHE_MODEL", "gemini-2.0-flash-001")
+CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("RAG_CONTEXT_CACHE_TTL", "3600"))
+# Sections served from the cached prefix instead of per-query retrieval ("" pins nothing).
+# The default (salary, FAQ, tech careers, remote work, work-life balance, career
+# transitions; ~5k tokens with the system prompt) clears Gemini's minimum cache size
+# (RAG_CONTEXT_CACHE_MIN_TOKENS); a smaller pin set disables gemini caching at startup.
+CONTEXT_CACHE_PINNED_SECTIONS = [
+    section.strip() for section in os.getenv("RAG_CONTEXT_CACHE_PINNED_SECTIONS", "13,17,2,15,14,12").split(",")
+    if section.strip()
+]
 
 class CareerRAGSystem:
     """
@@ -37,30 +145,123 @@ class CareerRAGSystem:
     - Optimized for production use
     """
     
-    def __init__(self, knowledge_base_path: str = "career_knowledge_base.txt"):
+    def __init__(self, knowledge_base_path: str = "career_knowledge_base.txt",
+                 embed_requests_per_second: float = EMBED_REQUESTS_PER_SECOND,
+                 embed_max_concurrency: int = EMBED_MAX_CONCURRENCY,
+                 embed_max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+                 embed_max_payload_chars: int = EMBED_MAX_PAYLOAD_CHARS,
+                 index_type: str = INDEX_TYPE,
+                 embedding_provider: Optional[EmbeddingProvider] = None,
+                 shared_index: bool = SHARED_INDEX,
+                 index_dir: Optional[str] = None,
+                 generation_pool: Optional[GenerationPool] = None):
         """
         Initialize the RAG system.
         
         Args:
             knowledge_base_path: Path to the career knowledge base text file
+            embed_requests_per_second: Token-bucket rate for embedding requests
+            embed_max_concurrency: Maximum embedding requests in flight
+            embed_max_batch_size: Maximum texts per embedding request
+            embed_max_payload_chars: Maximum characters per embedding request
+            index_type: FAISS backend ('auto' picks one by corpus size)
+            embedding_provider: Embedding backend (defaults to RAG_EMBEDDING_PROVIDER)
+            shared_index: Map the index bundle read-only, shared across processes
+            index_dir: Directory for this corpus' bundle, embedding cache and local
+                embedder state (None keeps the career_rag_* files in the working directory)
+            generation_pool: Gemini model/client pool (defaults to the process-wide pool)
         """
+        # Constructor settings, reused to build a replacement index on reload
+        self._settings = {
+            "knowledge_base_path": knowledge_base_path,
+            "embed_requests_per_second": embed_requests_per_second,
+            "embed_max_concurrency": embed_max_concurrency,
+            "embed_max_batch_size": embed_max_batch_size,
+            "embed_max_payload_chars": embed_max_payload_chars,
+            "index_type": index_type,
+            "shared_index": shared_index,
+            "index_dir": index_dir,
+        }
         self.knowledge_base_path = knowledge_base_path
         self.index = None
         self.documents = []
-        self.metadata = []
-        self.embedding_dim = 768  # Gemini embedding dimension
-        self.index_path = "career_rag_index.faiss"
-        self.metadata_path = "career_rag_metadata.pkl"
+        self.chunks = ChunkStore.from_texts([])
+        self.chunker = StructuredChunker(CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+        self.chunk_metadata: List[Chunk] = []
+        # Section table and per-chunk section index / character span, served from the bundle
+        self.sections: List[dict] = []
+        self.chunk_sections = np.zeros(0, dtype=np.int32)
+        self.chunk_spans = np.zeros((0, 2), dtype=np.int64)
+        # Topic-tag bitmask per chunk (bits follow TOPIC_TAGS) and role names found in the corpus
+        self.chunk_tags = np.zeros(0, dtype=np.uint32)
+        self.roles: List[str] = []
+        self.index_dir = index_dir
+        if index_dir is not None:
+            os.makedirs(index_dir, exist_ok=True)
+        self.embedding_provider = embedding_provider or create_embedding_provider(
+            EMBEDDING_PROVIDER, **self._provider_kwargs(EMBEDDING_PROVIDER)
+        )
+        self.bundle_path = self._artifact_path("career_rag_bundle", "bundle")
+        self.shared_index = shared_index
+        # Pre-bundle artifacts, migrated into the bundle on first load
+        self.legacy_index_path = self._artifact_path("career_rag_index.faiss", "index.faiss")
+        self.legacy_metadata_path = self._artifact_path("career_rag_metadata.pkl", "metadata.pkl")
+        self.legacy_index_config_path = self._artifact_path("career_rag_index.json", "index.json")
+        self.index_type = index_type
+        self.index_config = {}
+        self.generation_pool = generation_pool or shared_generation_pool(
+            GENERATION_MODEL, SYSTEM_PROMPT, GENERATION_TIMEOUT_SECONDS
+        )
+        if generation_pool is None and CONTEXT_CACHE != "off":
+            self.generation_pool.enable_context_cache(CONTEXT_CACHE, CONTEXT_CACHE_MODEL, CONTEXT_CACHE_TTL_SECONDS)
+        # Chunks pinned into the cached prefix (see pin_context) and the prefix key they belong to
+        self.pinned_mask: Optional[np.ndarray] = None
+        self._pinned_key: Optional[str] = None
+        self.embeddings = None
+        # Chunks whose embedding failed: searchable by BM25 only, left out of FAISS until re-embedded
+        self.pending_embeddings: List[int] = []
+        self.context_packer = ContextPacker(CONTEXT_TOKEN_BUDGET)
+        self.lexical_index = None
+        self.lexical_fast_path_hits = 0
+        self._context_stats = {"queries": 0, "tokens_before": 0, "tokens_saved": 0}
+        self._context_stats_lock = threading.Lock()
+        self.embedding_store_path = self._artifact_path("career_rag_embeddings.sqlite", "embeddings.sqlite")
+        self._embedding_store = None
+        self.query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+        self.answer_cache = SemanticAnswerCache(
+            ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_THRESHOLD
+        )
+        self.embedding_pipeline = EmbeddingPipeline(
+            lambda texts: self.embedding_provider.embed_documents(texts),
+            requests_per_second=embed_requests_per_second,
+            max_concurrency=embed_max_concurrency,
+            max_batch_size=embed_max_batch_size,
+            max_payload_chars=embed_max_payload_chars,
+            provider=self.embedding_provider.name
+        )
         
+    def _artifact_path(self, default_name: str, name: str) -> str:
+        """Path of an index artifact: `name` inside index_dir, or the default file name."""
+        if self.index_dir is None:
+            return default_name
+        return os.path.join(self.index_dir, name)
+    
+    def _provider_kwargs(self, provider_name: str) -> dict:
+        """Constructor arguments that keep corpus-fitted provider state inside index_dir."""
+        if self.index_dir is not None and provider_name.lower() == "local":
+            return {"state_path": os.path.join(self.index_dir, "local_embedder.npz")}
+        return {}
+    
     def load_knowledge_base(self) -> List[str]:
         """
         Load and chunk the knowledge base document into smaller segments.
-        Uses intelligent chunking based on section headers.
+        Chunks follow the table of contents and section headers, are sized in
+        tokens with overlap, and carry their section id, title and character span.
         
         Returns:
             List of document chunks
         """
-        print(f"Loading knowledge base from {self.knowledge_base_path}...")
+        log.info("Loading knowledge base", path=self.knowledge_base_path)
         
         if not os.path.exists(self.knowledge_base_path):
             raise FileNotFoundError(f"Knowledge base not found at {self.knowledge_base_path}")
@@ -68,94 +269,261 @@ class CareerRAGSystem:
         with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Split by section headers for better chunking
-        sections = content.split('\n================================================================================\n')
+        self.chunk_metadata = self.chunker.chunk(content)
+        documents = [chunk.text for chunk in self.chunk_metadata]
         
-        documents = []
-        for section in sections:
-            if len(section.strip()) < 50:
-                continue
-            
-            # Further split long sections into smaller chunks (~500 chars each)
-            lines = section.split('\n')
-            current_chunk = []
-            current_length = 0
-            
-            for line in lines:
-                current_chunk.append(line)
-                current_length += len(line)
-                
-                if current_length > 500:
-                    chunk_text = '\n'.join(current_chunk).strip()
-                    if len(chunk_text) > 50:
-                        documents.append(chunk_text)
-                    current_chunk = []
-                    current_length = 0
-            
-            # Add remaining chunk
-            if current_chunk:
-                chunk_text = '\n'.join(current_chunk).strip()
-                if len(chunk_text) > 50:
-                    documents.append(chunk_text)
-        
-        print(f"✓ Loaded {len(documents)} document chunks")
+        log.info("Loaded knowledge base", chunks=len(documents),
+                 sections=len({chunk.section_id for chunk in self.chunk_metadata}))
         self.documents = documents
         return documents
     
-    def _get_embedding_with_retry(self, text: str, max_retries: int = 5) -> np.ndarray:
+    def _set_chunk_metadata(self, chunks: List[Chunk], documents: Sequence[str]) -> None:
+        """
+        Build the section table, topic tags, role list and per-chunk arrays stored in the bundle.
+        Chunks without metadata (legacy or externally supplied documents) get section -1.
+        """
+        n_documents = len(documents)
+        self.chunk_tags = np.array([chunk_tag_mask(text) for text in documents], dtype=np.uint32)
+        self.roles = sorted({role for text in documents for role in extract_roles(text)})
+        self.sections = []
+        self.chunk_sections = np.full(n_documents, -1, dtype=np.int32)
+        self.chunk_spans = np.zeros((n_documents, 2), dtype=np.int64)
+        if len(chunks) != n_documents:
+            return
+        
+        positions = {}
+        for i, chunk in enumerate(chunks):
+            if chunk.section_id not in positions:
+                positions[chunk.section_id] = len(self.sections)
+                self.sections.append({"id": chunk.section_id, "title": chunk.title})
+            self.chunk_sections[i] = positions[chunk.section_id]
+            self.chunk_spans[i] = (chunk.char_start, chunk.char_end)
+    
+    def _bundle_arrays(self) -> dict:
+        """Flat arrays stored in the bundle: BM25 postings and per-chunk section/span."""
+        arrays = {f"lexical.{name}": array for name, array in self.lexical_index.to_arrays().items()}
+        arrays["chunks.section"] = self.chunk_sections
+        arrays["chunks.span"] = self.chunk_spans
+        arrays["chunks.tags"] = self.chunk_tags
+        return arrays
+    
+    def chunk_info(self, doc_id: int) -> dict:
+        """
+        Section id, title and character span of an indexed chunk.
+        
+        Args:
+            doc_id: Position of the chunk in the index
+            
+        Returns:
+            Dict with section_id, title, char_start and char_end (section fields are
+            None for chunks indexed without section metadata)
+        """
+        position = int(self.chunk_sections[doc_id])
+        section = self.sections[position] if position >= 0 else {"id": None, "title": None}
+        start, end = (int(v) for v in self.chunk_spans[doc_id])
+        return {"section_id": section["id"], "title": section["title"], "char_start": start, "char_end": end}
+    
+    def filter_mask(self, filters: Optional[RetrievalFilter],
+                    fallback_to_all: bool = True) -> Optional[np.ndarray]:
         """
-        Get embedding for text with exponential backoff retry logic.
-        Handles 504 Deadline Exceeded errors gracefully.
+        Boolean mask of the chunks a retrieval filter allows.
+        Section ids match themselves and their subsections ("13" matches "13.3");
+        a role matches chunks containing all of its words.
         
         Args:
-            text: Text to embed
-            max_retries: Maximum number of retry attempts
+            filters: Retrieval filter, or None
+            fallback_to_all: Search everything when the filter matches no chunk
+                (otherwise the all-False mask is returned)
             
         Returns:
-            Embedding vector as numpy array
+            Mask with one entry per chunk, or None when nothing should be filtered
         """
-        # Truncate text to avoid API limits
-        text = text[:2000]
+        if filters is None or filters.is_empty():
+            return None
         
-        for attempt in range(max_retries):
-            try:
-                # Use embedding-001 for low latency
-                result = genai.embed_content(
-                    model="models/embedding-001",
-                    content=text,
-                    task_type="RETRIEVAL_DOCUMENT",
-                    title="Career advice document"
-                )
-                embedding = np.array(result['embedding'], dtype=np.float32)
-                return embedding
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's a deadline exceeded error
-                if "504" in error_str or "Deadline" in error_str or "timeout" in error_str.lower():
-                    if attempt < max_retries - 1:
-                        # Exponential backoff with jitter
-                        wait_time = (2 ** attempt) + random.uniform(0, 1)
-                        print(f"  ⚠ API timeout (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time:.1f}s...")
-                        sleep(wait_time)
-                        continue
-                    else:
-                        print(f"  ✗ Failed after {max_retries} retries: {error_str}")
-                        return np.zeros(768, dtype=np.float32)
-                else:
-                    # Non-timeout error, don't retry
-                    print(f"  ✗ Error embedding text (non-timeout): {error_str}")
-                    return np.zeros(768, dtype=np.float32)
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if filters.sections:
+            positions = [
+                pos for pos, section in enumerate(self.sections)
+                if any(section["id"] == wanted or section["id"].startswith(f"{wanted}.")
+                       for wanted in filters.sections)
+            ]
+            mask &= np.isin(self.chunk_sections, positions)
+        if filters.tags:
+            mask &= (self.chunk_tags & tag_bits(filters.tags)) != 0
+        if filters.roles:
+            role_mask = np.zeros(len(self.chunks), dtype=bool)
+            for role in filters.roles:
+                role_mask |= self.lexical_index.matching_documents([role])
+            mask &= role_mask
         
-        # Fallback
-        return np.zeros(768, dtype=np.float32)
+        if not mask.any() and fallback_to_all:
+            log.warning("Filter matches no chunks; searching all documents", filter=filters.describe())
+            return None
+        return mask
+    
+    def classify_query(self, query: str) -> Optional[RetrievalFilter]:
+        """
+        Retrieval filter for a query, picked by keyword rules over topics and the indexed roles.
+        """
+        return classify_query(query, self.roles)
+    
+    def pin_context(self, sections: Sequence[str] = CONTEXT_CACHE_PINNED_SECTIONS) -> int:
+        """
+        Pin high-traffic sections into the generation pool's cached prefix and create the cache.
+        While that cache is live, pinned chunks are left out of per-query retrieval,
+        so each prompt only carries the query-specific references.
+        
+        Args:
+            sections: Section ids to pin ("13" also pins "13.1", ...)
+            
+        Returns:
+            Number of chunks pinned (0 when context caching is off, or disabled
+            because the prefix is smaller than the provider's minimum)
+        """
+        cache = self.generation_pool.context_cache
+        if cache is None or cache.disabled:
+            return 0
+        
+        mask = self.filter_mask(RetrievalFilter(sections=list(sections)), fallback_to_all=False)
+        ids = np.flatnonzero(mask) if mask is not None else []
+        texts = [self.chunks[int(idx)] for idx in ids]
+        prefix_tokens = cache.estimate_tokens(texts)
+        if prefix_tokens < cache.backend.min_tokens:
+            # The provider would reject every create; don't retry it for the life of the process
+            if cache.disable():
+                log.warning("Context caching disabled: prefix is below the provider's minimum cached tokens",
+                            backend=cache.backend.name, prefix_tokens=prefix_tokens,
+                            min_tokens=cache.backend.min_tokens, pinned_chunks=len(ids),
+                            hint="pin more sections (RAG_CONTEXT_CACHE_PINNED_SECTIONS) or set RAG_CONTEXT_CACHE=off")
+            self.pinned_mask = None
+            return 0
+        self._pinned_key = cache.set_pinned(texts)
+        self.pinned_mask = mask if len(ids) else None
+        log.info("Pinned chunks into the context cache", chunks=len(ids), sections=",".join(sections) or "none")
+        # Create the cache now rather than on the first query
+        self.generation_pool.context_handle()
+        return len(ids)
+    
+    def _generation_context(self) -> Tuple[Optional[CacheHandle], Optional[np.ndarray]]:
+        """
+        The live cached prefix for generation and the chunks it already holds.
+        
+        Returns:
+            Tuple of (cache handle or None, mask of chunks to leave out of retrieval or None);
+            the mask is only set when the live cache holds this instance's pinned chunks
+        """
+        context = self.generation_pool.context_handle()
+        pinned = self.pinned_mask if context is not None and context.key == self._pinned_key else None
+        return context, pinned
+    
+    async def _ageneration_context(self) -> Tuple[Optional[CacheHandle], Optional[np.ndarray]]:
+        """Async _generation_context (creating or refreshing the cache is a network call)."""
+        if self.generation_pool.context_cache is None:
+            return None, None
+        return await asyncio.to_thread(self._generation_context)
+    
+    @staticmethod
+    def _exclude_pinned(mask: Optional[np.ndarray], pinned: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Restrict a retrieval mask to chunks that are not pinned."""
+        if pinned is None:
+            return mask
+        return ~pinned if mask is None else mask & ~pinned
+    
+    @property
+    def embedding_dim(self) -> int:
+        """Dimension of the configured embedding provider."""
+        return self.embedding_provider.dimension
+    
+    def embed_texts(self, texts: List[str], progress: bool = True) -> np.ndarray:
+        """
+        Embed many texts with batched, concurrent, rate-limited requests.
+        
+        Args:
+            texts: Texts to embed
+            progress: Log progress while embedding
+            
+        Returns:
+            Stacked float32 matrix of shape (len(texts), embedding_dim)
+        """
+        texts = [text[:2000] for text in texts]
+        return self.embedding_pipeline.embed(texts, self.embedding_dim, progress=progress)
+    
+    @property
+    def embedding_store(self) -> EmbeddingStore:
+        """Lazily opened content-addressed embedding cache."""
+        if self._embedding_store is None:
+            self._embedding_store = EmbeddingStore(self.embedding_store_path)
+        return self._embedding_store
+    
+    def _embed_documents_incremental(self, documents: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Embed documents, reusing cached vectors for unchanged chunks.
+        Only new or edited chunks are sent to the embedding API; cache entries
+        no longer referenced by any chunk are garbage-collected.
+        
+        Args:
+            documents: Chunk texts in index order
+            
+        Returns:
+            Tuple of (stacked float32 embedding matrix, ids of documents whose
+            embedding failed; their rows are zero and must not be indexed)
+        """
+        store = self.embedding_store
+        model_id = self.embedding_provider.model_id
+        task_type = self.embedding_provider.task_type
+        keys = [EmbeddingStore.make_key(doc, model_id, task_type) for doc in documents]
+        cached = store.get_many(keys)
+        
+        embeddings = np.zeros((len(documents), self.embedding_dim), dtype=np.float32)
+        missing = []
+        failed_ids = []
+        for i, key in enumerate(keys):
+            vector = cached.get(key)
+            if vector is not None and vector.shape[0] == self.embedding_dim:
+                embeddings[i] = vector
+            else:
+                missing.append(i)
+        
+        log.info("Embedding cache checked", reused=len(documents) - len(missing), to_embed=len(missing))
+        
+        if missing:
+            log.info("Embedding documents", documents=len(missing),
+                     max_batch_size=self.embedding_pipeline.max_batch_size,
+                     requests_per_second=self.embedding_pipeline.limiter.rate,
+                     concurrency=self.embedding_pipeline.max_concurrency)
+            fresh = self.embed_texts([documents[i] for i in missing])
+            failed = set(self.embedding_pipeline.last_stats.failed_indices)
+            new_vectors = {}
+            for j, i in enumerate(missing):
+                # Failed documents stay uncached, so the next build embeds them again
+                if j in failed:
+                    failed_ids.append(i)
+                    continue
+                embeddings[i] = fresh[j]
+                new_vectors[keys[i]] = fresh[j]
+            store.put_many(new_vectors, model_id, task_type)
+            if failed_ids:
+                log.warning("Documents left out of the vector index until they can be embedded",
+                            failed=len(failed_ids), retry_in_s=EMBED_RETRY_INTERVAL_SECONDS)
+        
+        removed = store.garbage_collect(keys, model_id, task_type)
+        if removed:
+            log.info("Removed stale embeddings from cache", removed=removed)
+        pruned = store.prune_idle_models(EMBEDDING_STORE_MAX_IDLE_DAYS * 86400, model_id, task_type)
+        if pruned:
+            log.info("Removed embeddings of idle models from cache", removed=pruned,
+                     max_idle_days=EMBEDDING_STORE_MAX_IDLE_DAYS)
+        return embeddings, failed_ids
     
     def build_index(self, force_rebuild: bool = False) -> bool:
         """
         Build FAISS index from documents.
         Uses cached index if available.
-        Includes smart retry logic and request throttling.
+        Re-embeds only chunks missing from the persistent embedding cache,
+        in multi-text batches under a token-bucket rate limit.
+        Holds an inter-process lock on the bundle, so concurrent workers don't
+        build the same bundle twice or open one that is half written.
         
         Args:
             force_rebuild: Force rebuild even if index exists
@@ -163,119 +531,597 @@ class CareerRAGSystem:
         Returns:
             True if index was built successfully
         """
+        with bundle_lock(self.bundle_path):
+            return self._build_index(force_rebuild)
+    
+    def _build_index(self, force_rebuild: bool) -> bool:
+        """build_index body; runs under the bundle lock."""
+        # Cached answers were generated against the previous index
+        self.answer_cache.invalidate()
+        
         # Check if index exists and is valid
-        if not force_rebuild and os.path.exists(self.index_path):
+        if not force_rebuild:
+            self._migrate_legacy_index()
+        if not force_rebuild and read_manifest(self.bundle_path) is not None:
             try:
-                print("Loading existing FAISS index...")
-                self.index = faiss.read_index(self.index_path)
-                with open(self.metadata_path, 'rb') as f:
-                    self.metadata = pickle.load(f)
-                print(f"✓ Loaded index with {self.index.ntotal} documents")
-                return True
+                log.info("Loading index bundle", path=self.bundle_path)
+                self._open_bundle(verify_checksums=VERIFY_BUNDLE_CHECKSUMS)
+                log.info("Loaded index bundle", index_type=self.index_config['index_type'],
+                         documents=self.index.ntotal, shared_mmap=self.shared_index)
+                
+                # Vectors from another embedding model live in a different space
+                mismatch = self._embedding_mismatch(self.index_config)
+                if mismatch:
+                    log.error("Rejecting stored index; re-indexing", reason=mismatch)
+                elif self.index_config.get("chunker_version") != self.chunker.version:
+                    log.info("Chunker changed since the index was built; re-indexing",
+                             index_chunker=self.index_config.get('chunker_version'),
+                             current_chunker=self.chunker.version)
+                # Re-index incrementally if the knowledge base changed since the index was built
+                elif self.documents and \
+                        corpus_checksum(self.documents) != self.index_config["files"][TEXT_FILE]["sha256"]:
+                    log.info("Knowledge base changed since the index was built; re-indexing")
+                elif self.index_config.get("tags") != TOPIC_TAGS:
+                    log.info("Topic tags changed since the index was built; re-indexing")
+                elif self.pending_embeddings:
+                    log.info("Index has chunks without embeddings; re-embedding them",
+                             pending=len(self.pending_embeddings))
+                elif self.index_config['index_type'] != self._resolve_index_type(self.index.ntotal):
+                    log.info("Configured index type differs from the stored index; re-indexing",
+                             stored=self.index_config['index_type'])
+                else:
+                    return True
             except Exception as e:
-                print(f"Could not load existing index: {e}")
+                log.warning("Could not load existing index", error=str(e))
         
         # Build new index
-        print("Building FAISS index from documents...")
+        log.info("Building FAISS index from documents")
         
         if not self.documents:
             self.load_knowledge_base()
         
-        # Create FAISS index
-        # Using IndexFlatL2 for exact search with low latency
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
+        # Corpus-fitted providers (local TF-IDF/SVD) learn their projection first
+        self.embedding_provider.fit(self.documents)
         
-        # Generate embeddings for all documents in batches with throttling
-        embeddings = []
-        batch_size = 5  # Reduced batch size to avoid rate limiting
-        total_batches = (len(self.documents) - 1) // batch_size + 1
+        # Reuse cached embeddings; embed only new or changed chunks
+        embeddings_array, failed_ids = self._embed_documents_incremental(self.documents)
+        self.embeddings = embeddings_array
+        self._set_pending_embeddings(failed_ids)
         
-        for i in range(0, len(self.documents), batch_size):
-            batch = self.documents[i:i+batch_size]
-            batch_num = i // batch_size + 1
-            print(f"Processing batch {batch_num}/{total_batches}...")
-            
-            for doc_idx, doc in enumerate(batch):
-                try:
-                    embedding = self._get_embedding_with_retry(doc, max_retries=5)
-                    embeddings.append(embedding)
-                    
-                    # Add delay between requests to avoid rate limiting
-                    if doc_idx < len(batch) - 1:  # Don't sleep after last doc in batch
-                        sleep(0.5)  # 500ms delay between requests
-                        
-                except Exception as e:
-                    print(f"  ✗ Failed to embed document: {e}")
-                    embeddings.append(np.zeros(768, dtype=np.float32))
-            
-            # Longer delay between batches
-            if i + batch_size < len(self.documents):
-                print(f"  ⏸ Waiting between batches...")
-                sleep(1.5)
-        
-        # Convert to numpy array and add to index
-        embeddings_array = np.array(embeddings, dtype=np.float32)
-        self.index.add(embeddings_array)
-        
-        # Store metadata
-        self.metadata = [
-            {
-                'text': doc,
-                'index': i
-            }
-            for i, doc in enumerate(self.documents)
-        ]
-        
-        # Save index and metadata to disk
-        faiss.write_index(self.index, self.index_path)
-        with open(self.metadata_path, 'wb') as f:
-            pickle.dump(self.metadata, f)
-        
-        print(f"✓ Built index with {self.index.ntotal} documents")
-        print(f"✓ Saved index to {self.index_path}")
+        # Create, train and fill the FAISS index for the configured backend.
+        # Documents without a vector are left out (not added as zero rows), so they
+        # neither match searches nor skew IVF / PQ training; the rest keep their ids.
+        vector_ids = None
+        vectors = embeddings_array
+        if failed_ids:
+            vector_ids = np.setdiff1d(np.arange(len(embeddings_array)), failed_ids)
+            vectors = embeddings_array[vector_ids]
+        self.index, self.index_config = build_faiss_index(
+            vectors, self._resolve_index_type(len(vectors)), ids=vector_ids
+        )
+        enable_reconstruct(self.index)
+        self.index_config.update(self._embedding_config())
+        self.index_config["chunker_version"] = self.chunker.version
+        log.info("Built FAISS index", index_type=self.index_config['index_type'],
+                 params=json.dumps(self.index_config['params']))
+        
+        # Check approximate backends against exact search before serving them
+        if self.index_config['index_type'] != "flat":
+            self.index_config['benchmark'] = self.evaluate_index()
+        
+        self.chunks = ChunkStore.from_texts(self.documents)
+        self.lexical_index = BM25Index(self.documents)
+        self._set_chunk_metadata(self.chunk_metadata, self.documents)
+        self.index_config["sections"] = self.sections
+        self.index_config["tags"] = TOPIC_TAGS
+        self.index_config["roles"] = self.roles
+        self.index_config["pending_embeddings"] = self.pending_embeddings
+        
+        # Save index, chunk text, postings and chunk metadata as a memory-mappable bundle
+        self.index_config = write_bundle(
+            self.bundle_path, self.index, self.documents, self._bundle_arrays(), self.index_config
+        )
+        
+        log.info("Saved index bundle", path=self.bundle_path, documents=self.index.ntotal)
+        
+        # Serve from the mapped bundle, like every other process, and free the private copy
+        if self.shared_index:
+            self._open_bundle()
+        else:
+            self._record_index_metrics()
         return True
     
-    def retrieve_relevant_documents(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+    def replacement(self) -> "CareerRAGSystem":
+        """
+        A new, unbuilt system with the same settings, for building an updated
+        index while this one keeps serving. The embedding provider is copied so
+        refitting a corpus-fitted provider can't affect queries on this instance.
+        """
+        return CareerRAGSystem(embedding_provider=copy.copy(self.embedding_provider),
+                               generation_pool=self.generation_pool, **self._settings)
+    
+    def is_current(self) -> bool:
+        """True if the knowledge base on disk still matches the loaded index and every chunk has a vector."""
+        if self.pending_embeddings:
+            return False
+        content_checksum = self.index_config.get("files", {}).get(TEXT_FILE, {}).get("sha256")
+        with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
+            chunks = self.chunker.chunk(f.read())
+        return corpus_checksum([chunk.text for chunk in chunks]) == content_checksum
+    
+    def _open_bundle(self, verify_checksums: bool = False) -> None:
+        """
+        Open the index bundle as the live index, chunk store and lexical index.
+        In shared mode every file is mapped read-only; otherwise it is read into private memory.
+        """
+        self.index, self.chunks, self.index_config, arrays = open_bundle(
+            self.bundle_path, verify_checksums=verify_checksums, use_mmap=self.shared_index
+        )
+        apply_search_params(self.index, self.index_config)
+        enable_reconstruct(self.index)
+        self.lexical_index = BM25Index.from_arrays(
+            {name.split(".", 1)[1]: array for name, array in arrays.items() if name.startswith("lexical.")}
+        )
+        self.sections = self.index_config.get("sections", [])
+        self.chunk_sections = arrays["chunks.section"]
+        self.chunk_spans = arrays["chunks.span"]
+        self.chunk_tags = arrays["chunks.tags"]
+        self.roles = self.index_config.get("roles", [])
+        self._set_pending_embeddings(self.index_config.get("pending_embeddings", []))
+        self.embeddings = None
+        self._record_index_metrics()
+    
+    def _set_pending_embeddings(self, ids: Sequence[int]) -> None:
+        """Record the chunks left out of the vector index because their embedding failed."""
+        self.pending_embeddings = sorted(int(i) for i in ids)
+    
+    def _record_index_metrics(self) -> None:
+        """Publish the live index size (vectors and bundle bytes on disk)."""
+        label = self.index_dir or self.bundle_path
+        INDEX_DOCUMENTS.labels(index=label).set(self.index.ntotal)
+        INDEX_BYTES.labels(index=label).set(
+            sum(info.get("bytes", 0) for info in self.index_config.get("files", {}).values())
+        )
+    
+    def memory_report(self) -> dict:
+        """
+        Memory of this process: private (USS), proportional (PSS), shared, and
+        how much of it is the mapped index bundle.
+        """
+        return memory_report(self.bundle_path)
+    
+    def _migrate_legacy_index(self) -> bool:
+        """
+        Convert a pre-bundle index (FAISS file + pickled metadata) into a bundle once.
+        The legacy files are left in place.
+        
+        Returns:
+            True if a legacy index was migrated
+        """
+        if read_manifest(self.bundle_path) is not None or not (
+                os.path.exists(self.legacy_index_path) and os.path.exists(self.legacy_metadata_path)):
+            return False
+        
+        try:
+            log.info("Migrating legacy index", source=self.legacy_index_path, bundle=self.bundle_path)
+            index = faiss.read_index(self.legacy_index_path)
+            with open(self.legacy_metadata_path, 'rb') as f:
+                texts = [m['text'] for m in pickle.load(f)]
+            config = self._load_legacy_index_config(index)
+            # Legacy indexes were chunked by the original section/500-char splitter
+            config.setdefault("chunker_version", LEGACY_CHUNKER_VERSION)
+            self.lexical_index = BM25Index(texts)
+            self._set_chunk_metadata([], texts)
+            config.update({"tags": TOPIC_TAGS, "roles": self.roles})
+            write_bundle(self.bundle_path, index, texts, self._bundle_arrays(), config)
+            log.info("Migrated legacy index", documents=index.ntotal, bundle=self.bundle_path)
+            return True
+        except Exception as e:
+            log.warning("Could not migrate legacy index", error=str(e))
+            return False
+    
+    def _resolve_index_type(self, n_vectors: int) -> str:
+        """Concrete index backend for the configured type and corpus size."""
+        return choose_index_type(n_vectors) if self.index_type == "auto" else self.index_type
+    
+    def _load_legacy_index_config(self, index: faiss.Index) -> dict:
+        """
+        Read the index type and parameters persisted next to a legacy index.
+        Indexes built before the config file existed are exact Flat indexes, and
+        indexes built before providers were recorded used Gemini embedding-001.
+        """
+        config = {"index_type": "flat", "params": {}, "dimension": index.d, "ntotal": int(index.ntotal)}
+        if os.path.exists(self.legacy_index_config_path):
+            with open(self.legacy_index_config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        config.setdefault("embedding_provider", "gemini")
+        config.setdefault("embedding_model", "models/embedding-001")
+        return config
+    
+    def _embedding_config(self) -> dict:
+        """Identity of the embedding provider, recorded with the index."""
+        return {
+            "embedding_provider": self.embedding_provider.name,
+            "embedding_model": self.embedding_provider.model_id,
+            "dimension": self.embedding_provider.dimension,
+        }
+    
+    def _embedding_mismatch(self, config: dict) -> Optional[str]:
+        """
+        Describe why a stored index can't be queried with the configured provider.
+        
+        Returns:
+            Reason string, or None when provider, model and dimension all match
+        """
+        expected = self._embedding_config()
+        if config.get("embedding_provider") != expected["embedding_provider"] or \
+                config.get("embedding_model") != expected["embedding_model"]:
+            return (f"built with {config.get('embedding_provider')}/{config.get('embedding_model')}, "
+                    f"configured {expected['embedding_provider']}/{expected['embedding_model']}")
+        if self.index.d != expected["dimension"]:
+            return f"index dimension {self.index.d} != embedding dimension {expected['dimension']}"
+        return None
+    
+    def evaluate_index(self, k: int = 5, n_queries: int = 100) -> dict:
+        """
+        Benchmark recall@k and query latency of the current index against exact Flat search.
+        
+        Args:
+            k: Neighbours per query
+            n_queries: Number of sampled queries
+            
+        Returns:
+            Benchmark report
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        if self.embeddings is None:
+            # Served from the embedding cache; only missing chunks hit the API
+            if not self.documents:
+                self.load_knowledge_base()
+            self.embeddings, _ = self._embed_documents_incremental(self.documents)
+        
+        # Chunks still pending embedding are not in the index; keep them out of the exact baseline too
+        vector_ids = np.setdiff1d(np.arange(len(self.embeddings)), self.pending_embeddings)
+        report = benchmark_index(self.index, self.embeddings[vector_ids], k=k, n_queries=n_queries,
+                                 ids=vector_ids)
+        recall = report[f"recall@{report['k']}"]
+        log.info("Index check", k=report['k'], recall=round(recall, 3),
+                 p50_ms=report['latency_ms']['p50_ms'], p99_ms=report['latency_ms']['p99_ms'],
+                 exact_p50_ms=report['exact_latency_ms']['p50_ms'],
+                 exact_p99_ms=report['exact_latency_ms']['p99_ms'])
+        return report
+    
+    def cache_stats(self) -> dict:
+        """
+        Hit-rate metrics for the query-embedding and semantic answer caches,
+        plus how many queries skipped embedding via the lexical fast path.
+        """
+        return {
+            "query_embedding": self.query_cache.stats(),
+            "answer": self.answer_cache.stats(),
+            "lexical_fast_path_hits": self.lexical_fast_path_hits,
+            "generation_clients": self.generation_pool.stats(),
+            "embedding_provider": {**self.embedding_provider.stats(),
+                                   "pending_documents": len(self.pending_embeddings)}
+        }
+    
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        """
+        Get the embedding for a user query, served from the query cache when possible.
+        The cache key is the normalized transcript (case, punctuation, disfluencies,
+        whitespace) so near-identical spoken questions share one entry; the query
+        itself is embedded as spoken.
+        
+        Args:
+            query: User query or STT transcript
+            
+        Returns:
+            Query embedding vector, or None if the provider could not embed it
+            within its latency budget (callers fall back to lexical retrieval)
+        """
+        key = normalize_query(query) or query.strip()
+        embedding = self.query_cache.get(key)
+        if embedding is not None:
+            return embedding
+        
+        try:
+            with span("rag.embed_query", provider=self.embedding_provider.name), \
+                    timed(EMBEDDING_LATENCY, provider=self.embedding_provider.name, kind="query"):
+                embedding = self.embedding_provider.embed_query(query.strip() or key)
+        except EmbeddingUnavailable as e:
+            return self._query_embedding_failed(e)
+        self.query_cache.put(key, embedding)
+        return embedding
+    
+    def _query_embedding_failed(self, error: EmbeddingUnavailable) -> None:
+        EMBEDDING_FAILURES.labels(provider=self.embedding_provider.name, kind="query").inc()
+        log.warning("Query embedding unavailable; using lexical retrieval", error=str(error))
+        return None
+    
+    def _search_ids(self, query_embedding: np.ndarray, k: int,
+                    mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Search the FAISS index with a query embedding.
+        
+        Args:
+            query_embedding: Query embedding vector
+            k: Number of documents to retrieve
+            mask: Only search chunks where the mask is True (applied inside FAISS)
+            
+        Returns:
+            List of (document_id, similarity_score) tuples, best first
+        """
+        return self._search_ids_batch(np.array([query_embedding], dtype=np.float32), k, mask)[0]
+    
+    def _search_ids_batch(self, query_embeddings: np.ndarray, k: int,
+                          mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Search the FAISS index with a matrix of query embeddings in a single call.
+        
+        Args:
+            query_embeddings: float32 matrix of shape (n_queries, dim)
+            k: Number of documents to retrieve per query
+            mask: Only search chunks where the mask is True (applied inside FAISS)
+            
+        Returns:
+            One list of (document_id, similarity_score) tuples per query, best first
+        """
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        if query_embeddings.shape[1] != self.index.d:
+            raise ValueError(f"Query embedding dimension {query_embeddings.shape[1]} "
+                             f"does not match index dimension {self.index.d}")
+        
+        if mask is not None and not mask.any():
+            return [[] for _ in range(len(query_embeddings))]
+        
+        # Search in FAISS index
+        with span("rag.faiss_search", queries=len(query_embeddings), k=k, filtered=mask is not None), \
+                timed(SEARCH_LATENCY, index_type=self.index_config.get("index_type", "flat"),
+                      filtered=str(mask is not None).lower()):
+            if mask is None:
+                distances, indices = self.index.search(query_embeddings, k)
+            else:
+                distances, indices = filtered_search(
+                    self.index, query_embeddings, min(k, int(mask.sum())), mask, self.index_config
+                )
+        
+        results = []
+        for row_ids, row_distances in zip(indices, distances):
+            # Convert L2 distance to similarity score (0-1)
+            results.append([(int(idx), float(1 / (1 + distance)))
+                            for idx, distance in zip(row_ids, row_distances)
+                            if 0 <= idx < len(self.chunks)])
+        return results
+    
+    def _ids_to_documents(self, candidates: List[Tuple[int, float]]) -> List[Tuple[str, float]]:
+        """Map (document_id, score) pairs to (document_text, score)."""
+        return [(self.chunks[idx], score) for idx, score in candidates]
+    
+    def _document_vectors(self, ids: List[int]) -> Optional[np.ndarray]:
         """
-        Retrieve relevant documents for a query using FAISS.
+        Stored vectors for document ids (None if the index can't reconstruct them).
+        """
+        if self.embeddings is not None:
+            return self.embeddings[ids]
+        # Lexical candidates can be chunks that have no vector yet
+        pending = set(self.pending_embeddings)
+        try:
+            return np.vstack([np.zeros(self.index.d, dtype=np.float32) if i in pending else self.index.reconstruct(i)
+                              for i in ids])
+        except RuntimeError:
+            return None
+    
+    def ranked_candidates(self, query: str, query_embedding: Optional[np.ndarray], k: int,
+                          filters: Optional[RetrievalFilter] = None
+                          ) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """
+        Unnormalized vector and lexical rankings, for merging with other corpora.
+        Vector scores are 1 / (1 + L2 distance), so rankings from corpora embedded
+        with the same model are directly comparable.
+        
+        Args:
+            query: User query
+            query_embedding: Query embedding vector, or None to skip the vector search
+            k: Results per ranking
+            filters: Section / topic tag / role filter; a filter matching no chunk
+                returns empty rankings
+            
+        Returns:
+            Tuple of (vector [(document_id, similarity)], lexical [(document_id, bm25_score)])
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        mask = self.filter_mask(filters, fallback_to_all=False)
+        if mask is not None and not mask.any():
+            return [], []
+        vector = self._search_ids(query_embedding, k, mask) if query_embedding is not None else []
+        lexical = self.lexical_index.search(query, k, mask) if HYBRID_RETRIEVAL and self.lexical_index else []
+        return vector, lexical
+    
+    def _use_lexical_fast_path(self, query: str, mask: Optional[np.ndarray] = None) -> bool:
+        """
+        True when the BM25 match is confident enough to skip the embedding round trip:
+        a short keyword query whose terms all appear in a clearly best document.
+        """
+        if not (HYBRID_RETRIEVAL and LEXICAL_FAST_PATH and self.lexical_index):
+            return False
+        confidence = self.lexical_index.confidence(query, mask)
+        return (0 < confidence["terms"] <= LEXICAL_MAX_TERMS
+                and confidence["coverage"] >= LEXICAL_MIN_COVERAGE
+                and confidence["margin"] >= LEXICAL_MIN_MARGIN)
+    
+    def _hybrid_candidates(self, query: str, query_embedding: Optional[np.ndarray],
+                           k: int, mask: Optional[np.ndarray] = None,
+                           vector_hits: Optional[List[Tuple[int, float]]] = None) -> List[Tuple[int, float]]:
+        """
+        Candidate documents from BM25 and/or FAISS, merged by reciprocal rank fusion.
+        Without a query embedding only the lexical index is used.
+        
+        Args:
+            query: User query
+            query_embedding: Query embedding vector, or None for the lexical fast path
+            k: Number of candidates
+            mask: Only consider chunks where the mask is True (see filter_mask)
+            vector_hits: FAISS results already computed for this query (batch search)
+            
+        Returns:
+            List of (document_id, relevance) tuples, best first, relevance in (0, 1]
+        """
+        lexical = self.lexical_index.search(query, k, mask) if HYBRID_RETRIEVAL and self.lexical_index else []
+        
+        if query_embedding is None:
+            top = lexical[0][1] if lexical else 1.0
+            return [(idx, score / top) for idx, score in lexical]
+        
+        if vector_hits is None:
+            vector_hits = self._search_ids(query_embedding, k, mask)
+        vector = apply_similarity_cutoff(vector_hits, MIN_SIMILARITY, RELATIVE_SIMILARITY_CUTOFF)
+        if not lexical:
+            return vector
+        
+        fused = reciprocal_rank_fusion([[idx for idx, _ in vector], [idx for idx, _ in lexical]])[:k]
+        top = fused[0][1]
+        return [(idx, score / top) for idx, score in fused]
+    
+    def _select_context(self, query: str, query_embedding: Optional[np.ndarray],
+                        mask: Optional[np.ndarray] = None,
+                        vector_hits: Optional[List[Tuple[int, float]]] = None) -> List[Tuple[str, float]]:
+        """
+        Adaptive-k retrieval: fetch a hybrid candidate pool, drop weak matches,
+        diversify with MMR and pack the result into the context token budget.
+        
+        Args:
+            query: User query (drives lexical matching and sentence-level packing)
+            query_embedding: Query embedding vector, or None for the lexical fast path
+            mask: Only consider chunks where the mask is True (see filter_mask)
+            vector_hits: FAISS results for RETRIEVAL_CANDIDATES, already computed (batch search)
+            
+        Returns:
+            List of (packed_document_text, relevance_score) tuples
+        """
+        path = "hybrid" if query_embedding is not None else "lexical"
+        with span("rag.select_context", path=path, filtered=mask is not None) as current, \
+                timed(RETRIEVAL_LATENCY, path=path):
+            candidates = self._hybrid_candidates(query, query_embedding, RETRIEVAL_CANDIDATES, mask, vector_hits)
+            if not candidates:
+                # e.g. the filter only matches pinned chunks, which the cached prefix already holds
+                return []
+            
+            vectors = self._document_vectors([idx for idx, _ in candidates])
+            order = mmr_rerank(vectors, [score for _, score in candidates], MAX_CONTEXT_DOCS, MMR_LAMBDA)
+            selected = [candidates[pos] for pos in order]
+            
+            packed, stats = self.context_packer.pack(
+                [self.chunks[idx] for idx, _ in selected], query
+            )
+            current.set_attributes({"candidates": len(candidates), "selected": len(selected),
+                                    "tokens": stats["tokens_after"]})
+        with self._context_stats_lock:
+            self._context_stats["queries"] += 1
+            self._context_stats["tokens_before"] += stats["tokens_before"]
+            self._context_stats["tokens_saved"] += stats["tokens_saved"]
+        CONTEXT_TOKENS.observe(stats["tokens_after"])
+        log.debug("Selected context", docs=len(selected), candidates=len(candidates),
+                  tokens=stats["tokens_after"], tokens_saved=stats["tokens_saved"])
+        
+        return [(text, score) for text, (_, score) in zip(packed, selected) if text]
+    
+    def _count_lexical_fast_path(self) -> None:
+        # Reached from to_thread workers and the batch / shard executors
+        with self._context_stats_lock:
+            self.lexical_fast_path_hits += 1
+    
+    def context_stats(self) -> dict:
+        """
+        Cumulative prompt tokens saved by the context packer.
+        """
+        with self._context_stats_lock:
+            stats = dict(self._context_stats)
+        queries = stats["queries"]
+        stats["avg_tokens_saved"] = round(stats["tokens_saved"] / queries, 1) if queries else 0.0
+        return stats
+    
+    @traced("rag.retrieve")
+    def retrieve_relevant_documents(self, query: str, k: int = 5,
+                                    query_embedding: Optional[np.ndarray] = None,
+                                    filters: Optional[RetrievalFilter] = None) -> List[Tuple[str, float]]:
+        """
+        Retrieve relevant documents for a query using BM25 + FAISS hybrid search.
         Ultra-fast retrieval with low latency.
-        Uses retry logic for embedding the query.
+        Confident keyword matches skip the embedding call entirely; otherwise
+        query embeddings are cached, and a query the provider can't embed in
+        time is answered from BM25 alone.
+        Metadata filters restrict both searches to matching chunks.
         
         Args:
             query: User query
             k: Number of documents to retrieve
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            filters: Section / topic tag / role filter
             
         Returns:
-            List of (document_text, distance_score) tuples
+            List of (document_text, relevance_score) tuples
         """
         if self.index is None:
             raise ValueError("Index not built. Call build_index() first.")
         
-        # Get query embedding with retry logic
-        query_embedding = self._get_embedding_with_retry(query, max_retries=3)
-        query_embedding = np.array([query_embedding], dtype=np.float32)
+        mask = self.filter_mask(filters)
         
-        # Search in FAISS index
-        distances, indices = self.index.search(query_embedding, k)
+        # Confident keyword matches are answered without an embedding round trip
+        if query_embedding is None and self._use_lexical_fast_path(query, mask):
+            self._count_lexical_fast_path()
+            return self._ids_to_documents(self._hybrid_candidates(query, None, k, mask))
         
-        results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if 0 <= idx < len(self.metadata):
-                doc_text = self.metadata[idx]['text']
-                # Convert L2 distance to similarity score (0-1)
-                similarity = 1 / (1 + distance)
-                results.append((doc_text, similarity))
+        # Get query embedding (cached, within the provider's latency budget; None falls back to BM25)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         
-        return results
+        return self._ids_to_documents(self._hybrid_candidates(query, query_embedding, k, mask))
+    
+    def _build_user_message(self, query: str, relevant_docs: List[Tuple[str, float]], use_rag: bool,
+                            pinned: bool = False, voice: bool = False) -> str:
+        """
+        Build the generation prompt for a query and its retrieved references.
+        With `pinned`, the prompt also points the model at the pinned material in the cached prefix.
+        With `voice`, the answer is asked to be short, plain spoken text (it goes straight to TTS).
+        """
+        voice_instruction = "\n\nThis answer is read aloud: reply in at most five short sentences of plain " \
+            "spoken text, with no markdown, lists or headings." if voice else ""
+        if not use_rag:
+            return query + voice_instruction
+        
+        # Build context from retrieved documents
+        context = "\n\n".join([f"[Reference {i+1}]\n{doc}" for i, (doc, _) in enumerate(relevant_docs)])
+        sources = "these career knowledge references and the pinned reference material" if pinned \
+            else "these career knowledge references"
+        
+        return f"""Based on {sources}:
+
+{context}
+
+Please answer the following career question: {query}
+
+Provide specific, actionable advice with concrete examples from the knowledge base. Mention relevant salary ranges and 
+career paths where applicable.{voice_instruction}"""
     
-    def generate_career_advice(self, query: str, use_rag: bool = True) -> Tuple[str, float, List[str]]:
+    @traced("rag.career_advice")
+    def generate_career_advice(self, query: str, use_rag: bool = True,
+                               query_embedding: Optional[np.ndarray] = None,
+                               filters: Optional[RetrievalFilter] = None) -> Tuple[str, float, List[str]]:
         """
         Generate career advice using RAG.
         Combines retrieval-augmented generation with Gemini LLM.
+        Near-identical questions are served from the semantic answer cache.
+        Context is selected adaptively (cutoff, MMR, token-budget packing).
         
         Args:
             query: User's career question
             use_rag: Whether to use retrieval (True) or direct LLM (False)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            filters: Section / topic tag / role filter applied to retrieval
             
         Returns:
             Tuple of (response_text, latency_ms, source_documents)
@@ -283,60 +1129,401 @@ class CareerRAGSystem:
         start_time = time.time()
         
         source_docs = []
-        context = ""
+        relevant_docs = []
         
+        mask = self.filter_mask(filters) if use_rag else None
+        # Answers built from filtered context are cached per filter
+        scope = filters.describe() if mask is not None else ""
+        # Pinned chunks already sit in the cached prompt prefix
+        context, pinned = self._generation_context()
         if use_rag:
+            mask = self._exclude_pinned(mask, pinned)
+        
+        if use_rag:
+            # Confident keyword matches skip the embedding round trip (and the answer cache)
+            if query_embedding is None and self._use_lexical_fast_path(query, mask):
+                self._count_lexical_fast_path()
+            else:
+                if query_embedding is None:
+                    query_embedding = self.embed_query(query)
+                
+                # Serve near-identical questions from the semantic answer cache
+                cached = self.answer_cache.lookup(query_embedding, scope) if query_embedding is not None else None
+                if cached is not None:
+                    advice, source_docs, similarity = cached
+                    total_time = (time.time() - start_time) * 1000
+                    REQUEST_LATENCY.labels(mode="sync", outcome="answer_cache").observe(total_time / 1000)
+                    log.info("Answer cache hit", similarity=round(similarity, 3), total_ms=round(total_time, 2))
+                    return advice, total_time, source_docs
+            
             # Retrieve relevant documents
             retrieval_start = time.time()
-            relevant_docs = self.retrieve_relevant_documents(query, k=3)
+            relevant_docs = self._select_context(query, query_embedding, mask)
             retrieval_time = (time.time() - retrieval_start) * 1000
-            
-            # Build context from retrieved documents
-            context = "\n\n".join([f"[Reference {i+1}]\n{doc}" for i, (doc, _) in enumerate(relevant_docs)])
             source_docs = [doc for doc, _ in relevant_docs]
             
-            print(f"Document retrieval took {retrieval_time:.2f}ms")
+            log.info("Document retrieval finished", retrieval_ms=round(retrieval_time, 2), docs=len(source_docs))
         
         # Generate response using Gemini
         generation_start = time.time()
+        user_message = self._build_user_message(query, relevant_docs, use_rag, pinned is not None)
         
-        system_prompt = """You are an expert career advisor at Pathfinder AI. You have deep knowledge of career paths, 
-salary expectations, skill requirements, and career transitions in India. Provide practical, actionable career advice 
-based on the user's question. Be specific with salary ranges, timeline expectations, and actionable next steps."""
+        try:
+            with span("rag.generate", cached_prefix=context is not None), \
+                    timed(GENERATION_LATENCY, mode="sync"):
+                response = self.generation_pool.generate(user_message, context=context)
+            
+            advice = response.text
+            generation_time = (time.time() - generation_start) * 1000
+            total_time = (time.time() - start_time) * 1000
+            
+            REQUEST_LATENCY.labels(mode="sync", outcome="generated").observe(total_time / 1000)
+            log.info("Generation finished", generation_ms=round(generation_time, 2), total_ms=round(total_time, 2))
+            
+            if use_rag and query_embedding is not None:
+                self.answer_cache.put(query_embedding, advice, source_docs, scope)
+            
+            return advice, total_time, source_docs
+            
+        except Exception as e:
+            REQUEST_LATENCY.labels(mode="sync", outcome="error").observe(time.time() - start_time)
+            log.error("Error generating response", error=str(e))
+            return f"Error: {str(e)}", 0, source_docs
+    
+    # ------------------------------------------------------------------
+    # Async API (for event-loop callers such as LiveKit function tools)
+    # ------------------------------------------------------------------
+    
+    async def aembed_query(self, query: str) -> Optional[np.ndarray]:
+        """
+        Async counterpart of embed_query (shares the same query cache).
+        """
+        key = normalize_query(query) or query.strip()
+        embedding = self.query_cache.get(key)
+        if embedding is not None:
+            return embedding
+        
+        try:
+            with span("rag.embed_query", provider=self.embedding_provider.name), \
+                    timed(EMBEDDING_LATENCY, provider=self.embedding_provider.name, kind="query"):
+                embedding = await self.embedding_provider.aembed_query(query.strip() or key)
+        except EmbeddingUnavailable as e:
+            return self._query_embedding_failed(e)
+        self.query_cache.put(key, embedding)
+        return embedding
+    
+    @traced("rag.retrieve")
+    async def aretrieve_relevant_documents(self, query: str, k: int = 5,
+                                           query_embedding: Optional[np.ndarray] = None,
+                                           filters: Optional[RetrievalFilter] = None) -> List[Tuple[str, float]]:
+        """
+        Async counterpart of retrieve_relevant_documents.
+        The embedding call is awaited and the hybrid search runs in a worker thread.
+        
+        Args:
+            query: User query
+            k: Number of documents to retrieve
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            filters: Section / topic tag / role filter
+            
+        Returns:
+            List of (document_text, similarity_score) tuples
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        mask = self.filter_mask(filters)
         
+        if query_embedding is None and self._use_lexical_fast_path(query, mask):
+            self._count_lexical_fast_path()
+            return self._ids_to_documents(self._hybrid_candidates(query, None, k, mask))
+        
+        if query_embedding is None:
+            query_embedding = await self.aembed_query(query)
+        
+        candidates = await asyncio.to_thread(self._hybrid_candidates, query, query_embedding, k, mask)
+        return self._ids_to_documents(candidates)
+    
+    @traced("rag.prefetch_context")
+    async def aprefetch_context(self, query: str,
+                                filters: Optional[RetrievalFilter] = None) -> SpeculativeContext:
+        """
+        Embed a query and select its generation context ahead of the advice call
+        (speculative retrieval on a transcript, see rag_speculative).
+        Same steps as the advice paths, so the result can be passed back to them
+        as query_embedding / context_docs.
+        
+        Args:
+            query: User utterance
+            filters: Section / topic tag / role filter applied to retrieval
+            
+        Returns:
+            Embedding (None on the lexical fast path) and packed context documents
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        mask = self.filter_mask(filters)
+        _, pinned = await self._ageneration_context()
+        mask = self._exclude_pinned(mask, pinned)
+        
+        query_embedding = None
+        if not self._use_lexical_fast_path(query, mask):
+            query_embedding = await self.aembed_query(query)
+        documents = await asyncio.to_thread(self._select_context, query, query_embedding, mask)
+        return SpeculativeContext(query, query_embedding, documents,
+                                  filters.describe() if filters is not None else "", self)
+    
+    async def _agenerate_text(self, user_message: str, context: Optional[CacheHandle] = None) -> str:
+        """
+        One non-streaming Gemini generation for a prepared user message,
+        on the cached prompt prefix when `context` is given.
+        """
+        with span("rag.generate", cached_prefix=context is not None), \
+                timed(GENERATION_LATENCY, mode="async"):
+            response = await self.generation_pool.agenerate(user_message, context=context)
+        return response.text
+    
+    @traced("rag.career_advice")
+    async def agenerate_career_advice(self, query: str, use_rag: bool = True,
+                                      query_embedding: Optional[np.ndarray] = None,
+                                      filters: Optional[RetrievalFilter] = None,
+                                      context_docs: Optional[List[Tuple[str, float]]] = None
+                                      ) -> Tuple[str, float, List[str]]:
+        """
+        Async counterpart of generate_career_advice.
+        
+        Args:
+            query: User's career question
+            use_rag: Whether to use retrieval (True) or direct LLM (False)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            filters: Section / topic tag / role filter applied to retrieval
+            context_docs: Context already selected for query_embedding and this filter,
+                e.g. by aprefetch_context (skips retrieval)
+            
+        Returns:
+            Tuple of (response_text, latency_ms, source_documents)
+        """
+        start_time = time.time()
+        
+        source_docs = []
+        relevant_docs = []
+        
+        mask = self.filter_mask(filters) if use_rag else None
+        scope = filters.describe() if mask is not None else ""
+        context, pinned = await self._ageneration_context()
         if use_rag:
-            user_message = f"""Based on these career knowledge references:
-
-{context}
-
-Please answer the following career question: {query}
-
-Provide specific, actionable advice with concrete examples from the knowledge base. Mention relevant salary ranges and 
-career paths where applicable."""
-        else:
-            user_message = query
+            mask = self._exclude_pinned(mask, pinned)
         
-        try:
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            response = model.generate_content([
-                {"role": "user", "parts": [{"text": system_prompt + "\n\n" + user_message}]}
-            ])
+        if use_rag:
+            if query_embedding is None and self._use_lexical_fast_path(query, mask):
+                self._count_lexical_fast_path()
+            else:
+                if query_embedding is None:
+                    query_embedding = await self.aembed_query(query)
+                
+                cached = self.answer_cache.lookup(query_embedding, scope) if query_embedding is not None else None
+                if cached is not None:
+                    advice, source_docs, similarity = cached
+                    total_time = (time.time() - start_time) * 1000
+                    REQUEST_LATENCY.labels(mode="async", outcome="answer_cache").observe(total_time / 1000)
+                    log.info("Answer cache hit", similarity=round(similarity, 3), total_ms=round(total_time, 2))
+                    return advice, total_time, source_docs
             
-            advice = response.text
+            retrieval_start = time.time()
+            if context_docs is not None:
+                relevant_docs = context_docs
+            else:
+                relevant_docs = await asyncio.to_thread(self._select_context, query, query_embedding, mask)
+            retrieval_time = (time.time() - retrieval_start) * 1000
+            source_docs = [doc for doc, _ in relevant_docs]
+            
+            log.info("Document retrieval finished", retrieval_ms=round(retrieval_time, 2), docs=len(source_docs),
+                     prefetched=context_docs is not None)
+        
+        generation_start = time.time()
+        user_message = self._build_user_message(query, relevant_docs, use_rag, pinned is not None)
+        
+        try:
+            advice = await self._agenerate_text(user_message, context)
             generation_time = (time.time() - generation_start) * 1000
             total_time = (time.time() - start_time) * 1000
             
-            print(f"Generation took {generation_time:.2f}ms | Total time: {total_time:.2f}ms")
+            REQUEST_LATENCY.labels(mode="async", outcome="generated").observe(total_time / 1000)
+            log.info("Generation finished", generation_ms=round(generation_time, 2), total_ms=round(total_time, 2))
+            
+            if use_rag and query_embedding is not None:
+                self.answer_cache.put(query_embedding, advice, source_docs, scope)
             
             return advice, total_time, source_docs
             
         except Exception as e:
-            print(f"Error generating response: {e}")
+            REQUEST_LATENCY.labels(mode="async", outcome="error").observe(time.time() - start_time)
+            log.error("Error generating response", error=str(e))
             return f"Error: {str(e)}", 0, source_docs
+    
+    async def astream_career_advice(self, query: str, use_rag: bool = True,
+                                    query_embedding: Optional[np.ndarray] = None,
+                                    filters: Optional[RetrievalFilter] = None,
+                                    trace_parent: Optional[Context] = None,
+                                    context_docs: Optional[List[Tuple[str, float]]] = None) -> AsyncIterator[str]:
+        """
+        Stream career advice as sentence-sized chunks while Gemini is still generating.
+        Lets the voice pipeline speak the first sentence before the answer is complete.
+        The answer is capped at VOICE_MAX_OUTPUT_TOKENS, since it is spoken as is.
+        Never raises: a failure at any step yields STREAM_FALLBACK_MESSAGE instead.
+        The full answer is stored in the semantic answer cache once the stream ends.
+        
+        Args:
+            query: User's career question
+            use_rag: Whether to use retrieval (True) or direct LLM (False)
+            query_embedding: Precomputed query embedding (skips the embedding call)
+            filters: Section / topic tag / role filter applied to retrieval
+            trace_parent: Trace context to nest the spans under (the stream is usually
+                consumed after the calling tool has returned)
+            context_docs: Context already selected for query_embedding and this filter,
+                e.g. by aprefetch_context (skips retrieval)
+            
+        Yields:
+            Sentence chunks of the advice
+        """
+        start_time = time.time()
+        chunker = SentenceChunker()
+        relevant_docs = []
+        cached = None
+        # A span can't stay current across yields, so the request span is entered around each step
+        request_span = detached_span("rag.stream_career_advice", trace_parent, use_rag=use_rag)
+        
+        try:
+            try:
+                with activate(request_span):
+                    mask = self.filter_mask(filters) if use_rag else None
+                    # Voice-length answers are cached apart from the full written ones
+                    scope = (filters.describe() if mask is not None else "") + "|voice"
+                    context, pinned = await self._ageneration_context()
+                    
+                    if use_rag:
+                        mask = self._exclude_pinned(mask, pinned)
+                        if query_embedding is None and self._use_lexical_fast_path(query, mask):
+                            self._count_lexical_fast_path()
+                        else:
+                            if query_embedding is None:
+                                query_embedding = await self.aembed_query(query)
+                            if query_embedding is not None:
+                                cached = self.answer_cache.lookup(query_embedding, scope)
+                        
+                        if cached is None and context_docs is not None:
+                            relevant_docs = context_docs
+                        elif cached is None:
+                            relevant_docs = await asyncio.to_thread(
+                                self._select_context, query, query_embedding, mask
+                            )
+                        if cached is None:
+                            log.info("Document retrieval finished",
+                                     retrieval_ms=round((time.time() - start_time) * 1000, 2),
+                                     docs=len(relevant_docs), prefetched=context_docs is not None)
+                    
+                    user_message = self._build_user_message(query, relevant_docs, use_rag, pinned is not None,
+                                                            voice=True)
+                    generation_span = None if cached is not None else \
+                        detached_span("rag.generate", cached_prefix=context is not None, stream=True)
+            except Exception as e:
+                # The stream is consumed by the TTS pipeline, outside the calling tool's error handling
+                request_span.record_exception(e)
+                REQUEST_LATENCY.labels(mode="stream", outcome="error").observe(time.time() - start_time)
+                log.error("Error preparing streamed advice", error=str(e))
+                yield STREAM_FALLBACK_MESSAGE
+                return
+            
+            if cached is not None:
+                advice, _, similarity = cached
+                REQUEST_LATENCY.labels(mode="stream", outcome="answer_cache").observe(time.time() - start_time)
+                log.info("Answer cache hit", similarity=round(similarity, 3))
+                for chunk in chunker.feed(advice):
+                    yield chunk
+                remainder = chunker.flush()
+                if remainder:
+                    yield remainder
+                return
+            
+            parts = []
+            first_chunk_time = None
+            generation_start = time.time()
+            
+            try:
+                with activate(generation_span):
+                    response = await self.generation_pool.agenerate(user_message, stream=True, context=context,
+                                                                    max_output_tokens=VOICE_MAX_OUTPUT_TOKENS)
+                
+                async for piece in response:
+                    text = piece.text
+                    parts.append(text)
+                    for chunk in chunker.feed(text):
+                        if first_chunk_time is None:
+                            first_chunk_time = (time.time() - start_time) * 1000
+                            FIRST_SENTENCE_LATENCY.observe(first_chunk_time / 1000)
+                            log.info("First sentence ready", first_sentence_ms=round(first_chunk_time, 2))
+                        yield chunk
+                
+                remainder = chunker.flush()
+                if remainder:
+                    yield remainder
+            except Exception as e:
+                generation_span.record_exception(e)
+                REQUEST_LATENCY.labels(mode="stream", outcome="error").observe(time.time() - start_time)
+                log.error("Error streaming response", error=str(e))
+                yield STREAM_FALLBACK_MESSAGE
+                return
+            finally:
+                generation_span.end()
+            
+            total_time = (time.time() - start_time) * 1000
+            GENERATION_LATENCY.labels(mode="stream").observe(time.time() - generation_start)
+            REQUEST_LATENCY.labels(mode="stream", outcome="generated").observe(total_time / 1000)
+            log.info("Streaming generation finished", total_ms=round(total_time, 2))
+            
+            if use_rag and query_embedding is not None:
+                self.answer_cache.put(query_embedding, "".join(parts), [doc for doc, _ in relevant_docs], scope)
+        finally:
+            request_span.end()
 
 
-# Global RAG instance for function tool usage
+# Global RAG instance for function tool usage.
+# Callers take one reference per query; a reload replaces it with a fully built instance.
 _rag_instance = None
+_rag_init_lock = threading.Lock()
+_rag_reload_lock = threading.Lock()
+_kb_watcher: Optional[KnowledgeBaseWatcher] = None
+_embedding_retry_timer: Optional[threading.Timer] = None
+
+
+def _schedule_embedding_retry(rag: CareerRAGSystem) -> None:
+    """
+    Re-embed the chunks `rag` was built without, EMBED_RETRY_INTERVAL_SECONDS from now.
+    The retry is a normal reload: only the missing vectors are requested, and the
+    rebuilt index is swapped in once complete. One timer per process.
+    """
+    global _embedding_retry_timer
+    
+    if not rag.pending_embeddings or EMBED_RETRY_INTERVAL_SECONDS <= 0:
+        return
+    if _embedding_retry_timer is not None and _embedding_retry_timer.is_alive():
+        return
+    _embedding_retry_timer = threading.Timer(EMBED_RETRY_INTERVAL_SECONDS, _retry_pending_embeddings)
+    _embedding_retry_timer.daemon = True
+    _embedding_retry_timer.start()
+
+
+def _retry_pending_embeddings() -> None:
+    global _embedding_retry_timer
+    
+    _embedding_retry_timer = None
+    try:
+        # Reschedules itself through reload_career_rag while chunks are still missing
+        reload_career_rag()
+    except Exception as e:
+        log.error("Re-embedding failed chunks did not complete", error=str(e))
+        _schedule_embedding_retry(_rag_instance)
 
 
 def initialize_career_rag(knowledge_base_path: str = "career_knowledge_base.txt", 
@@ -353,16 +1540,22 @@ def initialize_career_rag(knowledge_base_path: str = "career_knowledge_base.txt"
     """
     global _rag_instance
     
-    print("Initializing Career RAG System...")
-    _rag_instance = CareerRAGSystem(knowledge_base_path)
-    _rag_instance.load_knowledge_base()
-    _rag_instance.build_index(force_rebuild=force_rebuild)
+    log.info("Initializing Career RAG System")
+    # Publish the instance only once it is fully built
+    rag = CareerRAGSystem(knowledge_base_path)
+    rag.load_knowledge_base()
+    rag.build_index(force_rebuild=force_rebuild)
+    rag.pin_context()
+    _rag_instance = rag
+    _schedule_embedding_retry(rag)
     
-    print("✓ Career RAG System initialized successfully!")
+    log.info("Career RAG System initialized", documents=rag.index.ntotal)
     return _rag_instance
 
 
-def get_career_advice(query: str, use_rag: bool = True) -> dict:
+def get_career_advice(query: str, use_rag: bool = True,
+                      query_embedding: Optional[np.ndarray] = None,
+                      filters: Optional[RetrievalFilter] = None) -> dict:
     """
     Get career advice for a query using the RAG system.
     Function tool that can be integrated with LiveKit agents.
@@ -370,24 +1563,27 @@ def get_career_advice(query: str, use_rag: bool = True) -> dict:
     Args:
         query: Career question from user
         use_rag: Use retrieval augmentation (default: True)
+        query_embedding: Precomputed query embedding (skips the embedding call)
+        filters: Section / topic tag / role filter applied to retrieval
         
     Returns:
-        Dictionary with advice, latency, and sources
+        Dictionary with advice, latency, sources and cache hit-rate metrics
     """
-    global _rag_instance
-    
-    if _rag_instance is None:
-        _rag_instance = initialize_career_rag()
+    rag = _ensure_rag_instance()
     
     try:
-        advice, latency_ms, sources = _rag_instance.generate_career_advice(query, use_rag=use_rag)
+        advice, latency_ms, sources = rag.generate_career_advice(
+            query, use_rag=use_rag, query_embedding=query_embedding, filters=filters
+        )
         
         return {
             "success": True,
             "advice": advice,
             "latency_ms": latency_ms,
             "sources": sources[:2],  # Return top 2 sources
-            "query": query
+            "query": query,
+            "cache": rag.cache_stats(),
+            "context": rag.context_stats()
         }
     except Exception as e:
         return {
@@ -397,35 +1593,278 @@ def get_career_advice(query: str, use_rag: bool = True) -> dict:
         }
 
 
-def batch_process_queries(queries: List[str]) -> List[dict]:
+def _ensure_rag_instance() -> CareerRAGSystem:
     """
-    Process multiple queries in batch for efficiency.
+    Initialize the global RAG instance exactly once, even under concurrent callers.
+    """
+    global _rag_instance
+    
+    with _rag_init_lock:
+        if _rag_instance is None:
+            initialize_career_rag()
+    return _rag_instance
+
+
+def prewarm_career_rag() -> dict:
+    """
+    Load everything the first query needs, once per process.
+    Meant for LiveKit's prewarm hook so the first caller doesn't pay cold-start costs:
+    opens the index bundle, creates the pooled Gemini model and client and pages
+    the vectors in with one throwaway search.
+    
+    Returns:
+        Timings in milliseconds for each prewarm step
+    """
+    timings = {}
+    
+    start = time.perf_counter()
+    rag = _ensure_rag_instance()
+    timings["rag_ms"] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    try:
+        rag.generation_pool.warmup()
+    except ValueError as e:
+        log.warning("Gemini client not configured", error=str(e))
+    timings["gemini_client_ms"] = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    if rag.index is not None and rag.index.ntotal:
+        rag._search_ids(np.zeros(rag.index.d, dtype=np.float32), 1)
+    timings["index_warmup_ms"] = (time.perf_counter() - start) * 1000
+    
+    return timings
+
+
+def reload_career_rag(force_rebuild: bool = False) -> bool:
+    """
+    Rebuild the index for the current knowledge base and swap it in atomically.
+    The replacement is fully built (incrementally: unchanged chunks reuse cached
+    embeddings) before the global reference changes; queries that already hold
+    the previous instance finish on it, and its mapped files stay valid after
+    the bundle files are replaced.
     
     Args:
-        queries: List of career questions
+        force_rebuild: Rebuild even if the knowledge base is unchanged
         
     Returns:
-        List of results for each query
+        True if a new index was swapped in
     """
     global _rag_instance
     
+    with _rag_reload_lock:
+        current = _ensure_rag_instance()
+        if not force_rebuild and current.is_current():
+            log.info("Knowledge base unchanged and fully embedded; keeping the live index")
+            return False
+        
+        start = time.time()
+        fresh = current.replacement()
+        fresh.load_knowledge_base()
+        fresh.build_index(force_rebuild=force_rebuild)
+        # Query vectors stay valid as long as the embedding model is unchanged
+        if fresh.embedding_provider.model_id == current.embedding_provider.model_id:
+            fresh.query_cache = current.query_cache
+        # Re-pin from the new corpus; the previous instance stops excluding its pinned chunks
+        fresh.pin_context()
+        
+        _rag_instance = fresh
+        log.info("Swapped in reloaded index", documents=fresh.index.ntotal,
+                 pending_embeddings=len(fresh.pending_embeddings), elapsed_ms=round((time.time() - start) * 1000))
+        _schedule_embedding_retry(fresh)
+        return True
+
+
+def start_career_rag_watcher(debounce_ms: int = HOT_RELOAD_DEBOUNCE_MS) -> KnowledgeBaseWatcher:
+    """
+    Watch the knowledge base and hot-reload the index whenever it changes.
+    Safe to call more than once per process; a single watcher is started.
+    """
+    global _kb_watcher
+    
+    rag = _ensure_rag_instance()
+    if _kb_watcher is None:
+        _kb_watcher = KnowledgeBaseWatcher(
+            [rag.knowledge_base_path], lambda _paths: reload_career_rag(), debounce_ms=debounce_ms
+        )
+    return _kb_watcher.start()
+
+
+def classify_career_query(query: str) -> Optional[RetrievalFilter]:
+    """
+    Retrieval filter for a career question (topic tags and roles), or None.
+    Uses the roles of the loaded index; before it is loaded only topics are detected.
+    """
     if _rag_instance is None:
-        _rag_instance = initialize_career_rag()
+        return classify_query(query)
+    return _rag_instance.classify_query(query)
+
+
+def rag_memory_report() -> dict:
+    """
+    Memory report for this process, including the shared index mapping once
+    the RAG system is loaded.
+    """
+    if _rag_instance is None:
+        return memory_report()
+    return _rag_instance.memory_report()
+
+
+async def aprefetch_career_context(query: str) -> Optional[SpeculativeContext]:
+    """
+    Speculative retrieval for a transcript: classify it, embed it and select its
+    context on the live index. Pass the result to aget_career_advice /
+    astream_career_advice as `prefetched` (see rag_speculative.SpeculativeRetriever).
     
-    results = []
-    total_start = time.time()
+    Args:
+        query: User utterance (interim or final transcript)
+        
+    Returns:
+        Prefetched embedding and context
+    """
+    if _rag_instance is None:
+        await asyncio.to_thread(_ensure_rag_instance)
+    rag = _rag_instance
+    return await rag.aprefetch_context(query, rag.classify_query(query))
+
+
+def _prefetched_inputs(rag: CareerRAGSystem, prefetched: Optional[SpeculativeContext], use_rag: bool,
+                       filters: Optional[RetrievalFilter]) -> Tuple[Optional[np.ndarray],
+                                                                     Optional[List[Tuple[str, float]]]]:
+    """
+    The query embedding and context documents a speculative retrieval can supply
+    for an advice call. Nothing is reused from an instance that has since been
+    reloaded, and context selected under a different filter is not reused.
+    Lexical fast-path prefetches are not reused either: they cost no round trip to redo.
+    """
+    if prefetched is None or not use_rag or prefetched.source is not rag or prefetched.embedding is None:
+        return None, None
+    scope = filters.describe() if filters is not None else ""
+    return prefetched.embedding, prefetched.documents if prefetched.scope == scope else None
+
+
+async def aget_career_advice(query: str, use_rag: bool = True,
+                             filters: Optional[RetrievalFilter] = None,
+                             prefetched: Optional[SpeculativeContext] = None) -> dict:
+    """
+    Async version of get_career_advice for event-loop callers (LiveKit tools).
+    Never blocks the loop: network calls are awaited and backoff uses asyncio.sleep.
     
-    for i, query in enumerate(queries, 1):
-        print(f"\nProcessing query {i}/{len(queries)}: {query[:60]}...")
-        result = get_career_advice(query)
-        results.append(result)
+    Args:
+        query: Career question from user
+        use_rag: Use retrieval augmentation (default: True)
+        filters: Section / topic tag / role filter applied to retrieval
+        prefetched: Speculative retrieval matching this query (see aprefetch_career_context)
+        
+    Returns:
+        Dictionary with advice, latency, sources and cache hit-rate metrics
+    """
+    if _rag_instance is None:
+        # Index loading is blocking file I/O; keep it off the event loop
+        await asyncio.to_thread(_ensure_rag_instance)
+    rag = _rag_instance
+    query_embedding, context_docs = _prefetched_inputs(rag, prefetched, use_rag, filters)
     
-    total_time = (time.time() - total_start) * 1000
-    print(f"\n✓ Batch processing completed in {total_time:.2f}ms for {len(queries)} queries")
+    try:
+        advice, latency_ms, sources = await rag.agenerate_career_advice(
+            query, use_rag=use_rag, query_embedding=query_embedding, filters=filters, context_docs=context_docs
+        )
+        
+        return {
+            "success": True,
+            "advice": advice,
+            "latency_ms": latency_ms,
+            "sources": sources[:2],  # Return top 2 sources
+            "query": query,
+            "cache": rag.cache_stats(),
+            "context": rag.context_stats()
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "query": query
+        }
+
+
+async def astream_career_advice(query: str, use_rag: bool = True,
+                                filters: Optional[RetrievalFilter] = None,
+                                trace_parent: Optional[Context] = None,
+                                prefetched: Optional[SpeculativeContext] = None) -> AsyncIterator[str]:
+    """
+    Stream career advice as sentence-sized chunks for the voice pipeline.
+    Never raises (see CareerRAGSystem.astream_career_advice); if the index can't
+    be loaded, the fallback message is spoken.
+    
+    Args:
+        query: Career question from user
+        use_rag: Use retrieval augmentation (default: True)
+        filters: Section / topic tag / role filter applied to retrieval
+        trace_parent: Trace context of the caller (see rag_telemetry.current_trace_context)
+        prefetched: Speculative retrieval matching this query (see aprefetch_career_context)
+        
+    Yields:
+        Sentence chunks of the advice
+    """
+    try:
+        if _rag_instance is None:
+            await asyncio.to_thread(_ensure_rag_instance)
+    except Exception as e:
+        log.error("Career RAG System unavailable for streamed advice", error=str(e))
+        yield STREAM_FALLBACK_MESSAGE
+        return
+    
+    rag = _rag_instance
+    query_embedding, context_docs = _prefetched_inputs(rag, prefetched, use_rag, filters)
+    async for chunk in rag.astream_career_advice(query, use_rag=use_rag, query_embedding=query_embedding,
+                                                 filters=filters, trace_parent=trace_parent,
+                                                 context_docs=context_docs):
+        yield chunk
+
+
+def batch_process_queries(queries: List[str], output_path: Optional[str] = None,
+                          max_concurrency: int = BATCH_GENERATION_CONCURRENCY,
+                          use_rag: bool = True) -> List[dict]:
+    """
+    Process multiple queries in batch for efficiency.
+    Queries are embedded in bulk, searched with one FAISS call over the whole
+    query matrix and generated with bounded concurrency; results stream to
+    `output_path` as JSONL as they finish.
     
+    Args:
+        queries: List of career questions
+        output_path: JSONL file for results (written in completion order)
+        max_concurrency: Maximum Gemini generations in flight
+        use_rag: Use retrieval augmentation (default: True)
+        
+    Returns:
+        List of results for each query, in input order
+    """
+    engine = BatchEngine(_ensure_rag_instance(), RETRIEVAL_CANDIDATES, max_concurrency, use_rag)
+    results = engine.run(queries, output_path)
+    report = engine.last_report
+    log.info("Batch processing completed", queries=report["queries"], succeeded=report["succeeded"],
+             failed=report["failed"], total_ms=report["total_ms"], throughput_qps=report["throughput_qps"])
     return results
 
 
+async def abatch_process_queries(queries: List[str], output_path: Optional[str] = None,
+                                 max_concurrency: int = BATCH_GENERATION_CONCURRENCY,
+                                 use_rag: bool = True) -> Tuple[List[dict], dict]:
+    """
+    Async batch_process_queries for callers already inside an event loop.
+    
+    Returns:
+        Tuple of (results in input order, run report with per-stage timings and throughput)
+    """
+    if _rag_instance is None:
+        await asyncio.to_thread(_ensure_rag_instance)
+    
+    engine = BatchEngine(_rag_instance, RETRIEVAL_CANDIDATES, max_concurrency, use_rag)
+    results = await engine.arun(queries, output_path)
+    return results, engine.last_report
+
+
 # Test the RAG system
 if __name__ == "__main__":
     # Initialize RAG system
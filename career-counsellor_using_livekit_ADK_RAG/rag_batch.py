@@ -0,0 +1,224 @@
+"""
+Vectorized batch engine for the Career RAG System.
+Used for evaluation sweeps and cache warming over large query logs:
+
+1. embed:    unique queries are embedded in bulk (query cache first, then
+             batched, rate-limited requests for the rest)
+2. search:   one FAISS search over the whole query matrix
+3. context:  per-query BM25 fusion, MMR and context packing on the
+             precomputed vector hits
+4. generate: Gemini calls with bounded concurrency, on the cached prompt
+             prefix when context caching is on; each result is written to
+             JSONL as soon as it finishes
+
+The run report holds the time spent in each stage and the overall throughput.
+"""
+
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from rag_cache import normalize_query
+from rag_context_cache import CacheHandle
+
+if TYPE_CHECKING:
+    from career_rag import CareerRAGSystem
+
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    array = np.array(values)
+    return {
+        "p50_ms": round(float(np.percentile(array, 50)), 2),
+        "p95_ms": round(float(np.percentile(array, 95)), 2),
+        "max_ms": round(float(array.max()), 2),
+    }
+
+
+class BatchEngine:
+    """
+    Runs many queries through retrieval and generation as one batch.
+    """
+
+    def __init__(self, rag: "CareerRAGSystem", candidates: int, generation_concurrency: int = 8,
+                 use_rag: bool = True):
+        """
+        Args:
+            rag: Built RAG system
+            candidates: FAISS candidates per query (the retrieval candidate pool size)
+            generation_concurrency: Maximum Gemini generations in flight
+            use_rag: Retrieve context (False sends the bare questions to the model)
+        """
+        self.rag = rag
+        self.candidates = candidates
+        self.generation_concurrency = generation_concurrency
+        self.use_rag = use_rag
+        self.last_report: Optional[dict] = None
+
+    def _embed(self, queries: List[str]) -> Tuple[np.ndarray, np.ndarray, dict]:
+        """
+        Embed all queries, each distinct normalized query once (the first
+        query with that key is embedded as written).
+
+        Returns:
+            Tuple of (embedding matrix, per-query success mask, embedding stats)
+        """
+        keys = [normalize_query(query) or query.strip() for query in queries]
+        originals = {}
+        for key, query in zip(keys, queries):
+            originals.setdefault(key, query.strip())
+        vectors = {}
+        for key in dict.fromkeys(keys):
+            cached = self.rag.query_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+
+        failed = set()
+        if missing:
+            fresh = self.rag.embed_texts([originals[key] for key in missing], progress=False)
+            failed_indices = set(self.rag.embedding_pipeline.last_stats.failed_indices)
+            for j, key in enumerate(missing):
+                if j in failed_indices:
+                    failed.add(key)
+                    continue
+                vectors[key] = fresh[j]
+                self.rag.query_cache.put(key, fresh[j])
+
+        embeddings = np.zeros((len(queries), self.rag.embedding_dim), dtype=np.float32)
+        ok = np.zeros(len(queries), dtype=bool)
+        for i, key in enumerate(keys):
+            if key in vectors:
+                embeddings[i] = vectors[key]
+                ok[i] = True
+        stats = {
+            "unique_queries": len(set(keys)),
+            "query_cache_hits": len(set(keys)) - len(missing),
+            "embedded": len(missing) - len(failed),
+            "failed": len(failed),
+        }
+        return embeddings, ok, stats
+
+    async def _generate(self, position: int, query: str, relevant_docs: List[Tuple[str, float]],
+                        embedding: Optional[np.ndarray], semaphore: asyncio.Semaphore,
+                        context: Optional[CacheHandle] = None, pinned: bool = False) -> dict:
+        """Generate (or serve from the answer cache) the advice for one query."""
+        source_docs = [doc for doc, _ in relevant_docs]
+        record = {"index": position, "query": query}
+        if embedding is not None:
+            cached = self.rag.answer_cache.lookup(embedding)
+            if cached is not None:
+                advice, sources, _ = cached
+                record.update({"success": True, "advice": advice, "sources": sources[:2],
+                               "latency_ms": 0.0, "answer_cache_hit": True})
+                return record
+
+        async with semaphore:
+            start = time.time()
+            try:
+                advice = await self.rag._agenerate_text(
+                    self.rag._build_user_message(query, relevant_docs, self.use_rag, pinned), context
+                )
+            except Exception as e:
+                record.update({"success": False, "error": str(e), "latency_ms": (time.time() - start) * 1000})
+                return record
+            latency_ms = (time.time() - start) * 1000
+
+        if embedding is not None:
+            self.rag.answer_cache.put(embedding, advice, source_docs)
+        record.update({"success": True, "advice": advice, "sources": source_docs[:2],
+                       "latency_ms": latency_ms, "answer_cache_hit": False})
+        return record
+
+    async def arun(self, queries: List[str], output_path: Optional[str] = None) -> List[dict]:
+        """
+        Run a batch of queries.
+
+        Args:
+            queries: Career questions
+            output_path: JSONL file that receives each result as it completes (in completion order)
+
+        Returns:
+            Results in input order (the run report is stored in `last_report`)
+        """
+        if self.rag.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+
+        total_start = time.time()
+        stages = {"embed_ms": 0.0, "search_ms": 0.0, "context_ms": 0.0, "generate_ms": 0.0}
+        embedding_stats = {}
+        contexts: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        embeddings, ok = None, np.zeros(len(queries), dtype=bool)
+        # One cache lookup for the whole batch; pinned chunks are left out of retrieval
+        context, pinned = await self.rag._ageneration_context()
+        mask = self.rag._exclude_pinned(None, pinned)
+
+        if self.use_rag and queries:
+            start = time.time()
+            embeddings, ok, embedding_stats = self._embed(queries)
+            stages["embed_ms"] = (time.time() - start) * 1000
+
+            # One matrix search for every query with an embedding
+            start = time.time()
+            vector_hits = [[] for _ in queries]
+            rows = np.flatnonzero(ok)
+            if len(rows):
+                for row, hits in zip(rows, self.rag._search_ids_batch(embeddings[rows], self.candidates, mask)):
+                    vector_hits[row] = hits
+            stages["search_ms"] = (time.time() - start) * 1000
+
+            # Queries whose embedding failed fall back to lexical-only context
+            start = time.time()
+            for i, query in enumerate(queries):
+                contexts[i] = self.rag._select_context(
+                    query, embeddings[i] if ok[i] else None, mask, vector_hits[i] if ok[i] else None
+                )
+            stages["context_ms"] = (time.time() - start) * 1000
+
+        start = time.time()
+        semaphore = asyncio.Semaphore(self.generation_concurrency)
+        tasks = [
+            asyncio.ensure_future(self._generate(
+                i, query, contexts[i], embeddings[i] if ok[i] else None, semaphore,
+                context, self.use_rag and pinned is not None
+            ))
+            for i, query in enumerate(queries)
+        ]
+        results: List[Optional[dict]] = [None] * len(queries)
+        output = open(output_path, "w", encoding="utf-8") if output_path else None
+        try:
+            for finished in asyncio.as_completed(tasks):
+                record = await finished
+                results[record["index"]] = record
+                if output is not None:
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+        finally:
+            if output is not None:
+                output.close()
+        stages["generate_ms"] = (time.time() - start) * 1000
+
+        total_ms = (time.time() - total_start) * 1000
+        succeeded = [record for record in results if record["success"]]
+        self.last_report = {
+            "queries": len(queries),
+            "succeeded": len(succeeded),
+            "failed": len(queries) - len(succeeded),
+            "answer_cache_hits": sum(1 for record in succeeded if record["answer_cache_hit"]),
+            "embedding": embedding_stats,
+            "stages_ms": {name: round(ms, 2) for name, ms in stages.items()},
+            "total_ms": round(total_ms, 2),
+            "throughput_qps": round(len(queries) / (total_ms / 1000), 2) if total_ms else 0.0,
+            "generation_latency": _percentiles(
+                [record["latency_ms"] for record in succeeded if not record["answer_cache_hit"]]
+            ),
+        }
+        return results
+
+    def run(self, queries: List[str], output_path: Optional[str] = None) -> List[dict]:
+        """Synchronous wrapper around arun (not for use inside a running event loop)."""
+        return asyncio.run(self.arun(queries, output_path))
@@ -0,0 +1,831 @@
+"""
+Offline benchmark suite for the Career RAG System.
+Runs with no network: embeddings come from a local provider (TF-IDF/SVD or
+feature hashing) and generation from a canned-answer model, both wrapped in
+a simulated service with configurable latency, jitter and error injection.
+
+Stages:
+1. chunking:   StructuredChunker throughput on the knowledge base
+2. build:      index build throughput (fit, embed, FAISS, bundle) for the
+               knowledge base and for larger corpora padded with synthetic
+               distractor chunks
+3. retrieval:  FAISS and hybrid (BM25 + FAISS) p50/p99 latency per corpus
+               size and k, plus recall@k / MRR against gold queries whose
+               answers live in known sections
+4. end-to-end: sync, async and streaming advice latency through the
+               simulated services (injected latency and errors included)
+
+The report is JSON. The gated numbers (latency percentiles, recall and MRR;
+throughput is too noisy to gate) are flattened into `metrics` so a run can
+be compared with a baseline report:
+
+    python rag_benchmark.py --output bench.json
+    python rag_benchmark.py --baseline bench.json --output new.json   # exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from google.api_core import exceptions as api_exceptions
+
+from rag_chunker import Chunk, StructuredChunker
+from rag_generation import GenerationPool
+from rag_providers import EmbeddingProvider, HashingTestProvider, LocalTfidfSvdProvider
+from rag_resilience import CircuitBreaker, DeadlineRetrier
+from rag_telemetry import get_logger
+
+REPORT_VERSION = 1
+SYNTHETIC_SECTION = "synthetic"
+
+# (question, section holding the answer); a hit is any chunk in that section or its subsections
+GOLD_QUERIES: List[Tuple[str, str]] = [
+    ("What does a frontend developer earn and which skills are needed?", "2.1"),
+    ("How do I become a machine learning engineer?", "2.2"),
+    ("Is a career in cloud and DevOps worth it?", "2.3"),
+    ("What jobs are there in banking and financial services?", "3.1"),
+    ("Careers at fintech and payments companies", "3.2"),
+    ("How long does it take to become a doctor in India?", "4.1"),
+    ("Healthcare technology jobs for engineers", "4.2"),
+    ("How do I get into a management consulting firm?", "5.1"),
+    ("What does a general manager or operations manager do?", "5.2"),
+    ("Career growth for a UI UX designer", "6.1"),
+    ("Can I make a living as a content creator or writer?", "6.2"),
+    ("Civil engineering jobs in construction and infrastructure", "7.1"),
+    ("Mechanical engineering careers in the automotive industry", "7.2"),
+    ("Electrical engineering jobs in the power sector", "7.3"),
+    ("How should I prepare for the UPSC civil services exam?", "8.1"),
+    ("Jobs in public sector undertakings like ONGC or BHEL", "8.2"),
+    ("Becoming a school teacher or a college professor", "9.1"),
+    ("Is a PhD and an academic research career worth it?", "9.2"),
+    ("How do I start my own business venture?", "10.1"),
+    ("Should I join an early stage startup as an employee?", "10.2"),
+    ("Which technical skills should I learn to stay relevant?", "11.1"),
+    ("How can I improve my communication and leadership skills?", "11.2"),
+    ("How do I switch careers into a completely different field?", "12.1"),
+    ("Changing careers in my forties after a long tenure", "12.2"),
+    ("How much salary increase can I expect over my career?", "13.1"),
+    ("How do I negotiate a higher salary offer?", "13.2"),
+    ("Salary differences between Bangalore, Mumbai and other cities", "13.3"),
+    ("Which industries have the best work-life balance?", "14.1"),
+    ("How do I avoid burnout at work?", "14.2"),
+    ("Remote work trends for Indian professionals", "15.1"),
+    ("Working for foreign companies remotely from India", "15.3"),
+    ("Which certifications are worth pursuing for cloud jobs?", "16"),
+    ("Should I pursue a Master's degree after my Bachelor's?", "17"),
+]
+
+# p99 of fewer samples than this is just the slowest sample (one GC pause or
+# context switch), so it is reported but not gated
+MIN_TAIL_SAMPLES = 100
+# Gated metrics where a larger value is better; everything else gated is a latency.
+# Throughput (chunks/documents per second) is reported but not gated: it is
+# timed over a single ~0.1s build, which moves by more than any tolerance.
+_HIGHER_IS_BETTER = ("_recall", "_mrr")
+
+log = get_logger("benchmark")
+
+
+@dataclass
+class BenchmarkConfig:
+    """Settings for one benchmark run; stored in the report next to the results."""
+    knowledge_base_path: str = "career_knowledge_base.txt"
+    provider: str = "local"
+    corpus_sizes: Tuple[int, ...] = (0, 1000, 4000)  # 0 = the knowledge base as is
+    k_values: Tuple[int, ...] = (1, 3, 5, 10)
+    latency_samples: int = 200
+    chunking_repeats: int = 20
+    embed_latency_ms: float = 30.0
+    embed_jitter_ms: float = 10.0
+    embed_error_rate: float = 0.0
+    embed_query_budget_ms: float = 1500.0
+    embed_hedge_ms: float = 0.0
+    generation_latency_ms: float = 400.0
+    generation_jitter_ms: float = 100.0
+    generation_error_rate: float = 0.0
+    generation_tokens_per_second: float = 250.0
+    e2e_queries: int = 20
+    e2e_concurrency: int = 4
+    embed_requests_per_second: float = 50.0
+    seed: int = 0
+
+
+class SimulatedServiceError(api_exceptions.DeadlineExceeded):
+    """Failure injected by a SimulatedService; transient, like the 504s it stands in for."""
+
+
+class SimulatedService:
+    """
+    Latency and error injection shared by the stand-in providers.
+    Thread-safe; the random stream is seeded so runs are repeatable.
+    """
+
+    def __init__(self, name: str, latency_ms: float, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            name: Service name used in error messages
+            latency_ms: Mean injected latency per call
+            jitter_ms: Standard deviation of the injected latency
+            error_rate: Probability that a call fails after its latency
+            seed: Random seed
+        """
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0}
+
+    def _draw(self) -> Tuple[float, bool]:
+        """Latency (seconds) and failure outcome of the next call."""
+        with self._lock:
+            self._stats["calls"] += 1
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self._stats["errors"] += 1
+        return delay, failed
+
+    def _error(self) -> Exception:
+        return SimulatedServiceError(f"Injected by simulated {self.name}")
+
+    def call(self, timeout: Optional[float] = None) -> None:
+        """
+        Block for one call's latency; raises the injected error if this call fails,
+        or TimeoutError if the latency exceeds `timeout` seconds.
+        """
+        delay, failed = self._draw()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Simulated {self.name} call timed out after {timeout:.3f}s")
+        time.sleep(delay)
+        if failed:
+            raise self._error()
+
+    async def acall(self, timeout: Optional[float] = None) -> None:
+        """Async counterpart of call."""
+        delay, failed = self._draw()
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"Simulated {self.name} call timed out after {timeout:.3f}s")
+        await asyncio.sleep(delay)
+        if failed:
+            raise self._error()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+class SimulatedEmbeddingProvider(EmbeddingProvider):
+    """
+    A local embedding provider behind a simulated network service, called
+    through the same DeadlineRetriers (budget, circuit breakers, hedging) as the
+    Gemini provider. Failures raise EmbeddingUnavailable.
+    """
+
+    name = "simulated"
+
+    def __init__(self, inner: EmbeddingProvider, service: SimulatedService,
+                 query_budget_ms: float = 1500.0, document_budget_s: float = 60.0, hedge_ms: float = 0.0):
+        """
+        Args:
+            inner: Offline provider that computes the vectors ('local' or 'test')
+            service: Latency and error injection per request
+            query_budget_ms: Total time for a query embedding, retries included
+            document_budget_s: Total time for one batch of documents, retries included
+            hedge_ms: Duplicate a query request after this long without an answer (0 = off)
+        """
+        self.inner = inner
+        self.service = service
+        self.task_type = inner.task_type
+        self.query_budget = query_budget_ms / 1000
+        self.document_budget = document_budget_s
+        self.query_retrier = DeadlineRetrier(CircuitBreaker(self.name, kind="query"), hedge_after=hedge_ms / 1000)
+        self.document_retrier = DeadlineRetrier(CircuitBreaker(self.name, kind="documents"))
+        self.fit_s = 0.0
+
+    @property
+    def model_id(self) -> str:
+        return self.inner.model_id
+
+    @property
+    def dimension(self) -> int:
+        return self.inner.dimension
+
+    def fit(self, documents: List[str]) -> None:
+        start = time.perf_counter()
+        self.inner.fit(documents)
+        self.fit_s = time.perf_counter() - start
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        def request(timeout: float) -> np.ndarray:
+            self.service.call(timeout)
+            return self.inner.embed_documents(texts)
+
+        return self.document_retrier.call(request, self.document_budget, kind="documents")
+
+    def embed_query(self, text: str) -> np.ndarray:
+        def request(timeout: float) -> np.ndarray:
+            self.service.call(timeout)
+            return self.inner.embed_query(text)
+
+        return self.query_retrier.call(request, self.query_budget, kind="query", hedge=True)
+
+    async def aembed_query(self, text: str) -> np.ndarray:
+        async def request(timeout: float) -> np.ndarray:
+            await self.service.acall(timeout)
+            return self.inner.embed_query(text)
+
+        return await self.query_retrier.acall(request, self.query_budget, kind="query", hedge=True)
+
+    def stats(self) -> dict:
+        return {"query": self.query_retrier.stats(), "documents": self.document_retrier.stats()}
+
+
+class _SimulatedResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _SimulatedStream:
+    """Async response that yields the answer in small pieces at a fixed token rate."""
+
+    def __init__(self, text: str, tokens_per_second: float, piece_chars: int = 24):
+        self._pieces = [text[i:i + piece_chars] for i in range(0, len(text), piece_chars)]
+        self._piece_delay = (piece_chars / 4) / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    async def __aiter__(self):
+        for piece in self._pieces:
+            await asyncio.sleep(self._piece_delay)
+            yield _SimulatedResponse(piece)
+
+
+class SimulatedModel:
+    """
+    Stand-in for GenerativeModel: waits for the service latency (time to first
+    token), fails at the injected error rate and returns a canned answer whose
+    length doesn't depend on the prompt.
+    """
+
+    ANSWER = ("Based on the references, start by comparing the roles that match your skills. "
+              "Entry salaries in this field usually start between 4 and 8 LPA. "
+              "Build two portfolio projects and earn one recognised certification. "
+              "Apply to mid-size companies first, where you can grow quickly. "
+              "Review your progress every six months and adjust your plan.")
+
+    def __init__(self, service: SimulatedService, tokens_per_second: float):
+        self.service = service
+        self.tokens_per_second = tokens_per_second
+
+    def _generation_s(self) -> float:
+        return (len(self.ANSWER) / 4) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def generate_content(self, user_message: str, stream: bool = False, request_options=None,
+                         generation_config=None):
+        self.service.call()
+        time.sleep(self._generation_s())
+        return _SimulatedResponse(self.ANSWER)
+
+    async def generate_content_async(self, user_message: str, stream: bool = False, request_options=None,
+                                     generation_config=None):
+        await self.service.acall()
+        if stream:
+            return _SimulatedStream(self.ANSWER, self.tokens_per_second)
+        await asyncio.sleep(self._generation_s())
+        return _SimulatedResponse(self.ANSWER)
+
+
+class SimulatedGenerationPool(GenerationPool):
+    """GenerationPool whose models are SimulatedModel instances (no API key or client needed)."""
+
+    def __init__(self, service: SimulatedService, tokens_per_second: float):
+        super().__init__("simulated", "")
+        self._simulated = SimulatedModel(service, tokens_per_second)
+
+    def _ensure_model(self) -> bool:
+        if self._model is not None:
+            return False
+        self._model = self._simulated
+        self._stats["clients_created"] += 1
+        return True
+
+    def async_model(self) -> SimulatedModel:
+        with self._lock:
+            if not self._ensure_model():
+                self._stats["reused_calls"] += 1
+            self._stats["calls"] += 1
+            return self._model
+
+
+def latency_summary(values_ms: Sequence[float]) -> dict:
+    """p50 / p99 / mean / max of a list of latencies in milliseconds."""
+    if not len(values_ms):
+        return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    array = np.asarray(values_ms, dtype=np.float64)
+    return {
+        "samples": len(array),
+        "p50_ms": round(float(np.percentile(array, 50)), 4),
+        "p99_ms": round(float(np.percentile(array, 99)), 4),
+        "mean_ms": round(float(array.mean()), 4),
+        "max_ms": round(float(array.max()), 4),
+    }
+
+
+def synthetic_corpus(chunks: List[Chunk], size: int, seed: int = 0) -> List[Chunk]:
+    """
+    The knowledge base chunks padded to `size` with synthetic distractors.
+    Each distractor keeps a real heading line and mixes words drawn from the
+    whole corpus, so it has realistic vocabulary but answers no gold query.
+
+    Args:
+        chunks: Knowledge base chunks (kept first, in order)
+        size: Total number of chunks (no padding if not larger than the knowledge base)
+        seed: Random seed
+
+    Returns:
+        Chunks for the corpus
+    """
+    rng = random.Random(seed)
+    words = [word for chunk in chunks for word in chunk.text.split()[6:]]
+    corpus = list(chunks)
+    while len(corpus) < size:
+        template = rng.choice(chunks)
+        heading = template.text.split("\n", 1)[0]
+        length = max(20, len(template.text.split()) + rng.randint(-15, 15))
+        body = " ".join(rng.choice(words) for _ in range(length))
+        corpus.append(Chunk(f"{heading}\n{body}", SYNTHETIC_SECTION, SYNTHETIC_SECTION, 0, 0))
+    return corpus
+
+
+def _section_match(section_id: str, expected: str) -> bool:
+    return section_id == expected or section_id.startswith(expected + ".")
+
+
+class RAGBenchmark:
+    """
+    Runs the benchmark stages against CareerRAGSystem instances built in a
+    scratch directory with the simulated providers.
+    """
+
+    def __init__(self, config: BenchmarkConfig, work_dir: str):
+        """
+        Args:
+            config: Benchmark settings
+            work_dir: Scratch directory for the index bundles and embedder state
+        """
+        self.config = config
+        self.work_dir = work_dir
+        with open(config.knowledge_base_path, "r", encoding="utf-8") as f:
+            self.kb_text = f.read()
+        self.chunker = StructuredChunker()
+        self.kb_chunks = self.chunker.chunk(self.kb_text)
+
+    def _service(self, name: str, offset: int) -> SimulatedService:
+        config = self.config
+        if name == "embedding":
+            return SimulatedService(name, config.embed_latency_ms, config.embed_jitter_ms,
+                                    config.embed_error_rate, config.seed + offset)
+        return SimulatedService(name, config.generation_latency_ms, config.generation_jitter_ms,
+                                config.generation_error_rate, config.seed + offset)
+
+    def _inner_provider(self, index_dir: str) -> EmbeddingProvider:
+        if self.config.provider == "test":
+            return HashingTestProvider()
+        return LocalTfidfSvdProvider(state_path=os.path.join(index_dir, "local_embedder.npz"))
+
+    def bench_chunking(self) -> dict:
+        """Chunker throughput on the knowledge base (from the median run)."""
+        timings = []
+        for _ in range(max(1, self.config.chunking_repeats)):
+            start = time.perf_counter()
+            chunks = self.chunker.chunk(self.kb_text)
+            timings.append(time.perf_counter() - start)
+        median_s = float(np.median(timings))
+        return {
+            "chars": len(self.kb_text),
+            "chunks": len(chunks),
+            "latency": latency_summary([t * 1000 for t in timings]),
+            "chars_per_s": round(len(self.kb_text) / median_s, 1),
+            "chunks_per_s": round(len(chunks) / median_s, 1),
+        }
+
+    def build(self, chunks: List[Chunk], label: str):
+        """
+        Build an index over `chunks` in a fresh directory.
+
+        Returns:
+            Tuple of (built CareerRAGSystem, build stats)
+        """
+        from career_rag import CareerRAGSystem
+
+        index_dir = os.path.join(self.work_dir, label)
+        provider = SimulatedEmbeddingProvider(
+            self._inner_provider(index_dir), self._service("embedding", len(chunks)),
+            self.config.embed_query_budget_ms, hedge_ms=self.config.embed_hedge_ms
+        )
+        generation = self._service("generation", len(chunks) + 1)
+        rag = CareerRAGSystem(
+            self.config.knowledge_base_path,
+            embed_requests_per_second=self.config.embed_requests_per_second,
+            embedding_provider=provider,
+            index_dir=index_dir,
+            generation_pool=SimulatedGenerationPool(generation, self.config.generation_tokens_per_second),
+        )
+        rag.chunk_metadata = list(chunks)
+        rag.documents = [chunk.text for chunk in chunks]
+
+        start = time.perf_counter()
+        rag.build_index(force_rebuild=True)
+        build_s = time.perf_counter() - start
+        embedding = rag.embedding_pipeline.last_stats
+        return rag, {
+            "documents": len(chunks),
+            "index_type": rag.index_config["index_type"],
+            "build_s": round(build_s, 4),
+            "fit_s": round(provider.fit_s, 4),
+            "documents_per_s": round(len(chunks) / build_s, 1),
+            "embedding": embedding.as_dict(),
+            "pending_embeddings": len(rag.pending_embeddings),
+        }
+
+    def _gold_embeddings(self, rag) -> np.ndarray:
+        """Gold query vectors from the offline provider, without injected latency or errors."""
+        inner = rag.embedding_provider.inner
+        return np.vstack([
+            inner.embed_query(query) for query, _ in GOLD_QUERIES
+        ]).astype(np.float32)
+
+    def bench_retrieval(self, rag, chunks: List[Chunk]) -> List[dict]:
+        """
+        FAISS-only and hybrid latency plus recall@k / MRR on the gold queries, per k.
+        Latency samples cycle through the gold queries with precomputed embeddings,
+        so the numbers cover search only.
+        """
+        from career_rag import RETRIEVAL_CANDIDATES
+
+        embeddings = self._gold_embeddings(rag)
+        sections = [chunk.section_id for chunk in chunks]
+        n_samples = max(len(GOLD_QUERIES), self.config.latency_samples)
+        results = []
+
+        for k in self.config.k_values:
+            for i in range(min(10, len(GOLD_QUERIES))):  # Warm-up
+                rag._hybrid_candidates(GOLD_QUERIES[i][0], embeddings[i], k)
+
+            vector_ms, hybrid_ms = [], []
+            for sample in range(n_samples):
+                i = sample % len(GOLD_QUERIES)
+                start = time.perf_counter()
+                rag._search_ids(embeddings[i], k)
+                vector_ms.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                rag._hybrid_candidates(GOLD_QUERIES[i][0], embeddings[i], k)
+                hybrid_ms.append((time.perf_counter() - start) * 1000)
+
+            quality = {"vector": [], "hybrid": []}
+            for i, (query, expected) in enumerate(GOLD_QUERIES):
+                rankings = {
+                    "vector": rag._search_ids(embeddings[i], k),
+                    "hybrid": rag._hybrid_candidates(query, embeddings[i], k),
+                }
+                for name, hits in rankings.items():
+                    ranks = [rank for rank, (idx, _) in enumerate(hits[:k], 1)
+                             if _section_match(sections[idx], expected)]
+                    quality[name].append(1.0 / ranks[0] if ranks else 0.0)
+
+            results.append({
+                "k": k,
+                "vector_latency": latency_summary(vector_ms),
+                "hybrid_latency": latency_summary(hybrid_ms),
+                "vector_recall": round(float(np.mean([rr > 0 for rr in quality["vector"]])), 4),
+                "hybrid_recall": round(float(np.mean([rr > 0 for rr in quality["hybrid"]])), 4),
+                "vector_mrr": round(float(np.mean(quality["vector"])), 4),
+                "hybrid_mrr": round(float(np.mean(quality["hybrid"])), 4),
+            })
+
+        # Full context selection (hybrid candidates, MMR, packing) at the serving pool size
+        context_ms = []
+        for sample in range(n_samples):
+            i = sample % len(GOLD_QUERIES)
+            start = time.perf_counter()
+            rag._select_context(GOLD_QUERIES[i][0], embeddings[i])
+            context_ms.append((time.perf_counter() - start) * 1000)
+        results.append({"k": RETRIEVAL_CANDIDATES, "context_latency": latency_summary(context_ms)})
+        return results
+
+    def _e2e_queries(self) -> List[str]:
+        queries = [query for query, _ in GOLD_QUERIES]
+        return [queries[i % len(queries)] for i in range(self.config.e2e_queries)]
+
+    @staticmethod
+    def _reset_caches(rag) -> None:
+        rag.query_cache.clear()
+        rag.answer_cache.invalidate()
+
+    def bench_end_to_end(self, rag) -> dict:
+        """
+        Advice latency through the simulated services: sequential sync calls,
+        concurrent async calls, and streaming (first sentence and full answer).
+        Caches are cleared before each mode, so repeated queries only hit the
+        caches within a mode.
+        """
+        queries = self._e2e_queries()
+        report = {}
+
+        self._reset_caches(rag)
+        latencies, errors = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            advice, _, _ = rag.generate_career_advice(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += advice.startswith("Error:")
+        report["sync"] = {"latency": latency_summary(latencies), "errors": errors}
+
+        self._reset_caches(rag)
+        report["async"] = asyncio.run(self._async_end_to_end(rag, queries))
+
+        self._reset_caches(rag)
+        report["stream"] = asyncio.run(self._stream_end_to_end(rag, queries))
+        return report
+
+    async def _async_end_to_end(self, rag, queries: List[str]) -> dict:
+        semaphore = asyncio.Semaphore(self.config.e2e_concurrency)
+        latencies, errors = [], 0
+
+        async def one(query: str) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                advice, _, _ = await rag.agenerate_career_advice(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += advice.startswith("Error:")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(query) for query in queries))
+        elapsed = time.perf_counter() - start
+        return {
+            "latency": latency_summary(latencies),
+            "errors": errors,
+            "concurrency": self.config.e2e_concurrency,
+            "queries_per_s": round(len(queries) / elapsed, 2) if elapsed else 0.0,
+        }
+
+    async def _stream_end_to_end(self, rag, queries: List[str]) -> dict:
+        first_ms, total_ms = [], []
+        for query in queries:
+            start = time.perf_counter()
+            first = None
+            async for _ in rag.astream_career_advice(query):
+                if first is None:
+                    first = (time.perf_counter() - start) * 1000
+            first_ms.append(first or 0.0)
+            total_ms.append((time.perf_counter() - start) * 1000)
+        return {"first_sentence_latency": latency_summary(first_ms), "latency": latency_summary(total_ms)}
+
+    def run(self) -> dict:
+        """
+        Run every stage.
+
+        Returns:
+            Report dict (see flatten_metrics for the gated numbers)
+        """
+        started = time.time()
+        report = {
+            "version": REPORT_VERSION,
+            "started_at": round(started, 3),
+            "config": asdict(self.config),
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "faiss": getattr(faiss, "__version__", "unknown"),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+            },
+            "chunking": self.bench_chunking(),
+            "corpora": [],
+        }
+
+        end_to_end_rag = None
+        for size in self.config.corpus_sizes:
+            chunks = synthetic_corpus(self.kb_chunks, size, self.config.seed)
+            log.info("Benchmarking corpus", documents=len(chunks))
+            rag, build = self.build(chunks, f"corpus_{len(chunks)}")
+            report["corpora"].append({
+                "documents": len(chunks),
+                "build": build,
+                "retrieval": self.bench_retrieval(rag, chunks),
+            })
+            if end_to_end_rag is None:
+                end_to_end_rag = rag
+
+        if end_to_end_rag is not None and self.config.e2e_queries:
+            log.info("Benchmarking end-to-end latency", documents=end_to_end_rag.index.ntotal)
+            report["end_to_end"] = self.bench_end_to_end(end_to_end_rag)
+            report["end_to_end"]["services"] = {
+                "embedding": end_to_end_rag.embedding_provider.service.stats(),
+                "embedding_retries": end_to_end_rag.embedding_provider.stats(),
+                "generation": end_to_end_rag.generation_pool._simulated.service.stats(),
+            }
+
+        report["elapsed_s"] = round(time.time() - started, 3)
+        report["metrics"] = flatten_metrics(report)
+        return report
+
+
+def flatten_metrics(report: dict) -> dict:
+    """
+    The gated numbers of a report as flat `name: value` pairs, e.g.
+    `retrieval.n82.k5.hybrid_p99_ms` or `retrieval.n82.k5.hybrid_recall`:
+    latency percentiles and retrieval quality. Throughput, and p99 over fewer
+    than MIN_TAIL_SAMPLES samples, stay in the report only.
+    """
+    metrics = {}
+
+    def add_latency(name: str, summary: dict) -> None:
+        metrics[f"{name}p50_ms"] = summary["p50_ms"]
+        if summary.get("samples", 0) >= MIN_TAIL_SAMPLES:
+            metrics[f"{name}p99_ms"] = summary["p99_ms"]
+
+    for corpus in report["corpora"]:
+        prefix = f"n{corpus['documents']}"
+        for row in corpus["retrieval"]:
+            name = f"retrieval.{prefix}.k{row['k']}"
+            if "context_latency" in row:
+                add_latency(f"context.{prefix}.", row["context_latency"])
+                continue
+            for kind in ("vector", "hybrid"):
+                add_latency(f"{name}.{kind}_", row[f"{kind}_latency"])
+                metrics[f"{name}.{kind}_recall"] = row[f"{kind}_recall"]
+                metrics[f"{name}.{kind}_mrr"] = row[f"{kind}_mrr"]
+    for mode, result in report.get("end_to_end", {}).items():
+        if mode == "services":
+            continue
+        add_latency(f"e2e.{mode}.", result["latency"])
+        if "first_sentence_latency" in result:
+            metrics[f"e2e.{mode}.first_sentence_p50_ms"] = result["first_sentence_latency"]["p50_ms"]
+    return metrics
+
+
+def compare_reports(current: dict, baseline: dict, latency_tolerance: float = 0.25,
+                    quality_tolerance: float = 0.02, min_latency_delta_ms: float = 0.5,
+                    min_tail_delta_ms: float = 2.0) -> List[dict]:
+    """
+    Regressions of `current` against `baseline`.
+    Latencies may grow by a relative `latency_tolerance` (and always by up to
+    `min_latency_delta_ms`, or `min_tail_delta_ms` for p99); recall and MRR may drop by at most `quality_tolerance`
+    (absolute). Metrics missing from either report are skipped.
+
+    Args:
+        current: Report under test
+        baseline: Earlier report
+        latency_tolerance: Allowed relative slowdown
+        quality_tolerance: Allowed absolute recall / MRR drop
+        min_latency_delta_ms: Latency increases smaller than this are ignored
+            (sub-millisecond searches jitter by more than any tolerance)
+        min_tail_delta_ms: The same floor for p99 latencies, which jitter more
+
+    Returns:
+        One dict per regressed metric (name, baseline, current, change)
+    """
+    regressions = []
+    for name, old in baseline.get("metrics", {}).items():
+        new = current["metrics"].get(name)
+        if new is None:
+            continue
+        if name.endswith(_HIGHER_IS_BETTER):
+            regressed = new < old - quality_tolerance
+        else:
+            floor = min_tail_delta_ms if name.endswith("p99_ms") else min_latency_delta_ms
+            regressed = new > old * (1 + latency_tolerance) and new - old > floor
+        if regressed:
+            change = round((new - old) / old, 4) if old else None
+            regressions.append({"metric": name, "baseline": old, "current": new, "change": change})
+    return regressions
+
+
+def run_benchmark(config: BenchmarkConfig, work_dir: Optional[str] = None) -> dict:
+    """
+    Run the benchmark in `work_dir` (a temporary directory by default).
+
+    Returns:
+        Report dict
+    """
+    if work_dir is not None:
+        os.makedirs(work_dir, exist_ok=True)
+        return RAGBenchmark(config, work_dir).run()
+    with tempfile.TemporaryDirectory(prefix="career_rag_bench_") as scratch:
+        return RAGBenchmark(config, scratch).run()
+
+
+def _int_list(value: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+if __name__ == "__main__":
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Offline Career RAG benchmark")
+    parser.add_argument("--kb", default=defaults.knowledge_base_path, help="Knowledge base file")
+    parser.add_argument("--provider", choices=["local", "test"], default=defaults.provider,
+                        help="Offline embedder behind the simulated service")
+    parser.add_argument("--sizes", type=_int_list, default=defaults.corpus_sizes,
+                        help="Corpus sizes in chunks, comma-separated (0 = knowledge base only)")
+    parser.add_argument("--k", type=_int_list, default=defaults.k_values, help="k values, comma-separated")
+    parser.add_argument("--samples", type=int, default=defaults.latency_samples,
+                        help="Latency samples per corpus and k")
+    parser.add_argument("--embed-latency-ms", type=float, default=defaults.embed_latency_ms)
+    parser.add_argument("--embed-jitter-ms", type=float, default=defaults.embed_jitter_ms)
+    parser.add_argument("--embed-error-rate", type=float, default=defaults.embed_error_rate)
+    parser.add_argument("--embed-budget-ms", type=float, default=defaults.embed_query_budget_ms,
+                        help="Query embedding latency budget, retries included")
+    parser.add_argument("--embed-hedge-ms", type=float, default=defaults.embed_hedge_ms,
+                        help="Hedge a query embedding after this long (0 = off)")
+    parser.add_argument("--embed-rps", type=float, default=defaults.embed_requests_per_second,
+                        help="Embedding request rate limit during index builds")
+    parser.add_argument("--gen-latency-ms", type=float, default=defaults.generation_latency_ms,
+                        help="Simulated time to first token")
+    parser.add_argument("--gen-jitter-ms", type=float, default=defaults.generation_jitter_ms)
+    parser.add_argument("--gen-error-rate", type=float, default=defaults.generation_error_rate)
+    parser.add_argument("--gen-tokens-per-s", type=float, default=defaults.generation_tokens_per_second)
+    parser.add_argument("--e2e-queries", type=int, default=defaults.e2e_queries,
+                        help="End-to-end queries per mode (0 skips the stage)")
+    parser.add_argument("--e2e-concurrency", type=int, default=defaults.e2e_concurrency)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--work-dir", help="Keep the built indexes here instead of a temporary directory")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous report; exit 1 if any gated metric regressed")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown")
+    parser.add_argument("--quality-tolerance", type=float, default=0.02,
+                        help="Allowed absolute recall / MRR drop")
+    parser.add_argument("--min-latency-delta-ms", type=float, default=0.5,
+                        help="Ignore latency increases smaller than this")
+    parser.add_argument("--min-tail-delta-ms", type=float, default=2.0,
+                        help="Ignore p99 latency increases smaller than this")
+    parser.add_argument("--verbose", action="store_true", help="Show the RAG system's INFO logs")
+    args = parser.parse_args()
+
+    # Index builds log every step; keep the console to the benchmark's own progress
+    logging.getLogger("rag").setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logging.getLogger("rag.benchmark").setLevel(logging.INFO)
+
+    config = BenchmarkConfig(
+        knowledge_base_path=args.kb,
+        provider=args.provider,
+        corpus_sizes=args.sizes,
+        k_values=args.k,
+        latency_samples=args.samples,
+        embed_latency_ms=args.embed_latency_ms,
+        embed_jitter_ms=args.embed_jitter_ms,
+        embed_error_rate=args.embed_error_rate,
+        embed_query_budget_ms=args.embed_budget_ms,
+        embed_hedge_ms=args.embed_hedge_ms,
+        generation_latency_ms=args.gen_latency_ms,
+        generation_jitter_ms=args.gen_jitter_ms,
+        generation_error_rate=args.gen_error_rate,
+        generation_tokens_per_second=args.gen_tokens_per_s,
+        e2e_queries=args.e2e_queries,
+        e2e_concurrency=args.e2e_concurrency,
+        embed_requests_per_second=args.embed_rps,
+        seed=args.seed,
+    )
+    report = run_benchmark(config, args.work_dir)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        # Compare as JSON: tuples in the live config are lists in the saved baseline
+        if baseline.get("config") != json.loads(json.dumps(report["config"])):
+            print("warning: baseline was run with a different configuration", file=sys.stderr)
+        report["regressions"] = compare_reports(report, baseline, args.latency_tolerance,
+                                                args.quality_tolerance, args.min_latency_delta_ms,
+                                                args.min_tail_delta_ms)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']}",
+                  file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Wrote {args.output}: {len(report['metrics'])} metrics in {report['elapsed_s']:.1f}s",
+              file=sys.stderr)
+    else:
+        print(output)
+    sys.exit(status)
@@ -0,0 +1,301 @@
+"""
+Pickle-free, memory-mapped index bundle for the Career RAG System.
+A bundle is a directory holding:
+
+- index.faiss:   FAISS index, opened with mmap so vectors stay in the page cache
+- chunks.bin:    every chunk's text as one contiguous UTF-8 blob
+- offsets.npy:   int64 byte offsets into the blob (n_chunks + 1 entries)
+- <name>.npy:    flat arrays, e.g. BM25 postings (lexical.*) and per-chunk
+                 section ids, character spans and topic tags (chunks.*)
+- manifest.json: embedding model, dimension, chunker version, index config and
+                 a size + sha256 checksum for every file
+
+Opening a bundle is a handful of mmaps: no unpickling and no per-chunk Python
+objects. Chunk text is sliced from the mapped blob on demand. Because every
+file is mapped read-only, all processes on a host that open the same bundle
+share one copy of its pages in the OS page cache.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not coordinated across processes
+    fcntl = None
+
+BUNDLE_FORMAT_VERSION = 4
+
+INDEX_FILE = "index.faiss"
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "offsets.npy"
+MANIFEST_FILE = "manifest.json"
+
+# Zero-copy mmap of flat codes when this FAISS build supports it
+_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def file_sha256(path: str) -> str:
+    """Streaming sha256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def encode_chunks(texts: Iterable[str]) -> Tuple[bytes, np.ndarray]:
+    """
+    Pack chunk texts into a UTF-8 blob and byte offsets.
+
+    Returns:
+        Tuple of (blob, offsets) where chunk i is blob[offsets[i]:offsets[i + 1]]
+    """
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def corpus_checksum(texts: Iterable[str]) -> str:
+    """sha256 of the chunk blob, equal to the checksum of a bundle's chunks.bin."""
+    return hashlib.sha256(encode_chunks(texts)[0]).hexdigest()
+
+
+class ChunkStore(Sequence[str]):
+    """
+    Read-only sequence of chunk texts backed by one UTF-8 blob and an offsets array.
+    Backed by mmap when opened from a bundle, by bytes when built in memory.
+    """
+
+    def __init__(self, blob, offsets: np.ndarray, mapped: Optional[mmap.mmap] = None):
+        """
+        Args:
+            blob: bytes-like object holding the concatenated chunk texts
+            offsets: int64 byte offsets, one more than the number of chunks
+            mapped: Underlying mmap to close with the store, if any
+        """
+        self._blob = memoryview(blob)
+        self.offsets = offsets
+        self._mapped = mapped
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "ChunkStore":
+        """In-memory store for freshly chunked documents."""
+        blob, offsets = encode_chunks(texts)
+        return cls(blob, offsets)
+
+    @classmethod
+    def open(cls, directory: str, use_mmap: bool = True) -> "ChunkStore":
+        """
+        Open the chunk blob and offsets of a bundle.
+        
+        Args:
+            directory: Bundle directory
+            use_mmap: Map the files (shared page cache) instead of reading them into private memory
+        """
+        offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r" if use_mmap else None)
+        with open(os.path.join(directory, TEXT_FILE), "rb") as f:
+            if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+                return cls(f.read(), offsets)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, offsets, mapped)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, i: int) -> memoryview:
+        """Zero-copy UTF-8 bytes of chunk i."""
+        return self._blob[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"chunk {i} out of range")
+        return str(self.raw(i), "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        """Size of the text blob in bytes."""
+        return len(self._blob)
+
+    def close(self) -> None:
+        self._blob.release()
+        if self._mapped is not None:
+            self._mapped.close()
+
+
+def _write_atomic(path: str, write_fn) -> dict:
+    """
+    Write a file through a temporary name and rename it into place.
+    Readers that already mapped the old file keep a consistent view of it.
+    """
+    tmp_path = f"{path}.tmp"
+    write_fn(tmp_path)
+    entry = {"bytes": os.path.getsize(tmp_path), "sha256": file_sha256(tmp_path)}
+    os.replace(tmp_path, path)
+    return entry
+
+
+@contextmanager
+def bundle_lock(directory: str):
+    """
+    Exclusive inter-process lock for checking and (re)building a bundle.
+    When several worker processes notice a knowledge-base change at once, the
+    first builds the bundle and the others wait, then find it up to date.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    with open(f"{os.path.abspath(directory)}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_bundle(directory: str,
+                 index: faiss.Index,
+                 texts: Sequence[str],
+                 arrays: Dict[str, np.ndarray],
+                 manifest: dict) -> dict:
+    """
+    Write an index bundle. The manifest is written last, so a bundle whose
+    files don't match its manifest is detected as incomplete on open.
+
+    Args:
+        directory: Bundle directory (created if missing)
+        index: Built FAISS index
+        texts: Chunk texts in index order
+        arrays: Named arrays stored as <name>.npy (BM25 postings, chunk metadata)
+        manifest: Model, dimension, chunker version and index config to record
+
+    Returns:
+        The written manifest
+    """
+    os.makedirs(directory, exist_ok=True)
+    blob, offsets = encode_chunks(texts)
+
+    def write_blob(path):
+        with open(path, "wb") as f:
+            f.write(blob)
+
+    def write_offsets(path):
+        with open(path, "wb") as f:
+            np.save(f, offsets)
+
+    def write_array(array):
+        def write(path):
+            with open(path, "wb") as f:
+                np.save(f, array)
+        return write
+
+    files = {
+        INDEX_FILE: _write_atomic(os.path.join(directory, INDEX_FILE),
+                                  lambda path: faiss.write_index(index, path)),
+        TEXT_FILE: _write_atomic(os.path.join(directory, TEXT_FILE), write_blob),
+        OFFSETS_FILE: _write_atomic(os.path.join(directory, OFFSETS_FILE), write_offsets),
+    }
+    for name, array in arrays.items():
+        filename = f"{name}.npy"
+        files[filename] = _write_atomic(os.path.join(directory, filename), write_array(array))
+
+    manifest = dict(manifest)
+    manifest.update({
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "ntotal": int(index.ntotal),
+        "n_chunks": len(offsets) - 1,
+        "arrays": sorted(arrays),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "files": files,
+    })
+
+    def write_manifest(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    _write_atomic(os.path.join(directory, MANIFEST_FILE), write_manifest)
+    return manifest
+
+
+def read_manifest(directory: str) -> Optional[dict]:
+    """Manifest of a bundle, or None if the directory holds no bundle."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_bundle(directory: str, manifest: dict, checksums: bool = False) -> None:
+    """
+    Check bundle files against the manifest.
+
+    Args:
+        directory: Bundle directory
+        manifest: Manifest read from the bundle
+        checksums: Also recompute sha256 (reads every file; sizes are always checked)
+
+    Raises:
+        ValueError: If the format is unsupported or a file is missing or altered
+    """
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"unsupported bundle format {manifest.get('format_version')}")
+    for name, entry in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            raise ValueError(f"bundle file {name} is missing")
+        if os.path.getsize(path) != entry["bytes"]:
+            raise ValueError(f"bundle file {name} has {os.path.getsize(path)} bytes, expected {entry['bytes']}")
+        if checksums and file_sha256(path) != entry["sha256"]:
+            raise ValueError(f"bundle file {name} failed its checksum")
+
+
+def open_bundle(directory: str, verify_checksums: bool = False,
+                use_mmap: bool = True) -> Tuple[faiss.Index, ChunkStore, dict, Dict[str, np.ndarray]]:
+    """
+    Open a bundle with memory-mapped index, chunk text and arrays.
+
+    Args:
+        directory: Bundle directory
+        verify_checksums: Recompute file checksums before opening
+        use_mmap: Map files read-only so processes share them; False reads
+            everything into private process memory
+
+    Returns:
+        Tuple of (index, chunk store, manifest, named arrays)
+
+    Raises:
+        ValueError: If there is no valid bundle in the directory
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"no index bundle in {directory}")
+    verify_bundle(directory, manifest, checksums=verify_checksums)
+
+    index = faiss.read_index(os.path.join(directory, INDEX_FILE), _MMAP_FLAG if use_mmap else 0)
+    chunks = ChunkStore.open(directory, use_mmap=use_mmap)
+    if len(chunks) != manifest["n_chunks"] or index.ntotal != manifest["ntotal"]:
+        raise ValueError("bundle contents don't match its manifest")
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"),
+                      mmap_mode="r" if use_mmap else None, allow_pickle=False)
+        for name in manifest["arrays"]
+    }
+    return index, chunks, manifest, arrays
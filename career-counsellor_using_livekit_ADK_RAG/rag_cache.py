@@ -0,0 +1,236 @@
+"""
+In-process caches for the Career RAG hot path.
+Voice traffic repeats heavily, so query embeddings are cached after
+normalizing speech-to-text transcripts, and generated advice is cached by
+query-embedding similarity so near-identical questions skip generation.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from rag_telemetry import CACHE_REQUESTS
+
+# Disfluencies STT leaves in transcripts. Only sounds that never carry meaning:
+# words like "well" or "so" do ("jobs that pay well"), so they are kept.
+FILLER_WORDS = {
+    "um", "umm", "uh", "uhh", "uhm", "er", "erm", "ah", "ahh", "hmm", "hm", "mm", "mhm",
+}
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s+#]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize an STT transcript into a cache key.
+    Lowercases, strips punctuation, drops disfluencies and collapses whitespace.
+    The key is only for lookups: the original text is what gets embedded.
+
+    Args:
+        query: Raw user query or transcript
+
+    Returns:
+        Normalized query (may be empty if the query was only filler)
+    """
+    text = query.lower()
+    text = _PUNCTUATION_RE.sub(" ", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    words = [word for word in text.split() if word not in FILLER_WORDS]
+    return " ".join(words)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe query-embedding cache with TTL and LRU eviction.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            max_size: Maximum number of cached queries
+            ttl_seconds: Time after which an entry expires
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Return the cached embedding for a normalized query, or None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                CACHE_REQUESTS.labels(cache="query_embedding", result="miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.labels(cache="query_embedding", result="hit").inc()
+            return entry[0]
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """
+        Cache an embedding, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query embedding.
+    A query whose cosine similarity to a cached query is at least `threshold`
+    returns the stored advice and sources without retrieval or generation.
+    Entries are partitioned by scope (e.g. the retrieval filter), so an answer
+    built from filtered context is only reused for the same filter.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 1800.0, threshold: float = 0.95):
+        """
+        Args:
+            max_size: Maximum number of cached answers
+            ttl_seconds: Time after which an answer expires
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._keys: List[np.ndarray] = []
+        self._entries: List[dict] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> Optional[np.ndarray]:
+        norm = float(np.linalg.norm(embedding))
+        if norm == 0.0:
+            return None
+        return (np.asarray(embedding, dtype=np.float32) / norm).ravel()
+
+    def _remove(self, position: int) -> None:
+        del self._keys[position]
+        del self._entries[position]
+        self._matrix = None
+
+    def _expire(self, now: float) -> None:
+        for position in range(len(self._entries) - 1, -1, -1):
+            if now - self._entries[position]["created_at"] > self.ttl_seconds:
+                self._remove(position)
+
+    def lookup(self, query_embedding: np.ndarray, scope: str = "") -> Optional[Tuple[str, List[str], float]]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query_embedding: Embedding of the new query
+            scope: Only entries cached under the same scope can match
+
+        Returns:
+            (advice, sources, similarity) on a hit, otherwise None
+        """
+        key = self._unit(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key is None or not self._entries:
+                self.misses += 1
+                CACHE_REQUESTS.labels(cache="answer", result="miss").inc()
+                return None
+            if self._matrix is None:
+                self._matrix = np.vstack(self._keys)
+            similarities = self._matrix @ key
+            for position, entry in enumerate(self._entries):
+                if entry["scope"] != scope:
+                    similarities[position] = -np.inf
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                CACHE_REQUESTS.labels(cache="answer", result="miss").inc()
+                return None
+            entry = self._entries[best]
+            entry["last_used"] = now
+            self.hits += 1
+            CACHE_REQUESTS.labels(cache="answer", result="hit").inc()
+            return entry["advice"], list(entry["sources"]), similarity
+
+    def put(self, query_embedding: np.ndarray, advice: str, sources: List[str], scope: str = "") -> None:
+        """
+        Cache an answer, evicting the least recently used entry if full.
+        """
+        key = self._unit(query_embedding)
+        if key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._keys.append(key)
+            self._entries.append({
+                "advice": advice,
+                "sources": list(sources),
+                "scope": scope,
+                "created_at": now,
+                "last_used": now,
+            })
+            self._matrix = None
+            while len(self._entries) > self.max_size:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every cached answer (call whenever the index changes)."""
+        with self._lock:
+            self._keys.clear()
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
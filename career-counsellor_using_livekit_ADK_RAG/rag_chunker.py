@@ -0,0 +1,270 @@
+"""
+Structure-aware, token-based chunker for the career knowledge base.
+Uses the table of contents and numbered headers ("13. SALARY EXPECTATIONS ...",
+"13.3 SALARY EXPECTATIONS BY CITY") to keep chunks inside one (sub)section,
+packs whole paragraphs up to a token budget with overlap between neighbouring
+chunks, and records where every chunk came from. A single line longer than the
+budget (plain-text notes, run-on paragraphs) is split at sentence ends, or
+between words when one sentence is still too long.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from rag_postprocess import estimate_tokens
+
+_RULE_RE = re.compile(r"^={20,}\s*$", re.MULTILINE)
+_SECTION_RE = re.compile(r"^(\d+)\.\s+(\S.*?)\s*$")
+_SUBSECTION_RE = re.compile(r"^(\d+\.\d+)\s+(\S.*?)\s*$", re.MULTILINE)
+_TOC_TITLE = "TABLE OF CONTENTS"
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_BREAK_RE = re.compile(r"\s+")
+
+# Bump whenever the chunking algorithm changes; the full version also encodes the sizes
+CHUNKER_VERSION = "structured-v2"
+
+
+@dataclass
+class Chunk:
+    """A chunk of the knowledge base and where it came from."""
+    text: str
+    section_id: str
+    title: str
+    char_start: int
+    char_end: int
+
+
+@dataclass
+class _Block:
+    text: str
+    start: int
+    end: int
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+class StructuredChunker:
+    """
+    Chunks a numbered, rule-delimited knowledge base by section and token budget.
+
+    Every chunk stays inside one subsection (or section, when it has none), starts
+    with a "Section > Subsection" heading line so it is self-describing for
+    embedding and BM25, and repeats the tail of the previous chunk as overlap
+    when a long paragraph has to be split.
+    """
+
+    def __init__(self, max_tokens: int = 180, overlap_tokens: int = 30, min_chars: int = 50):
+        """
+        Args:
+            max_tokens: Target chunk size in (estimated) tokens, heading included
+            overlap_tokens: Trailing tokens of a chunk repeated at the start of the next
+            min_chars: Drop chunks with less body text than this
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_chars = min_chars
+
+    @property
+    def version(self) -> str:
+        """Identifies the chunking output; changes whenever chunk boundaries would."""
+        return f"{CHUNKER_VERSION}-{self.max_tokens}t-{self.overlap_tokens}o"
+
+    # ------------------------------------------------------------------
+    # Document structure
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _blocks_between_rules(content: str) -> List[Tuple[str, int, int]]:
+        """(text, start, end) of the text between consecutive rule lines."""
+        bounds = [0] + [pos for match in _RULE_RE.finditer(content) for pos in (match.start(), match.end())]
+        bounds.append(len(content))
+        return [(content[bounds[i]:bounds[i + 1]], bounds[i], bounds[i + 1])
+                for i in range(0, len(bounds), 2)]
+
+    @staticmethod
+    def _table_of_contents(content: str) -> Dict[str, str]:
+        """Section number -> title as written in the table of contents."""
+        toc = {}
+        parts = StructuredChunker._blocks_between_rules(content)
+        for i, (text, _, _) in enumerate(parts[:-1]):
+            if text.strip() == _TOC_TITLE:
+                for line in parts[i + 1][0].splitlines():
+                    match = _SECTION_RE.match(line.strip())
+                    if match:
+                        toc[match.group(1)] = match.group(2)
+                break
+        return toc
+
+    def sections(self, content: str) -> List[Tuple[str, str, int, int]]:
+        """
+        Numbered top-level sections of the document.
+
+        Returns:
+            List of (section_id, title, body_start, body_end)
+        """
+        toc = self._table_of_contents(content)
+        parts = self._blocks_between_rules(content)
+        sections = []
+        # A header is the text between two rules; the body follows the second rule
+        for i, (text, _, _) in enumerate(parts[:-1]):
+            match = _SECTION_RE.match(text.strip())
+            if match and "\n" not in text.strip():
+                section_id = match.group(1)
+                _, body_start, body_end = parts[i + 1]
+                sections.append((section_id, toc.get(section_id, match.group(2).title()), body_start, body_end))
+        return sections
+
+    def _subsections(self, content: str, section_id: str, title: str,
+                     start: int, end: int) -> List[Tuple[str, str, int, int]]:
+        """Split a section body at its "N.M TITLE" headers (text before the first one stays with the section)."""
+        headers = [m for m in _SUBSECTION_RE.finditer(content, start, end)
+                   if m.group(1).split(".")[0] == section_id]
+        if not headers:
+            return [(section_id, title, start, end)]
+
+        parts = []
+        if content[start:headers[0].start()].strip():
+            parts.append((section_id, title, start, headers[0].start()))
+        for i, header in enumerate(headers):
+            sub_end = headers[i + 1].start() if i + 1 < len(headers) else end
+            sub_title = f"{title} > {header.group(2).title()}"
+            parts.append((header.group(1), sub_title, header.end(), sub_end))
+        return parts
+
+    # ------------------------------------------------------------------
+    # Packing
+    # ------------------------------------------------------------------
+
+    def _paragraphs(self, content: str, start: int, end: int) -> List[List[_Block]]:
+        """Blank-line separated paragraphs, each as a list of its non-empty lines."""
+        paragraphs = []
+        cursor = start
+        for separator in list(_BLANK_LINES_RE.finditer(content, start, end)) + [None]:
+            para_end = separator.start() if separator else end
+            lines = []
+            line_start = cursor
+            for line in content[cursor:para_end].split("\n"):
+                if line.strip():
+                    offset = line_start + len(line) - len(line.lstrip())
+                    lines.append(_Block(line.strip(), offset, offset + len(line.strip())))
+                line_start += len(line) + 1
+            if lines:
+                paragraphs.append(lines)
+            cursor = separator.end() if separator else end
+        return paragraphs
+
+    @staticmethod
+    def _spans(block: _Block, separator: "re.Pattern") -> List[_Block]:
+        """Pieces of a block between matches of `separator`, with document offsets."""
+        pieces, cursor = [], 0
+        for match in list(separator.finditer(block.text)) + [None]:
+            end = match.start() if match else len(block.text)
+            if end > cursor:
+                pieces.append(_Block(block.text[cursor:end], block.start + cursor, block.start + end))
+            cursor = match.end() if match else end
+        return pieces
+
+    def _split_oversized(self, line: _Block, budget: int) -> List[_Block]:
+        """
+        A line as pieces of at most `budget` tokens: whole sentences where
+        possible, then words, and character slices for a single giant word.
+        """
+        if line.tokens <= budget:
+            return [line]
+        units = []
+        for sentence in self._spans(line, _SENTENCE_BREAK_RE):
+            if sentence.tokens <= budget:
+                units.append(sentence)
+                continue
+            for word in self._spans(sentence, _WORD_BREAK_RE):
+                width = budget * 4  # estimate_tokens counts ~4 characters per token
+                units.extend(_Block(word.text[i:i + width], word.start + i, word.start + min(i + width, len(word.text)))
+                             for i in range(0, len(word.text), width))
+
+        # Greedily merge consecutive units back into pieces that fit the budget
+        pieces = []
+        offset = line.start
+        for unit in units:
+            if pieces:
+                merged = line.text[pieces[-1].start - offset:unit.end - offset]
+                if estimate_tokens(merged) <= budget:
+                    pieces[-1] = _Block(merged, pieces[-1].start, unit.end)
+                    continue
+            pieces.append(unit)
+        return pieces
+
+    def _overlap(self, lines: List[_Block]) -> List[_Block]:
+        """Trailing lines of a chunk that fit in the overlap budget."""
+        tail, tokens = [], 0
+        for line in reversed(lines):
+            if tokens + line.tokens > self.overlap_tokens:
+                break
+            tail.insert(0, line)
+            tokens += line.tokens
+        # Never carry the whole chunk over, or packing would not advance
+        return tail if len(tail) < len(lines) else []
+
+    def _pack(self, section_id: str, title: str, paragraphs: List[List[_Block]]) -> List[Chunk]:
+        """
+        Pack paragraphs into chunks of at most `max_tokens`.
+        Chunks break between paragraphs when possible and between lines otherwise;
+        a line that alone exceeds the budget is split first (see _split_oversized).
+        A chunk split inside a paragraph starts with the trailing lines of the
+        previous one; paragraphs here are separate entries (one role, one FAQ),
+        so nothing is carried across a paragraph break.
+        """
+        heading = f"{title}\n" if title else ""
+        budget = self.max_tokens - estimate_tokens(heading)
+        chunks = []
+        current: List[_Block] = []
+        tokens = 0
+        fresh = 0  # lines in `current` not already emitted with the previous chunk
+
+        def flush(carry_overlap: bool):
+            nonlocal current, tokens, fresh
+            body = "\n".join(line.text for line in current)
+            if fresh and len(body) >= self.min_chars:
+                chunks.append(Chunk(heading + body, section_id, title, current[0].start, current[-1].end))
+            current = self._overlap(current) if carry_overlap else []
+            tokens = sum(line.tokens for line in current)
+            fresh = 0
+
+        for paragraph in paragraphs:
+            paragraph = [piece for line in paragraph for piece in self._split_oversized(line, budget)]
+            paragraph_tokens = sum(line.tokens for line in paragraph)
+            if fresh and tokens + paragraph_tokens > budget:
+                flush(carry_overlap=False)
+            for line in paragraph:
+                if fresh and tokens + line.tokens > budget:
+                    flush(carry_overlap=True)
+                current.append(line)
+                tokens += line.tokens
+                fresh += 1
+        if fresh:
+            flush(carry_overlap=False)
+        return chunks
+
+    def chunk(self, content: str) -> List[Chunk]:
+        """
+        Chunk a knowledge-base document.
+
+        Args:
+            content: Full document text
+
+        Returns:
+            Chunks in document order. A document without numbered sections is
+            chunked as a single untitled section "0".
+        """
+        chunks = []
+        sections = self.sections(content) or [("0", "", 0, len(content))]
+        for section_id, title, start, end in sections:
+            for sub_id, sub_title, sub_start, sub_end in self._subsections(content, section_id, title, start, end):
+                chunks.extend(self._pack(sub_id, sub_title, self._paragraphs(content, sub_start, sub_end)))
+        return chunks
+
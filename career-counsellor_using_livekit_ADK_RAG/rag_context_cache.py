@@ -0,0 +1,359 @@
+"""
+Provider-side context caching for the Career RAG System.
+The static prompt prefix - the system prompt plus an optional pinned set of
+high-traffic chunks (e.g. the salary section) - is registered once with a
+TTL; each turn then only sends the per-query suffix. The cache is refreshed
+before it expires, recreated when the provider has dropped it or the pinned
+content changed, and generation falls back to the uncached model whenever
+no cache is available.
+
+Backends:
+- gemini: google.generativeai caching.CachedContent (needs an explicit model
+  version such as gemini-2.0-flash-001, and the API rejects prefixes below
+  its minimum token count: a smaller pinned prefix disables caching up front)
+- local:  in-process stand-in with the same TTL / expiry behaviour; the
+  prefix is re-sent with each call, so it tests the caching logic offline
+  without saving tokens
+"""
+
+import abc
+import datetime
+import hashlib
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from google.generativeai import caching
+
+from rag_postprocess import estimate_tokens
+from rag_telemetry import get_logger
+
+log = get_logger("context_cache")
+
+PINNED_HEADER = "Pinned career reference material (applies to every question):"
+# Smallest prefix the Gemini API will cache; create() rejects anything shorter
+GEMINI_MIN_CACHE_TOKENS = int(os.getenv("RAG_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+
+
+@dataclass
+class CacheHandle:
+    """A registered prompt prefix."""
+    name: str
+    key: str            # hash of model, system instruction and pinned content
+    expires_at: float   # time.time() at which the provider drops the cache
+    token_count: int
+    prefix: str = ""     # pinned chunks as sent in the cache, for an inline fallback
+    payload: Any = None  # backend object (CachedContent for gemini)
+
+
+def prefix_text(texts: List[str]) -> str:
+    """The pinned chunks as one cached user turn ("" when nothing is pinned)."""
+    if not texts:
+        return ""
+    return PINNED_HEADER + "\n\n" + "\n\n".join(
+        f"[Pinned {i + 1}]\n{text}" for i, text in enumerate(texts)
+    )
+
+
+class ContextCacheBackend(abc.ABC):
+    """Registers, extends and deletes cached prompt prefixes."""
+
+    name = "base"
+    min_tokens = 0  # smallest prefix the provider accepts
+
+    @abc.abstractmethod
+    def create(self, model_name: str, system_instruction: str, texts: List[str],
+               ttl_seconds: float, key: str) -> CacheHandle:
+        """Register a prefix (system instruction plus pinned chunks) for ttl_seconds."""
+
+    @abc.abstractmethod
+    def refresh(self, handle: CacheHandle, ttl_seconds: float) -> CacheHandle:
+        """Extend a live cache by ttl_seconds from now."""
+
+    @abc.abstractmethod
+    def delete(self, handle: CacheHandle) -> None:
+        """Drop a cache before it expires."""
+
+    @abc.abstractmethod
+    def model(self, handle: CacheHandle, base_model: genai.GenerativeModel):
+        """
+        A model that generates with the cached prefix.
+
+        Args:
+            handle: Live cache
+            base_model: The pool's uncached model for this thread / event loop (its clients are reused)
+        """
+
+
+class GeminiContextCacheBackend(ContextCacheBackend):
+    """Gemini API context caching (CachedContent)."""
+
+    name = "gemini"
+    min_tokens = GEMINI_MIN_CACHE_TOKENS
+
+    def create(self, model_name: str, system_instruction: str, texts: List[str],
+               ttl_seconds: float, key: str) -> CacheHandle:
+        prefix = prefix_text(texts)
+        cached = caching.CachedContent.create(
+            model=model_name,
+            display_name=f"career-rag-{key[:12]}",
+            system_instruction=system_instruction,
+            contents=[{"role": "user", "parts": [{"text": prefix}]}] if prefix else None,
+            ttl=datetime.timedelta(seconds=ttl_seconds),
+        )
+        return CacheHandle(cached.name, key, cached.expire_time.timestamp(),
+                           int(cached.usage_metadata.total_token_count), prefix, cached)
+
+    def refresh(self, handle: CacheHandle, ttl_seconds: float) -> CacheHandle:
+        handle.payload.update(ttl=datetime.timedelta(seconds=ttl_seconds))
+        return CacheHandle(handle.name, handle.key, handle.payload.expire_time.timestamp(),
+                           handle.token_count, handle.prefix, handle.payload)
+
+    def delete(self, handle: CacheHandle) -> None:
+        handle.payload.delete()
+
+    def model(self, handle: CacheHandle, base_model: genai.GenerativeModel):
+        # The pool hands it base_model's clients (see rag_generation.share_clients)
+        return genai.GenerativeModel.from_cached_content(handle.payload)
+
+
+class _LocalCachedModel:
+    """Stand-in for a model bound to cached content: re-sends the prefix, honours expiry."""
+
+    def __init__(self, backend: "LocalContextCacheBackend", handle: CacheHandle, base_model):
+        self._backend = backend
+        self._handle = handle
+        self._base_model = base_model
+
+    def _prompt(self, user_message: str) -> str:
+        if not self._backend.is_live(self._handle):
+            raise api_exceptions.NotFound(f"CachedContent {self._handle.name} not found (expired)")
+        return f"{self._handle.prefix}\n\n{user_message}" if self._handle.prefix else user_message
+
+    def generate_content(self, user_message: str, **kwargs):
+        return self._base_model.generate_content(self._prompt(user_message), **kwargs)
+
+    async def generate_content_async(self, user_message: str, **kwargs):
+        return await self._base_model.generate_content_async(self._prompt(user_message), **kwargs)
+
+
+class LocalContextCacheBackend(ContextCacheBackend):
+    """In-process stand-in with provider-like TTL semantics, for tests and offline runs."""
+
+    name = "local"
+
+    def __init__(self):
+        self._expiry = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, model_name: str, system_instruction: str, texts: List[str],
+               ttl_seconds: float, key: str) -> CacheHandle:
+        prefix = prefix_text(texts)
+        with self._lock:
+            name = f"local-cache/{next(self._ids)}"
+            self._expiry[name] = time.time() + ttl_seconds
+        return CacheHandle(name, key, self._expiry[name],
+                           estimate_tokens(system_instruction) + estimate_tokens(prefix), prefix)
+
+    def refresh(self, handle: CacheHandle, ttl_seconds: float) -> CacheHandle:
+        with self._lock:
+            if handle.name not in self._expiry:
+                raise api_exceptions.NotFound(f"CachedContent {handle.name} not found")
+            self._expiry[handle.name] = time.time() + ttl_seconds
+        return CacheHandle(handle.name, handle.key, self._expiry[handle.name],
+                           handle.token_count, handle.prefix, handle.payload)
+
+    def delete(self, handle: CacheHandle) -> None:
+        with self._lock:
+            self._expiry.pop(handle.name, None)
+
+    def is_live(self, handle: CacheHandle) -> bool:
+        with self._lock:
+            return self._expiry.get(handle.name, 0.0) > time.time()
+
+    def model(self, handle: CacheHandle, base_model):
+        return _LocalCachedModel(self, handle, base_model)
+
+
+def create_context_cache_backend(name: str) -> ContextCacheBackend:
+    """Context cache backend by name ('gemini' or 'local')."""
+    backends = {"gemini": GeminiContextCacheBackend, "local": LocalContextCacheBackend}
+    if name not in backends:
+        raise ValueError(f"Unknown context cache backend '{name}'. Expected one of {sorted(backends)}")
+    return backends[name]()
+
+
+class ContextCache:
+    """
+    Keeps one cached prefix alive for a model and system instruction.
+    Thread-safe; shared by every generation call in the process.
+    """
+
+    def __init__(self, backend: ContextCacheBackend, model_name: str, system_instruction: str,
+                 ttl_seconds: float = 3600.0, refresh_margin_seconds: float = 300.0,
+                 retry_seconds: float = 300.0):
+        """
+        Args:
+            backend: Cache backend
+            model_name: Model the cache is created for (Gemini needs an explicit version)
+            system_instruction: System prompt stored in the cache
+            ttl_seconds: Lifetime of the cache; extended whenever it is about to expire
+            refresh_margin_seconds: Extend the TTL once less than this remains
+            retry_seconds: After a failed create, serve uncached for this long before retrying
+        """
+        self.backend = backend
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = min(refresh_margin_seconds, ttl_seconds / 2)
+        self.retry_seconds = retry_seconds
+        self._texts: List[str] = []
+        self._key = self.prefix_key([])
+        self._handle: Optional[CacheHandle] = None
+        self._retry_at = 0.0
+        self._disabled = False
+        self._renewing = False  # one refresh / create in flight at a time
+        self._lock = threading.Lock()
+        self._stats = {"creates": 0, "refreshes": 0, "recreates_after_expiry": 0, "failures": 0}
+
+    def prefix_key(self, texts: List[str]) -> str:
+        """Identity of a prefix: model, system instruction and pinned chunks."""
+        digest = hashlib.sha256(f"{self.model_name}\n{self.system_instruction}".encode("utf-8"))
+        for text in texts:
+            digest.update(b"\0" + text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def estimate_tokens(self, texts: List[str]) -> int:
+        """Estimated size of the prefix that caching these pinned chunks would create."""
+        return estimate_tokens(self.system_instruction) + estimate_tokens(prefix_text(texts))
+
+    def disable(self) -> bool:
+        """
+        Stop caching for the rest of the process; generation runs uncached.
+
+        Returns:
+            True if this call disabled it (False when it already was)
+        """
+        with self._lock:
+            if self._disabled:
+                return False
+            self._disabled = True
+            old, self._handle = self._handle, None
+        if old is not None:
+            try:
+                self.backend.delete(old)
+            except Exception:
+                pass  # Expires on its own
+        return True
+
+    @property
+    def disabled(self) -> bool:
+        with self._lock:
+            return self._disabled
+
+    def set_pinned(self, texts: List[str]) -> str:
+        """
+        Set the chunks pinned in the prefix. A different set replaces the live cache on next use.
+
+        Returns:
+            Key of the new prefix
+        """
+        with self._lock:
+            self._texts = list(texts)
+            self._key = self.prefix_key(self._texts)
+            self._retry_at = 0.0
+            return self._key
+
+    def acquire(self) -> Optional[CacheHandle]:
+        """
+        The live cache for the current prefix: created, refreshed or replaced as needed.
+        The provider call runs outside the lock and one caller at a time makes it;
+        concurrent callers meanwhile get the still-live handle, or None (uncached).
+
+        Returns:
+            Handle, or None when caching is unavailable (generation runs uncached)
+        """
+        with self._lock:
+            if self._disabled:
+                return None
+            now = time.time()
+            handle = self._handle
+            live = handle is not None and handle.key == self._key and handle.expires_at > now
+            if live and handle.expires_at - now > self.refresh_margin_seconds:
+                return handle
+            if self._renewing:
+                return handle if live else None
+            if not live and now < self._retry_at:
+                return None
+            self._renewing = True
+            key, texts = self._key, list(self._texts)
+        try:
+            return self._renew(handle if live else None, key, texts)
+        finally:
+            with self._lock:
+                self._renewing = False
+
+    def _renew(self, live: Optional[CacheHandle], key: str, texts: List[str]) -> Optional[CacheHandle]:
+        """Refresh `live`, or create a cache for `key` (called without the lock, by one caller at a time)."""
+        if live is not None:
+            try:
+                refreshed = self.backend.refresh(live, self.ttl_seconds)
+            except Exception as e:
+                log.warning("Context cache refresh failed; recreating", cache=live.name, error=str(e))
+            else:
+                with self._lock:
+                    self._stats["refreshes"] += 1
+                    if self._handle is live:
+                        self._handle = refreshed
+                return refreshed
+
+        created = None
+        try:
+            created = self.backend.create(self.model_name, self.system_instruction, texts, self.ttl_seconds, key)
+            log.info("Created context cache", cache=created.name, tokens=created.token_count,
+                     ttl_s=self.ttl_seconds, pinned_chunks=len(texts))
+        except Exception as e:
+            log.warning("Could not create context cache; generating uncached",
+                        retry_in_s=self.retry_seconds, error=str(e))
+
+        with self._lock:
+            if created is None:
+                self._stats["failures"] += 1
+                self._retry_at = time.time() + self.retry_seconds
+            else:
+                self._stats["creates"] += 1
+            stale = [self._handle]
+            if self._disabled:
+                stale.append(created)
+                created = None
+            self._handle = created
+        for old in stale:
+            if old is not None:
+                try:
+                    self.backend.delete(old)
+                except Exception:
+                    pass  # Expires on its own
+        return created
+
+    def invalidate(self, handle: CacheHandle) -> None:
+        """Forget a cache the provider no longer has (expired or deleted); the next acquire recreates it."""
+        with self._lock:
+            if self._handle is not None and self._handle.name == handle.name:
+                self._handle = None
+                self._stats["recreates_after_expiry"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["backend"] = self.backend.name
+            stats["disabled"] = self._disabled
+            stats["live"] = self._handle is not None
+            stats["prefix_tokens"] = self._handle.token_count if self._handle is not None else 0
+            stats["pinned_chunks"] = len(self._texts)
+        return stats
@@ -0,0 +1,203 @@
+"""
+Content-addressed, on-disk embedding store for the Career RAG System.
+Vectors are keyed by a hash of (chunk text, embedding model, task type) so a
+rebuild only embeds chunks that are new or changed. Backed by SQLite in WAL
+mode, which lets several processes read and write the same store safely.
+
+Processes sharing a store may use different providers, so a build only ever
+collects its own model's stale rows. Rows of other models (e.g. a refitted
+local embedder's previous fits) are evicted once that model has not been
+used by any build for a while (prune_idle_models).
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding cache shared between index builds and processes.
+    """
+
+    def __init__(self, path: str = "career_rag_embeddings.sqlite", timeout: float = 30.0):
+        """
+        Args:
+            path: SQLite database file
+            timeout: Seconds to wait on a lock held by another process
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_model ON embeddings (model, task_type)"
+            )
+            # When each model / task type was last used by a build (see prune_idle_models)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS models (
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    PRIMARY KEY (model, task_type)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(text: str, model: str, task_type: str) -> str:
+        """
+        Content address for a chunk embedding.
+
+        Args:
+            text: Chunk text
+            model: Embedding model id
+            task_type: Embedding task type
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in (model, task_type, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors.
+
+        Returns:
+            Mapping of key to float32 vector for every key found
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        conn = self._connect()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray], model: str, task_type: str) -> None:
+        """
+        Store vectors, overwriting any existing entry with the same key.
+        """
+        if not vectors:
+            return
+        now = time.time()
+        rows = [
+            (key, model, task_type, int(vec.shape[0]),
+             np.ascontiguousarray(vec, dtype=np.float32).tobytes(), now)
+            for key, vec in vectors.items()
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, task_type, dim, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def garbage_collect(self, keep_keys: Iterable[str], model: str, task_type: str) -> int:
+        """
+        Delete entries for this model/task type that are no longer referenced,
+        and mark the model as in use. Other models' entries are left alone:
+        another process may be building with them.
+
+        Args:
+            keep_keys: Keys still referenced by current chunks
+            model: Embedding model id whose entries are collected
+            task_type: Embedding task type whose entries are collected
+
+        Returns:
+            Number of deleted entries
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_keys (key TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM keep_keys")
+            conn.executemany("INSERT OR IGNORE INTO keep_keys (key) VALUES (?)",
+                             [(key,) for key in keep_keys])
+            cursor = conn.execute(
+                "DELETE FROM embeddings WHERE model = ? AND task_type = ? "
+                "AND key NOT IN (SELECT key FROM keep_keys)",
+                (model, task_type)
+            )
+            conn.execute("INSERT OR REPLACE INTO models (model, task_type, last_used_at) VALUES (?, ?, ?)",
+                         (model, task_type, time.time()))
+            conn.execute("DELETE FROM keep_keys")
+        return cursor.rowcount
+
+    def prune_idle_models(self, max_idle_seconds: float, model: str, task_type: str) -> int:
+        """
+        Delete every entry of models no build has used for `max_idle_seconds`.
+        A model never recorded as used (stores written before usage was tracked)
+        counts as last used when its newest entry was written.
+
+        Args:
+            max_idle_seconds: Idle time after which a model's entries are evicted
+            model: Current embedding model id (never evicted)
+            task_type: Current embedding task type
+
+        Returns:
+            Number of deleted entries
+        """
+        cutoff = time.time() - max_idle_seconds
+        conn = self._connect()
+        with conn:
+            idle = conn.execute(
+                "SELECT e.model, e.task_type FROM embeddings e "
+                "LEFT JOIN models m ON m.model = e.model AND m.task_type = e.task_type "
+                "GROUP BY e.model, e.task_type "
+                "HAVING COALESCE(MAX(m.last_used_at), MAX(e.created_at)) < ?",
+                (cutoff,)
+            ).fetchall()
+            removed = 0
+            for idle_model, idle_task_type in idle:
+                if (idle_model, idle_task_type) == (model, task_type):
+                    continue
+                removed += conn.execute("DELETE FROM embeddings WHERE model = ? AND task_type = ?",
+                                        (idle_model, idle_task_type)).rowcount
+                conn.execute("DELETE FROM models WHERE model = ? AND task_type = ?",
+                             (idle_model, idle_task_type))
+        return removed
+
+    def count(self) -> int:
+        """Number of stored vectors."""
+        return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
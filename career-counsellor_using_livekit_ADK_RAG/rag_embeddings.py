@@ -0,0 +1,231 @@
+"""
+Concurrent, rate-limited embedding pipeline for the Career RAG System.
+Packs texts into multi-text provider requests and runs many requests at once
+under a token-bucket limit, so index builds are bounded by the provider quota
+instead of fixed sleeps and per-chunk round trips.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from rag_resilience import CircuitOpenError
+from rag_telemetry import EMBEDDING_FAILURES, EMBEDDING_LATENCY, EMBEDDING_RETRIES, get_logger, timed
+
+log = get_logger("embeddings")
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Each request takes one token and blocks until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Sustained requests per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until `tokens` are available and take them.
+
+        Returns:
+            Seconds spent waiting for the limiter
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                deficit = (tokens - self._tokens) / self.rate
+            time.sleep(deficit)
+            waited += deficit
+
+
+@dataclass
+class PipelineStats:
+    """Throughput counters for one embedding run."""
+
+    requests: int = 0
+    items: int = 0
+    failures: int = 0
+    elapsed_s: float = 0.0
+    throttle_wait_s: float = 0.0
+    failed_indices: List[int] = field(default_factory=list)
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "failures": self.failures,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "throttle_wait_s": round(self.throttle_wait_s, 3),
+            "requests_per_second": round(self.requests_per_second, 2),
+            "items_per_second": round(self.items_per_second, 2),
+        }
+
+
+def make_batches(texts: List[str], max_batch_size: int, max_payload_chars: int) -> List[List[int]]:
+    """
+    Group text indices into provider requests bounded by item count and payload size.
+
+    Args:
+        texts: Texts to group (in order)
+        max_batch_size: Maximum texts per request
+        max_payload_chars: Maximum total characters per request
+
+    Returns:
+        List of batches, each a list of indices into `texts`
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for i, text in enumerate(texts):
+        size = len(text)
+        if current and (len(current) >= max_batch_size or current_chars + size > max_payload_chars):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(i)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingPipeline:
+    """
+    Embeds texts in multi-text batches, running batches concurrently while
+    respecting a requests/sec limit and a cap on in-flight requests.
+    Failed batches are split in half and retried down to single texts.
+    """
+
+    def __init__(self,
+                 embed_batch_fn: Callable[[List[str]], np.ndarray],
+                 requests_per_second: float = 5.0,
+                 max_concurrency: int = 4,
+                 max_batch_size: int = 100,
+                 max_payload_chars: int = 50000,
+                 burst: Optional[float] = None,
+                 provider: str = "unknown"):
+        """
+        Args:
+            embed_batch_fn: Function that embeds a list of texts in one request
+                            and returns a (len(texts), dim) matrix
+            requests_per_second: Sustained provider request rate
+            max_concurrency: Maximum number of requests in flight
+            max_batch_size: Maximum texts packed into one request
+            max_payload_chars: Maximum characters packed into one request
+            burst: Token-bucket capacity (defaults to one second of requests)
+            provider: Provider name used as a metrics label
+        """
+        self.embed_batch_fn = embed_batch_fn
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_payload_chars = max(1, int(max_payload_chars))
+        self.limiter = TokenBucket(requests_per_second, burst)
+        self.provider = provider
+        self.last_stats = PipelineStats()
+
+    def _request(self, texts: List[str], stats: PipelineStats, lock: threading.Lock) -> np.ndarray:
+        waited = self.limiter.acquire()
+        with lock:
+            stats.requests += 1
+            stats.throttle_wait_s += waited
+        with timed(EMBEDDING_LATENCY, provider=self.provider, kind="documents"):
+            embeddings = np.asarray(self.embed_batch_fn(texts), dtype=np.float32)
+        if embeddings.shape[0] != len(texts):
+            raise ValueError(f"Provider returned {embeddings.shape[0]} embeddings for {len(texts)} texts")
+        return embeddings
+
+    def _embed_batch(self, texts: List[str], indices: List[int], out: np.ndarray,
+                     stats: PipelineStats, lock: threading.Lock) -> None:
+        try:
+            out[indices] = self._request([texts[i] for i in indices], stats, lock)
+            with lock:
+                stats.items += len(indices)
+        except Exception as e:
+            # Splitting can't help while the provider's circuit is open
+            if len(indices) == 1 or isinstance(e, CircuitOpenError):
+                with lock:
+                    stats.failures += len(indices)
+                    stats.failed_indices.extend(indices)
+                EMBEDDING_FAILURES.labels(provider=self.provider, kind="documents").inc(len(indices))
+                log.error("Failed to embed documents", documents=len(indices), first=indices[0], error=str(e))
+                return
+            # Split the failed batch and retry each half
+            mid = len(indices) // 2
+            EMBEDDING_RETRIES.labels(provider=self.provider, kind="documents").inc(2)
+            log.warning("Embedding batch failed; splitting and retrying", batch_size=len(indices), error=str(e))
+            self._embed_batch(texts, indices[:mid], out, stats, lock)
+            self._embed_batch(texts, indices[mid:], out, stats, lock)
+
+    def embed(self, texts: List[str], dim: int, progress: bool = True) -> np.ndarray:
+        """
+        Embed all texts, preserving input order.
+
+        Args:
+            texts: Texts to embed
+            dim: Embedding dimension
+            progress: Log progress while embedding
+
+        Returns:
+            Stacked float32 matrix of shape (len(texts), dim). Rows of texts that
+            failed are left zero and listed in `last_stats.failed_indices`; they
+            must not be indexed or cached.
+        """
+        stats = PipelineStats()
+        lock = threading.Lock()
+        embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+        batches = make_batches(texts, self.max_batch_size, self.max_payload_chars)
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [
+                executor.submit(self._embed_batch, texts, batch, embeddings, stats, lock)
+                for batch in batches
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress and (done % 10 == 0 or done == len(batches)):
+                    log.info("Embedded batch", done=done, batches=len(batches))
+
+        stats.elapsed_s = time.time() - start
+        self.last_stats = stats
+        if progress:
+            log.info("Embedded texts", embedded=stats.items, texts=len(texts), requests=stats.requests,
+                     elapsed_s=round(stats.elapsed_s, 2), requests_per_second=round(stats.requests_per_second, 1),
+                     texts_per_second=round(stats.items_per_second, 1),
+                     throttled_s=round(stats.throttle_wait_s, 2), failures=stats.failures)
+        return embeddings
@@ -0,0 +1,135 @@
+"""
+Metadata filters and a lightweight query classifier for the Career RAG System.
+Chunks are tagged with topics (salary, government, remote, ...) at index build
+time; a filter on section, topic tag or role keyword becomes a boolean mask
+over chunk ids that is applied inside the FAISS and BM25 searches. The
+classifier maps a spoken question to a filter with keyword rules, so the
+voice tool path restricts retrieval without an extra model call.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+# topic -> (patterns that tag a chunk, patterns that put a query on the topic)
+TOPICS = {
+    "salary": (
+        [r"\bsalar(?:y|ies)\b", r"\blpa\b", r"\bctc\b", r"earning potential"],
+        [r"\bsalar(?:y|ies)\b", r"\bpay(?:s|scale)?\b", r"\bpaid\b", r"\bearn(?:s|ing)?\b", r"\blpa\b",
+         r"\bctc\b", r"\bpackage\b", r"\bcompensation\b", r"\bincome\b", r"\bhike\b"],
+    ),
+    "government": (
+        [r"\bgovernment\b", r"\bpublic sector\b", r"\bcivil services?\b", r"\bpsus?\b", r"\bupsc\b",
+         r"\bias\b", r"\bips\b", r"\bifs\b", r"\brailways?\b"],
+        [r"\bgovernment\b", r"\bgovt\b", r"\bsarkari\b", r"\bpublic sector\b", r"\bcivil services?\b",
+         r"\bpsus?\b", r"\bupsc\b", r"\bias\b", r"\bips\b", r"\bifs\b", r"\bgate\b", r"\bssc\b",
+         r"\bibps\b", r"\bnda\b", r"\bcds\b", r"\brailways?\b"],
+    ),
+    "remote": (
+        [r"\bremote\b", r"\bhybrid\b", r"\bwork from home\b"],
+        [r"\bremote(?:ly)?\b", r"\bhybrid\b", r"\bwork from home\b", r"\bwfh\b"],
+    ),
+    "transition": (
+        [r"\btransitions?\b", r"\bswitch(?:ing)?\b", r"\bpivot\b", r"\bcareer change\b"],
+        [r"\btransition(?:ing)?\b", r"\bswitch(?:ing)?\b", r"\bpivot\b", r"\bchange (?:my )?careers?\b",
+         r"\bmove from\b"],
+    ),
+    "work_life": (
+        [r"\bwork-life\b", r"\bwellness\b", r"\bstress\b", r"\bburnout\b"],
+        [r"\bwork[- ]life\b", r"\bstress(?:ful)?\b", r"\bburnout\b", r"\bwellness\b", r"\bworking hours\b"],
+    ),
+    "entrepreneurship": (
+        [r"\bstartups?\b", r"\bfounder\b", r"\bentrepreneur", r"\bventure\b"],
+        [r"\bstartups?\b", r"\bfounder\b", r"\bentrepreneur", r"\bown (?:business|company|venture)\b",
+         r"\bstart a (?:business|company)\b"],
+    ),
+}
+TOPIC_TAGS = list(TOPICS)
+
+_CHUNK_PATTERNS = {tag: [re.compile(p) for p in patterns[0]] for tag, patterns in TOPICS.items()}
+_QUERY_PATTERNS = {tag: [re.compile(p) for p in patterns[1]] for tag, patterns in TOPICS.items()}
+
+# Entry headers such as "Data Scientist:" or "Doctor (MBBS + Specialization):"
+_ENTRY_HEADER_RE = re.compile(r"^([A-Z][^:\n]{2,60}):\s*$", re.MULTILINE)
+_PARENTHETICAL_RE = re.compile(r"\s*\([^)]*\)")
+ROLE_NOUNS = {
+    "developer", "engineer", "scientist", "manager", "designer", "consultant", "doctor", "dentist",
+    "surgeon", "psychiatrist", "teacher", "professor", "researcher", "officer", "architect", "writer",
+    "copywriter", "animator", "trainer", "creator", "founder", "cto", "investor", "coordinator",
+    "analyst", "educator", "banker", "freelancer",
+}
+
+
+@dataclass
+class RetrievalFilter:
+    """
+    Restricts retrieval to matching chunks.
+    Fields combine with AND; values within a field combine with OR. Empty fields don't filter.
+    """
+    sections: List[str] = field(default_factory=list)  # section ids; "13" also matches "13.1"
+    tags: List[str] = field(default_factory=list)      # topic tags from TOPIC_TAGS
+    roles: List[str] = field(default_factory=list)     # role keywords that must appear in the chunk
+
+    def is_empty(self) -> bool:
+        return not (self.sections or self.tags or self.roles)
+
+    def describe(self) -> str:
+        parts = [f"{name}={','.join(values)}"
+                 for name, values in (("sections", self.sections), ("tags", self.tags), ("roles", self.roles))
+                 if values]
+        return " ".join(parts) or "none"
+
+
+def chunk_tag_mask(text: str) -> int:
+    """Bitmask of TOPIC_TAGS matched by a chunk's text (heading included)."""
+    lowered = text.lower()
+    mask = 0
+    for bit, tag in enumerate(TOPIC_TAGS):
+        if any(pattern.search(lowered) for pattern in _CHUNK_PATTERNS[tag]):
+            mask |= 1 << bit
+    return mask
+
+
+def tag_bits(tags: Iterable[str]) -> int:
+    """Bitmask for tag names (unknown tags raise ValueError)."""
+    mask = 0
+    for tag in tags:
+        if tag not in TOPICS:
+            raise ValueError(f"Unknown topic tag '{tag}'. Expected one of {TOPIC_TAGS}")
+        mask |= 1 << TOPIC_TAGS.index(tag)
+    return mask
+
+
+def extract_roles(text: str) -> List[str]:
+    """Lowercased role names from entry headers ("Data Scientist:" -> "data scientist")."""
+    roles = []
+    for match in _ENTRY_HEADER_RE.finditer(text):
+        name = _PARENTHETICAL_RE.sub("", match.group(1)).strip().lower()
+        if name.split() and re.split(r"[/ ]", name)[-1] in ROLE_NOUNS:
+            roles.append(name)
+    return roles
+
+
+def classify_query(query: str, roles: Iterable[str] = ()) -> Optional[RetrievalFilter]:
+    """
+    Pick a retrieval filter for a query with keyword rules.
+
+    Args:
+        query: User query or STT transcript
+        roles: Known role names (from the index) to look for in the query
+
+    Returns:
+        RetrievalFilter, or None when the query doesn't clearly target a topic or role
+    """
+    lowered = query.lower()
+    tags = [tag for tag in TOPIC_TAGS if any(p.search(lowered) for p in _QUERY_PATTERNS[tag])]
+
+    matched_roles = []
+    # Longest names first so "fintech product manager" wins over "product manager"
+    for role in sorted(set(roles), key=len, reverse=True):
+        if re.search(rf"\b{re.escape(role)}s?\b", lowered) and \
+                not any(role in longer for longer in matched_roles):
+            matched_roles.append(role)
+
+    result = RetrievalFilter(tags=tags, roles=matched_roles)
+    return None if result.is_empty() else result
@@ -0,0 +1,288 @@
+"""
+Long-lived Gemini generation clients for the Career RAG System.
+Building a GenerativeModel (and, on first use, its gRPC client) on every call
+adds setup work to each voice turn. The pool creates the model once per
+process, with the system prompt configured as a system instruction, keeps its
+client (one persistent HTTP/2 channel) for the life of the process, applies a
+deadline to every call and counts how often calls reuse an existing client.
+
+Async gRPC clients are bound to the event loop that created them, so the
+pool keeps one async model per running loop.
+
+google.generativeai has no public API for giving a model a specific client,
+so client reuse goes through 0.8.x internals (GenerativeModel._client /
+_async_client and client._client_manager). requirements.txt pins the version
+this was checked against; on a layout without those internals the pool logs
+a warning once and lets each model create its own clients.
+
+With a context cache attached, calls that pass a cache handle run on a model
+bound to the cached prefix (system prompt plus pinned chunks). If the
+provider has already dropped the cache, the call is retried once with the
+prefix sent inline.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from google.generativeai import client as genai_client
+
+from rag_context_cache import CacheHandle, ContextCache, create_context_cache_backend
+from rag_providers import configure_gemini
+from rag_telemetry import GENERATION_ERRORS, get_logger
+
+log = get_logger("generation")
+
+# The private client internals the pool relies on (see the module docstring)
+CLIENT_REUSE_SUPPORTED = (
+    genai.__version__.startswith("0.8.")
+    and hasattr(getattr(genai_client, "_client_manager", None), "make_client")
+    and hasattr(genai_client, "get_default_generative_client")
+)
+if not CLIENT_REUSE_SUPPORTED:
+    log.warning("google-generativeai client internals changed; models create their own clients",
+                version=genai.__version__)
+
+
+def share_clients(model: genai.GenerativeModel, base_model: genai.GenerativeModel) -> None:
+    """Give `model` the clients `base_model` already holds (no-op without CLIENT_REUSE_SUPPORTED)."""
+    if CLIENT_REUSE_SUPPORTED:
+        model._client = base_model._client
+        model._async_client = base_model._async_client
+
+
+class GenerationPool:
+    """
+    Reusable Gemini models and clients for one model / system instruction.
+    Thread-safe; share one pool per process.
+    """
+
+    def __init__(self, model_name: str, system_instruction: str, timeout: float = 20.0):
+        """
+        Args:
+            model_name: Gemini model, e.g. "gemini-2.0-flash"
+            system_instruction: System prompt sent as the model's system instruction
+            timeout: Default per-call deadline in seconds
+        """
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._model = None
+        self._async_models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, genai.GenerativeModel]" = \
+            weakref.WeakKeyDictionary()
+        self.context_cache: Optional[ContextCache] = None
+        # Cache-bound model per base model, rebuilt when the cache is replaced
+        self._cached_models = weakref.WeakKeyDictionary()
+        self._stats = {
+            "clients_created": 0,
+            "calls": 0,
+            "reused_calls": 0,
+            "deadline_exceeded": 0,
+            "errors": 0,
+            "setup_ms": 0.0,
+            "cached_calls": 0,
+            "cached_prefix_tokens": 0,
+            "cache_misses": 0,
+        }
+
+    def _new_model(self) -> genai.GenerativeModel:
+        configure_gemini()
+        return genai.GenerativeModel(self.model_name, system_instruction=self.system_instruction)
+
+    def _ensure_model(self) -> bool:
+        """Create the synchronous model and client if needed (caller holds the lock); True if created."""
+        if self._model is not None:
+            return False
+        start = time.perf_counter()
+        model = self._new_model()
+        if CLIENT_REUSE_SUPPORTED:
+            model._client = genai_client.get_default_generative_client()
+        self._model = model
+        self._stats["clients_created"] += 1
+        self._stats["setup_ms"] += (time.perf_counter() - start) * 1000
+        return True
+
+    def model(self) -> genai.GenerativeModel:
+        """The process-wide model with its synchronous client, created on first use."""
+        with self._lock:
+            if not self._ensure_model():
+                self._stats["reused_calls"] += 1
+            self._stats["calls"] += 1
+            return self._model
+
+    def async_model(self) -> genai.GenerativeModel:
+        """The model with an async client for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            model = self._async_models.get(loop)
+            if model is None:
+                start = time.perf_counter()
+                model = self._new_model()
+                if CLIENT_REUSE_SUPPORTED:
+                    # A dedicated client: the library's shared async client is tied to whichever loop made it
+                    model._async_client = genai_client._client_manager.make_client("generative_async")
+                self._async_models[loop] = model
+                self._stats["clients_created"] += 1
+                self._stats["setup_ms"] += (time.perf_counter() - start) * 1000
+            else:
+                self._stats["reused_calls"] += 1
+            self._stats["calls"] += 1
+            return model
+
+    def warmup(self) -> None:
+        """Configure the API key and create the synchronous client ahead of the first call."""
+        with self._lock:
+            self._ensure_model()
+
+    def enable_context_cache(self, backend_name: str, model_name: str, ttl_seconds: float) -> ContextCache:
+        """
+        Attach a context cache for this pool's system instruction (no-op if one is attached).
+
+        Args:
+            backend_name: 'gemini' or 'local'
+            model_name: Versioned model the cache is created for
+            ttl_seconds: Cache lifetime; refreshed before expiry
+        """
+        with self._lock:
+            if self.context_cache is None:
+                self.context_cache = ContextCache(
+                    create_context_cache_backend(backend_name), model_name, self.system_instruction, ttl_seconds
+                )
+            return self.context_cache
+
+    def context_handle(self) -> Optional[CacheHandle]:
+        """The live cached prefix (created or refreshed as needed), or None when uncached."""
+        if self.context_cache is None:
+            return None
+        return self.context_cache.acquire()
+
+    def _bind(self, base_model, context: CacheHandle):
+        """The cache-bound counterpart of a base model, reusing its clients."""
+        with self._lock:
+            bound = self._cached_models.get(base_model)
+            if bound is None or bound[0] != context.name:
+                cached_model = self.context_cache.backend.model(context, base_model)
+                if isinstance(cached_model, genai.GenerativeModel):
+                    share_clients(cached_model, base_model)
+                bound = (context.name, cached_model)
+                self._cached_models[base_model] = bound
+            self._stats["cached_calls"] += 1
+            self._stats["cached_prefix_tokens"] += context.token_count
+            return bound[1]
+
+    def _cache_miss(self, context: CacheHandle, error: Exception, user_message: str) -> str:
+        """Drop a cache the provider no longer has; returns the message with the prefix inline."""
+        log.warning("Context cache unavailable; retrying uncached", cache=context.name, error=str(error))
+        GENERATION_ERRORS.labels(reason="context_cache_miss").inc()
+        self.context_cache.invalidate(context)
+        with self._lock:
+            self._stats["cache_misses"] += 1
+            self._stats["cached_calls"] -= 1
+            self._stats["cached_prefix_tokens"] -= context.token_count
+        return f"{context.prefix}\n\n{user_message}" if context.prefix else user_message
+
+    def _record_error(self, error: Exception) -> None:
+        with self._lock:
+            if isinstance(error, (api_exceptions.DeadlineExceeded, asyncio.TimeoutError, TimeoutError)):
+                self._stats["deadline_exceeded"] += 1
+                GENERATION_ERRORS.labels(reason="deadline_exceeded").inc()
+            else:
+                self._stats["errors"] += 1
+                GENERATION_ERRORS.labels(reason=type(error).__name__).inc()
+
+    def _call_options(self, timeout: Optional[float], max_output_tokens: Optional[int]) -> dict:
+        """Keyword arguments for generate_content: the deadline and an optional output cap."""
+        options = {"request_options": {"timeout": timeout or self.timeout}}
+        if max_output_tokens:
+            options["generation_config"] = {"max_output_tokens": max_output_tokens}
+        return options
+
+    def generate(self, user_message: str, timeout: Optional[float] = None,
+                 context: Optional[CacheHandle] = None, max_output_tokens: Optional[int] = None):
+        """
+        Blocking generation.
+
+        Args:
+            user_message: Prompt for this turn (the system prompt is already configured)
+            timeout: Deadline in seconds (defaults to the pool's timeout)
+            context: Cached prefix to generate with (see context_handle)
+            max_output_tokens: Cap on the answer length (None = model default)
+
+        Returns:
+            GenerateContentResponse
+        """
+        options = self._call_options(timeout, max_output_tokens)
+        try:
+            model = self.model()
+            if context is not None:
+                try:
+                    return self._bind(model, context).generate_content(user_message, **options)
+                except api_exceptions.NotFound as e:
+                    user_message = self._cache_miss(context, e, user_message)
+            return model.generate_content(user_message, **options)
+        except Exception as e:
+            self._record_error(e)
+            raise
+
+    async def agenerate(self, user_message: str, timeout: Optional[float] = None, stream: bool = False,
+                        context: Optional[CacheHandle] = None, max_output_tokens: Optional[int] = None):
+        """
+        Async generation on the running loop's client.
+
+        Args:
+            user_message: Prompt for this turn (the system prompt is already configured)
+            timeout: Deadline in seconds (defaults to the pool's timeout); for a
+                stream it bounds the whole stream
+            stream: Return an async response that yields chunks as they are generated
+            context: Cached prefix to generate with (see context_handle)
+            max_output_tokens: Cap on the answer length (None = model default)
+
+        Returns:
+            AsyncGenerateContentResponse
+        """
+        options = self._call_options(timeout, max_output_tokens)
+        try:
+            model = self.async_model()
+            if context is not None:
+                try:
+                    return await self._bind(model, context).generate_content_async(
+                        user_message, stream=stream, **options
+                    )
+                except api_exceptions.NotFound as e:
+                    user_message = self._cache_miss(context, e, user_message)
+            return await model.generate_content_async(user_message, stream=stream, **options)
+        except Exception as e:
+            self._record_error(e)
+            raise
+
+    def stats(self) -> dict:
+        """Client creation and reuse counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["async_loops"] = len(self._async_models)
+        stats["reuse_rate"] = round(stats["reused_calls"] / stats["calls"], 4) if stats["calls"] else 0.0
+        stats["setup_ms"] = round(stats["setup_ms"], 2)
+        if self.context_cache is not None:
+            stats["context_cache"] = self.context_cache.stats()
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def shared_generation_pool(model_name: str, system_instruction: str, timeout: float = 20.0) -> GenerationPool:
+    """
+    The process-wide pool for a model and system instruction.
+    RAG instances created by a hot reload keep using the same clients.
+    """
+    key = (model_name, system_instruction)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = GenerationPool(model_name, system_instruction, timeout)
+        return _pools[key]
@@ -0,0 +1,247 @@
+"""
+FAISS index factory for the Career RAG System.
+Supports exact (Flat) and approximate (IVF-Flat, HNSW, IVF-PQ) backends,
+picks a default from the corpus size, benchmarks recall@k and query
+latency of the chosen index against exact brute-force search, and runs
+searches restricted to a subset of ids (metadata filters).
+"""
+
+import math
+import time
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Corpus sizes at which the automatic choice moves to the next backend
+HNSW_MIN_VECTORS = 10_000
+IVF_FLAT_MIN_VECTORS = 200_000
+IVF_PQ_MIN_VECTORS = 2_000_000
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """
+    Pick an index backend for a corpus size.
+    Exact search is fastest below ~10k vectors; beyond that, approximate
+    indexes keep query latency sub-linear, trading memory for recall.
+    """
+    if n_vectors < HNSW_MIN_VECTORS:
+        return "flat"
+    if n_vectors < IVF_FLAT_MIN_VECTORS:
+        return "hnsw"
+    if n_vectors < IVF_PQ_MIN_VECTORS:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def default_params(index_type: str, n_vectors: int, dim: int) -> dict:
+    """
+    Reasonable build and search parameters for a backend and corpus size.
+    """
+    if index_type in ("ivf_flat", "ivf_pq"):
+        # ~4*sqrt(n) lists, but keep >= 39 training points per list
+        nlist = max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39 or 1))
+        params = {"nlist": nlist, "nprobe": min(nlist, max(8, nlist // 16))}
+        if index_type == "ivf_pq":
+            # Sub-quantizers must divide the dimension; keep >= 4 dims each
+            m = max(d for d in range(1, max(1, min(64, dim // 4)) + 1) if dim % d == 0)
+            # Each PQ codebook needs ~39 training points per centroid
+            nbits = max(1, min(8, int(math.log2(max(2, n_vectors // 39)))))
+            params.update({"m": m, "nbits": nbits})
+        return params
+    if index_type == "hnsw":
+        return {"M": 32, "ef_construction": 80, "ef_search": 64}
+    return {}
+
+
+def create_index(index_type: str, dim: int, params: dict) -> faiss.Index:
+    """
+    Create an empty (untrained) index of the given type.
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["ef_construction"]
+        return index
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, params["nlist"])
+    if index_type == "ivf_pq":
+        return faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, params["nlist"], params["m"], params["nbits"])
+    raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES} or 'auto'")
+
+
+def apply_search_params(index: faiss.Index, config: dict) -> None:
+    """
+    Apply query-time parameters (nprobe / efSearch) to a built or loaded index.
+    """
+    params = config.get("params", {})
+    if "nprobe" in params:
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if "ef_search" in params and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = params["ef_search"]
+
+
+def enable_reconstruct(index: faiss.Index) -> None:
+    """
+    Make stored vectors retrievable by id (IVF indexes need a direct map).
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+    ivf.make_direct_map()
+
+
+def filtered_search(index: faiss.Index,
+                    queries: np.ndarray,
+                    k: int,
+                    mask: np.ndarray,
+                    config: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Search only the ids where `mask` is True.
+    The mask is passed to FAISS as an ID selector bitmap, so excluded vectors
+    are skipped during the scan (Flat), list traversal (IVF) or graph search
+    (HNSW) instead of being filtered out of the results afterwards.
+
+    Args:
+        index: Index to search
+        queries: float32 query matrix of shape (n, dim)
+        k: Neighbours per query
+        mask: Boolean array with one entry per indexed vector
+        config: Index config; its nprobe / ef_search are passed with the selector,
+            because per-call search parameters replace the index defaults
+
+    Returns:
+        Tuple of (distances, ids) as returned by index.search
+    """
+    # The bitmap must outlive the search: the selector only holds a pointer to it
+    bitmap = np.packbits(np.asarray(mask, dtype=np.uint8), bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    params = (config or {}).get("params", {})
+    if "nprobe" in params:
+        search_params = faiss.SearchParametersIVF(sel=selector, nprobe=params["nprobe"])
+    elif "ef_search" in params:
+        search_params = faiss.SearchParametersHNSW(sel=selector, efSearch=params["ef_search"])
+    else:
+        search_params = faiss.SearchParameters(sel=selector)
+    return index.search(queries, k, params=search_params)
+
+
+def build_faiss_index(embeddings: np.ndarray,
+                      index_type: str = "auto",
+                      params: Optional[dict] = None,
+                      ids: Optional[np.ndarray] = None) -> Tuple[faiss.Index, dict]:
+    """
+    Build, train (when needed) and fill an index.
+
+    Args:
+        embeddings: float32 matrix of shape (n, dim)
+        index_type: One of INDEX_TYPES, or 'auto' to choose by corpus size
+        params: Overrides for the default build/search parameters
+        ids: Document id of each row, when they are not simply the row positions
+            (e.g. documents without a vector are left out). The index is then
+            wrapped in an IndexIDMap2, which searches and reconstructs by these ids.
+
+    Returns:
+        Tuple of (index, config) where config records the type and parameters
+    """
+    n_vectors, dim = embeddings.shape
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+
+    config_params = default_params(index_type, n_vectors, dim)
+    config_params.update(params or {})
+
+    index = create_index(index_type, dim, config_params)
+    train_time = 0.0
+    if not index.is_trained:
+        train_start = time.time()
+        index.train(embeddings)
+        train_time = time.time() - train_start
+    if ids is None:
+        index.add(embeddings)
+    else:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype=np.int64))
+
+    config = {
+        "index_type": index_type,
+        "params": config_params,
+        "dimension": dim,
+        "ntotal": int(index.ntotal),
+        "train_seconds": round(train_time, 3),
+    }
+    apply_search_params(index, config)
+    return index, config
+
+
+def _latency_percentiles(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, dict]:
+    timings = []
+    results = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results[i] = ids[0]
+    timings = np.array(timings)
+    return results, {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+    }
+
+
+def benchmark_index(index: faiss.Index,
+                    embeddings: np.ndarray,
+                    k: int = 5,
+                    queries: Optional[np.ndarray] = None,
+                    n_queries: int = 100,
+                    seed: int = 0,
+                    ids: Optional[np.ndarray] = None) -> dict:
+    """
+    Measure recall@k and single-query latency of `index` against exact search.
+
+    Args:
+        index: Index under test
+        embeddings: The vectors the index was built from
+        k: Neighbours per query
+        queries: Query vectors (defaults to perturbed corpus vectors)
+        n_queries: Number of sampled queries when `queries` is not given
+        seed: Random seed for query sampling
+        ids: Document id of each row of `embeddings`, when the index was built
+            with ids (see build_faiss_index)
+
+    Returns:
+        Dict with recall@k and p50/p99 latency for the index and the exact baseline
+    """
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(len(embeddings), size=min(n_queries, len(embeddings)), replace=False)
+        noise_scale = float(np.std(embeddings)) * 0.1
+        queries = embeddings[sample] + rng.normal(0, noise_scale, (len(sample), embeddings.shape[1]))
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(embeddings))
+
+    exact = faiss.IndexFlatL2(embeddings.shape[1])
+    if ids is not None:
+        exact = faiss.IndexIDMap(exact)
+        exact.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+    else:
+        exact.add(embeddings)
+    exact_ids, exact_latency = _latency_percentiles(exact, queries, k)
+    ann_ids, ann_latency = _latency_percentiles(index, queries, k)
+
+    recall = np.mean([
+        len(set(ann_ids[i]) & set(exact_ids[i])) / k for i in range(len(queries))
+    ])
+    return {
+        "k": k,
+        "queries": len(queries),
+        f"recall@{k}": round(float(recall), 4),
+        "latency_ms": ann_latency,
+        "exact_latency_ms": exact_latency,
+    }
@@ -0,0 +1,196 @@
+"""
+In-memory BM25 inverted index for hybrid lexical + vector retrieval.
+Keyword-heavy voice queries ("IAS", "GATE", "PSU", "LPA", city names) are
+matched exactly, fused with dense results by reciprocal rank, and - when the
+lexical match is confident - answered without any embedding round trip.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag_postprocess import STOPWORDS
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content-word tokens."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents.
+    Postings are stored per term as (document ids, term frequencies) arrays.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: Document texts; ids are positions in this list
+            k1: Term-frequency saturation
+            b: Length normalization strength
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_id, tf))
+
+        self._init_postings(lengths, {
+            term: (np.array([d for d, _ in entries], dtype=np.int64),
+                   np.array([tf for _, tf in entries], dtype=np.float32))
+            for term, entries in postings.items()
+        }, k1, b)
+
+    def _init_postings(self, lengths: np.ndarray, postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                       k1: float, b: float) -> None:
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(lengths)
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.n_docs else 0.0
+        self._length_norm = self.k1 * (1 - self.b + self.b * lengths / max(self.avg_length, 1e-9))
+        self.postings = postings
+        self.idf = {
+            term: math.log(1 + (self.n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in self.postings.items()
+        }
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Flatten the index into arrays for pickle-free storage.
+        Postings of term i are doc_ids/tfs[term_offsets[i]:term_offsets[i + 1]].
+        """
+        terms = sorted(self.postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(self.postings[term][0]) for term in terms], out=term_offsets[1:])
+        return {
+            "terms": np.array(terms, dtype=str),
+            "term_offsets": term_offsets,
+            "doc_ids": np.concatenate([self.postings[term][0] for term in terms]) if terms
+            else np.zeros(0, dtype=np.int64),
+            "tfs": np.concatenate([self.postings[term][1] for term in terms]) if terms
+            else np.zeros(0, dtype=np.float32),
+            "lengths": self.lengths,
+            "params": np.array([self.k1, self.b], dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "BM25Index":
+        """
+        Rebuild an index from to_arrays() output without re-tokenizing documents.
+        Postings are views into the flat arrays.
+        """
+        offsets = arrays["term_offsets"]
+        doc_ids, tfs = arrays["doc_ids"], arrays["tfs"]
+        postings = {
+            term: (doc_ids[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]])
+            for i, term in enumerate(arrays["terms"].tolist())
+        }
+        k1, b = (float(value) for value in arrays["params"])
+        index = cls.__new__(cls)
+        index._init_postings(np.asarray(arrays["lengths"], dtype=np.float32), postings, k1, b)
+        return index
+
+    def scores(self, query: str, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, List[str]]:
+        """
+        BM25 score of every document for a query.
+
+        Args:
+            query: Query text
+            mask: Boolean array of documents to score; the rest score 0
+
+        Returns:
+            Tuple of (score per document, unique query terms)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in terms:
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf[term] * tfs * (self.k1 + 1) / (tfs + self._length_norm[ids])
+        if mask is not None:
+            scores[~mask] = 0.0
+        return scores, terms
+
+    def search(self, query: str, k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k documents by BM25 score, optionally among the documents in `mask` only.
+
+        Returns:
+            List of (document_id, score), best first, zero scores excluded
+        """
+        scores, _ = self.scores(query, mask)
+        if not self.n_docs:
+            return []
+        k = min(k, self.n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def confidence(self, query: str, mask: Optional[np.ndarray] = None) -> dict:
+        """
+        How decisively the best lexical match answers the query (among `mask` documents, if given).
+
+        Returns:
+            Dict with `coverage` (idf-weighted share of query terms present in the
+            best document; unknown terms count as missing), `margin` (relative gap
+            between the best and second-best scores) and `terms` (query term count)
+        """
+        scores, terms = self.scores(query, mask)
+        if not terms or not self.n_docs or scores.max() <= 0:
+            return {"coverage": 0.0, "margin": 0.0, "terms": len(terms)}
+
+        order = np.argsort(-scores)
+        best = int(order[0])
+        second = float(scores[order[1]]) if self.n_docs > 1 else 0.0
+        # Unknown terms get the highest possible idf so they count heavily against coverage
+        max_idf = math.log(1 + (self.n_docs + 0.5) / 0.5)
+        total = sum(self.idf.get(term, max_idf) for term in terms)
+        matched = sum(
+            self.idf[term] for term in terms
+            if term in self.postings and best in set(self.postings[term][0].tolist())
+        )
+        return {
+            "coverage": matched / total,
+            "margin": (float(scores[best]) - second) / float(scores[best]),
+            "terms": len(terms),
+        }
+
+    def matching_documents(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        Boolean mask of the documents containing every one of `terms` (after tokenizing).
+        """
+        mask = np.ones(self.n_docs, dtype=bool)
+        for term in dict.fromkeys(tokenize(" ".join(terms))):
+            present = np.zeros(self.n_docs, dtype=bool)
+            if term in self.postings:
+                present[self.postings[term][0]] = True
+            mask &= present
+        return mask
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge several ranked id lists: score(d) = sum over lists of 1 / (k + rank).
+
+    Args:
+        rankings: Ranked document ids, best first, one list per retriever
+        k: Rank damping constant (60 is the standard choice)
+
+    Returns:
+        List of (document_id, fused_score), best first
+    """
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,62 @@
+"""
+Process memory accounting for the Career RAG System.
+LiveKit runs every job in its own process. With the index bundle mapped
+read-only, those processes share the bundle's pages; this module reports how
+much of a process is private (USS) and how much is the shared bundle mapping,
+so the per-session cost of a call can be measured.
+"""
+
+import os
+from typing import Optional
+
+import psutil
+
+_MB = 1024 * 1024
+
+
+def memory_report(shared_dir: Optional[str] = None, pid: Optional[int] = None) -> dict:
+    """
+    Memory breakdown of a process, in MB.
+
+    Args:
+        shared_dir: Directory whose mapped files count as the shared index (the bundle)
+        pid: Process to inspect (defaults to the current process)
+
+    Returns:
+        Dict with rss, uss (private memory; what the process alone costs), pss
+        (proportional share of shared pages), shared (resident pages shared with
+        other processes) and, when `shared_dir` is given, the resident size and
+        proportional share of the bundle mapping
+    """
+    process = psutil.Process(pid)
+    full = process.memory_full_info()
+    report = {
+        "pid": process.pid,
+        "rss_mb": round(full.rss / _MB, 2),
+        "uss_mb": round(getattr(full, "uss", 0) / _MB, 2),
+        "pss_mb": round(getattr(full, "pss", 0) / _MB, 2),
+        "shared_mb": round(getattr(full, "shared", 0) / _MB, 2),
+    }
+
+    if shared_dir is not None:
+        prefix = os.path.abspath(shared_dir) + os.sep
+        mapped_rss = mapped_pss = 0
+        try:
+            for mapping in process.memory_maps(grouped=True):
+                if mapping.path.startswith(prefix):
+                    mapped_rss += mapping.rss
+                    mapped_pss += getattr(mapping, "pss", mapping.rss)
+        except (psutil.AccessDenied, NotImplementedError):
+            pass
+        report["index_mapped_rss_mb"] = round(mapped_rss / _MB, 2)
+        report["index_mapped_pss_mb"] = round(mapped_pss / _MB, 2)
+    return report
+
+
+def memory_delta(before: dict, after: dict) -> dict:
+    """Change in each numeric field between two reports (e.g. per session)."""
+    return {
+        key: round(after[key] - before[key], 2)
+        for key in after
+        if key != "pid" and key in before
+    }
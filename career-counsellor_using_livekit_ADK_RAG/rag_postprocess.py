@@ -0,0 +1,162 @@
+"""
+Retrieval post-processing for the Career RAG System.
+Drops weak matches with a similarity cutoff, diversifies the remaining
+candidates with maximal marginal relevance (MMR), and packs the selected
+chunks into a fixed token budget at sentence level so the prompt carries
+only the context that matters.
+"""
+
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from rag_streaming import split_sentences
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+# The knowledge base is hard-wrapped; a line starting in lowercase continues the previous one
+_SOFT_WRAP_RE = re.compile(r"\n(?=[a-z(])")
+
+# Words that say nothing about which sentence answers the question
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "at", "by", "from",
+    "is", "are", "was", "be", "do", "does", "can", "i", "me", "my", "you", "your", "what",
+    "which", "how", "who", "when", "where", "why", "should", "would", "could", "as",
+    "that", "this", "there", "about", "into", "get", "become",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate LLM token count (~4 characters per token for English text).
+    """
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def query_terms(text: str) -> set:
+    """Content words of a query or sentence."""
+    return {word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS}
+
+
+def apply_similarity_cutoff(candidates: Sequence[Tuple[int, float]],
+                            min_similarity: float = 0.0,
+                            relative_cutoff: float = 0.0) -> List[Tuple[int, float]]:
+    """
+    Drop candidates that are barely relevant.
+
+    Args:
+        candidates: (document_id, similarity) pairs sorted by similarity
+        min_similarity: Absolute similarity floor
+        relative_cutoff: Keep only candidates within this fraction of the best score
+
+    Returns:
+        Filtered candidates (the best candidate is always kept)
+    """
+    if not candidates:
+        return []
+    best = candidates[0][1]
+    floor = max(min_similarity, best * relative_cutoff)
+    return [candidates[0]] + [c for c in candidates[1:] if c[1] >= floor]
+
+
+def mmr_rerank(doc_embeddings: np.ndarray,
+               relevance: Sequence[float],
+               k: int,
+               lambda_mult: float = 0.7) -> List[int]:
+    """
+    Maximal marginal relevance selection.
+    Each step picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * max cosine similarity to already selected ones,
+    so near-duplicate chunks don't crowd out other useful context.
+
+    Args:
+        doc_embeddings: Candidate vectors, one row per candidate
+        relevance: Relevance score per candidate
+        k: Number of candidates to select
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Positions of the selected candidates, in selection order
+    """
+    n = len(relevance)
+    if n == 0:
+        return []
+    if doc_embeddings is None or len(doc_embeddings) != n:
+        return list(range(min(k, n)))
+
+    norms = np.linalg.norm(doc_embeddings, axis=1, keepdims=True)
+    unit = doc_embeddings / np.where(norms == 0, 1.0, norms)
+    pairwise = unit @ unit.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    while len(selected) < min(k, n):
+        redundancy = pairwise[:, selected].max(axis=1)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        selected.append(int(np.argmax(scores)))
+    return selected
+
+
+class ContextPacker:
+    """
+    Trims retrieved chunks to a token budget, one sentence at a time.
+    Sentences that share words with the query (and each chunk's heading line)
+    are kept first, following retrieval rank; duplicate sentences across chunks
+    are dropped. Kept sentences stay in their original order.
+    """
+
+    def __init__(self, token_budget: int = 450):
+        """
+        Args:
+            token_budget: Maximum estimated tokens of packed context
+        """
+        self.token_budget = token_budget
+
+    def pack(self, documents: List[str], query: str) -> Tuple[List[str], dict]:
+        """
+        Pack ranked documents into the token budget.
+
+        Args:
+            documents: Retrieved chunk texts, best first
+            query: User query (drives sentence priority)
+
+        Returns:
+            Tuple of (packed documents in the same order, possibly empty strings;
+            packing stats including tokens saved)
+        """
+        terms = query_terms(query)
+        units = []
+        seen = set()
+        for doc_pos, doc in enumerate(documents):
+            for sent_pos, sentence in enumerate(split_sentences(_SOFT_WRAP_RE.sub(" ", doc))):
+                key = sentence.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                matched = sent_pos == 0 or bool(terms & query_terms(sentence))
+                units.append((doc_pos, sent_pos, sentence, estimate_tokens(sentence), matched))
+
+        # Query-matching sentences from every chunk first, then the rest, by chunk rank
+        priority = sorted(units, key=lambda u: (not u[4], u[0], u[1]))
+        kept = set()
+        used = 0
+        for unit in priority:
+            if used + unit[3] <= self.token_budget:
+                kept.add((unit[0], unit[1]))
+                used += unit[3]
+
+        packed = []
+        for doc_pos in range(len(documents)):
+            sentences = [u[2] for u in units if u[0] == doc_pos and (u[0], u[1]) in kept]
+            packed.append("\n".join(sentences))
+
+        tokens_before = sum(estimate_tokens(doc) for doc in documents)
+        return packed, {
+            "tokens_before": tokens_before,
+            "tokens_after": used,
+            "tokens_saved": tokens_before - used,
+            "sentences_kept": len(kept),
+            "sentences_total": len(units),
+        }
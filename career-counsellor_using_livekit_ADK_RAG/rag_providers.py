@@ -0,0 +1,350 @@
+"""
+Embedding providers for the Career RAG System.
+The RAG system talks to an EmbeddingProvider selected by configuration:
+
+- gemini: Gemini embedding API (network, the production default)
+- local:  TF-IDF + truncated SVD fitted on the corpus, runs on CPU with no network
+- test:   deterministic feature-hashing embedder for tests and offline benchmarks
+
+Each provider exposes a model id and dimension, which are recorded with the
+index so an index built by one provider is never queried with another.
+"""
+
+import abc
+import asyncio
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from rag_resilience import CircuitBreaker, DeadlineRetrier
+
+# Gemini embedding deadlines and failure handling (see rag_resilience)
+EMBED_QUERY_BUDGET_MS = float(os.getenv("RAG_EMBED_QUERY_BUDGET_MS", "1500"))
+EMBED_DOCUMENT_BUDGET_S = float(os.getenv("RAG_EMBED_DOCUMENT_BUDGET_S", "60"))
+EMBED_HEDGE_MS = float(os.getenv("RAG_EMBED_HEDGE_MS", "0"))
+EMBED_BREAKER_FAILURES = int(os.getenv("RAG_EMBED_BREAKER_FAILURES", "5"))
+EMBED_BREAKER_RESET_S = float(os.getenv("RAG_EMBED_BREAKER_RESET_S", "30"))
+
+_gemini_configured = False
+_gemini_lock = threading.Lock()
+
+
+def configure_gemini():
+    """
+    Configure the Gemini SDK on first use instead of at import time.
+
+    Returns:
+        The configured google.generativeai module
+
+    Raises:
+        ValueError: If GEMINI_API_KEY is not set
+    """
+    global _gemini_configured
+    import google.generativeai as genai
+
+    with _gemini_lock:
+        if not _gemini_configured:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not set in environment variables")
+            genai.configure(api_key=api_key)
+            _gemini_configured = True
+    return genai
+
+
+class EmbeddingProvider(abc.ABC):
+    """
+    Base class for embedding providers.
+    Subclasses implement `embed_documents`; query embedding defaults to the same call.
+    """
+
+    name = "base"
+    model_id = ""
+    task_type = "RETRIEVAL_DOCUMENT"
+    dimension = 0
+
+    def fit(self, documents: List[str]) -> None:
+        """Prepare the provider for a corpus (no-op for pretrained models)."""
+
+    @abc.abstractmethod
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in one request.
+
+        Returns:
+            float32 matrix of shape (len(texts), dimension)
+
+        Raises:
+            Exception: On failure, so the caller can split and retry the batch
+        """
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a single query.
+
+        Raises:
+            EmbeddingUnavailable: For network providers, when no vector could be
+                obtained in time (callers fall back to lexical retrieval)
+        """
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """Async query embedding (CPU providers run in a worker thread)."""
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def stats(self) -> dict:
+        """Retry / failure counters (empty for local providers)."""
+        return {}
+
+    def describe(self) -> dict:
+        """Provider identity recorded alongside the index."""
+        return {"provider": self.name, "model_id": self.model_id, "dimension": self.dimension}
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """
+    Gemini embedding API behind DeadlineRetriers: every call has a latency
+    budget, a circuit breaker fails fast while the API is degraded, and slow
+    query requests can be hedged. Document batches and live queries have
+    separate breakers, so a rebuild that hits rate limits doesn't push voice
+    queries onto lexical-only retrieval. Failures raise EmbeddingUnavailable.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_id: str = "models/embedding-001",
+                 task_type: str = "RETRIEVAL_DOCUMENT", dimension: int = 768,
+                 query_budget_ms: float = EMBED_QUERY_BUDGET_MS,
+                 document_budget_s: float = EMBED_DOCUMENT_BUDGET_S,
+                 hedge_ms: float = EMBED_HEDGE_MS,
+                 breaker_failures: int = EMBED_BREAKER_FAILURES,
+                 breaker_reset_s: float = EMBED_BREAKER_RESET_S):
+        """
+        Args:
+            model_id: Gemini embedding model
+            task_type: Embedding task type
+            dimension: Embedding dimension
+            query_budget_ms: Total time for a query embedding, retries included
+            document_budget_s: Total time for one batch of documents, retries included
+            hedge_ms: Send a duplicate query request after this long without an answer (0 = off)
+            breaker_failures: Consecutive transient failures that open a circuit
+            breaker_reset_s: Seconds a circuit stays open before a probe request
+        """
+        self.model_id = model_id
+        self.task_type = task_type
+        self.dimension = dimension
+        self.query_budget = query_budget_ms / 1000
+        self.document_budget = document_budget_s
+        # Shared by copies of the provider (e.g. a reload's replacement), so the whole process backs off together
+        self.query_retrier = DeadlineRetrier(
+            CircuitBreaker(self.name, breaker_failures, breaker_reset_s, kind="query"),
+            attempt_timeout=20.0, hedge_after=hedge_ms / 1000
+        )
+        self.document_retrier = DeadlineRetrier(
+            CircuitBreaker(self.name, breaker_failures, breaker_reset_s, kind="documents"),
+            attempt_timeout=20.0
+        )
+
+    def _request(self, content, timeout: float) -> dict:
+        genai = configure_gemini()
+        return genai.embed_content(
+            model=self.model_id,
+            content=content,
+            task_type=self.task_type,
+            title="Career advice document",
+            request_options={"timeout": timeout}
+        )
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several texts in a single provider request within the document budget.
+        The final failure is raised so that the embedding pipeline can split the
+        batch and retry the halves.
+        """
+        texts = [text[:2000] for text in texts]
+        result = self.document_retrier.call(lambda timeout: self._request(texts, timeout),
+                                   self.document_budget, kind="documents")
+        return np.array(result['embedding'], dtype=np.float32).reshape(len(texts), -1)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a query within the query budget (hedged if configured).
+
+        Raises:
+            EmbeddingUnavailable: The budget ran out, the error was not transient
+                or the circuit is open
+        """
+        text = text[:2000]
+        result = self.query_retrier.call(lambda timeout: self._request(text, timeout),
+                                   self.query_budget, kind="query", hedge=True)
+        return np.array(result['embedding'], dtype=np.float32)
+
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """
+        Async counterpart of embed_query.
+        Uses the async Gemini client and asyncio.sleep so backoff never blocks the event loop.
+        """
+        genai = configure_gemini()
+        text = text[:2000]
+
+        def request(timeout: float):
+            return genai.embed_content_async(
+                model=self.model_id,
+                content=text,
+                task_type=self.task_type,
+                title="Career advice document",
+                request_options={"timeout": timeout}
+            )
+
+        result = await self.query_retrier.acall(request, self.query_budget, kind="query", hedge=True)
+        return np.array(result['embedding'], dtype=np.float32)
+
+    def stats(self) -> dict:
+        """Retry, hedging and circuit breaker counters per kind of request."""
+        return {"query": self.query_retrier.stats(), "documents": self.document_retrier.stats()}
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def _tokens(text: str) -> List[str]:
+    words = _TOKEN_RE.findall(text.lower())
+    # Unigrams plus bigrams so phrases like "data scientist" carry their own signal
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class LocalTfidfSvdProvider(EmbeddingProvider):
+    """
+    CPU-only embedder: TF-IDF over the corpus, projected with truncated SVD (LSA).
+    Fitted on the knowledge base at index build time and saved next to the index,
+    so queries are embedded in microseconds with no network access.
+    """
+
+    name = "local"
+    task_type = "LSA"
+
+    def __init__(self, state_path: str = "career_rag_local_embedder.npz", dimension: int = 256):
+        """
+        Args:
+            state_path: File holding the fitted vocabulary, idf and projection
+            dimension: Target embedding dimension (capped by the corpus rank)
+        """
+        self.state_path = state_path
+        self.target_dimension = dimension
+        self.vocabulary = {}
+        self.idf = None
+        self.components = None
+        self.model_id = ""
+        self.dimension = 0
+        if os.path.exists(state_path):
+            self._load()
+
+    def _load(self) -> None:
+        state = np.load(self.state_path, allow_pickle=False)
+        self.vocabulary = {term: i for i, term in enumerate(state["vocabulary"].tolist())}
+        self.idf = state["idf"]
+        self.components = state["components"]
+        self.model_id = str(state["model_id"])
+        self.dimension = int(self.components.shape[0])
+
+    def _tfidf(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for term, count in Counter(_tokens(text)).items():
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    matrix[row, col] = 1.0 + math.log(count)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def fit(self, documents: List[str]) -> None:
+        """
+        Fit vocabulary, idf and SVD projection on the corpus and save them.
+        Refitting on a different corpus changes the model id, which invalidates
+        cached vectors and any index built with the previous fit.
+        """
+        doc_freq = Counter()
+        for doc in documents:
+            doc_freq.update(set(_tokens(doc)))
+        # Drop terms seen only once: they can't relate documents to each other
+        terms = sorted(term for term, df in doc_freq.items() if df > 1 or len(documents) < 3)
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        n_docs = len(documents)
+        self.idf = np.array(
+            [math.log((1 + n_docs) / (1 + doc_freq[term])) + 1.0 for term in terms], dtype=np.float32
+        )
+
+        tfidf = self._tfidf(documents)
+        _, _, vt = np.linalg.svd(tfidf, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:min(self.target_dimension, vt.shape[0])], dtype=np.float32)
+        self.dimension = int(self.components.shape[0])
+
+        digest = hashlib.sha256(self.components.tobytes())
+        digest.update("\n".join(terms).encode("utf-8"))
+        self.model_id = f"local-tfidf-svd-{self.dimension}-{digest.hexdigest()[:12]}"
+        np.savez(self.state_path, vocabulary=np.array(terms), idf=self.idf,
+                 components=self.components, model_id=np.array(self.model_id))
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        if self.components is None:
+            raise ValueError("Local embedder is not fitted. Build the index first.")
+        vectors = self._tfidf(texts) @ self.components.T
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+
+
+class HashingTestProvider(EmbeddingProvider):
+    """
+    Deterministic, dependency-free embedder for tests and offline benchmarks.
+    Tokens are feature-hashed into a fixed number of signed buckets, so texts
+    sharing words get similar vectors and results are identical across runs.
+    """
+
+    name = "test"
+    task_type = "HASHING"
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+        self.model_id = f"test-hashing-{dimension}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in _tokens(text):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.vstack([self._embed(text) for text in texts]) if texts else \
+            np.zeros((0, self.dimension), dtype=np.float32)
+
+
+def create_embedding_provider(name: str = "gemini", **kwargs) -> EmbeddingProvider:
+    """
+    Create an embedding provider by name.
+
+    Args:
+        name: 'gemini', 'local' or 'test'
+        **kwargs: Provider constructor arguments
+
+    Returns:
+        EmbeddingProvider instance
+    """
+    name = name.lower()
+    providers = {
+        "gemini": GeminiEmbeddingProvider,
+        "local": LocalTfidfSvdProvider,
+        "test": HashingTestProvider,
+    }
+    if name not in providers:
+        raise ValueError(f"Unknown embedding provider '{name}'. Expected one of {sorted(providers)}")
+    return providers[name](**kwargs)
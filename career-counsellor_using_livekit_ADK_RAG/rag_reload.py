@@ -0,0 +1,78 @@
+"""
+Knowledge-base file watching for hot reload of the Career RAG System.
+A background thread watches the knowledge base files with watchfiles and
+calls back with the paths that changed. The callback rebuilds a replacement
+index off to the side and swaps it in with a single reference assignment,
+so queries already running finish on the index they started with.
+"""
+
+import os
+import threading
+from typing import Callable, List, Optional, Sequence
+
+from watchfiles import watch
+
+from rag_telemetry import get_logger
+
+log = get_logger("reload")
+
+
+class KnowledgeBaseWatcher:
+    """
+    Watches knowledge-base files and reports changes from a daemon thread.
+    Parent directories are watched rather than the files themselves, so
+    editors and deploy tools that replace a file by renaming are seen too.
+    """
+
+    def __init__(self, paths: Sequence[str], on_change: Callable[[List[str]], None],
+                 debounce_ms: int = 1600):
+        """
+        Args:
+            paths: Knowledge-base files to watch
+            on_change: Called with the changed paths; runs on the watcher thread
+            debounce_ms: Changes within this window are reported together
+        """
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.on_change = on_change
+        self.debounce_ms = debounce_ms
+        self.reloads = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _is_watched(self, _change, path: str) -> bool:
+        return os.path.abspath(path) in self.paths
+
+    def _run(self) -> None:
+        directories = sorted({os.path.dirname(path) for path in self.paths})
+        for changes in watch(*directories, watch_filter=self._is_watched, debounce=self.debounce_ms,
+                             stop_event=self._stop, recursive=False, raise_interrupt=False):
+            changed = sorted({os.path.abspath(path) for _, path in changes})
+            # A file being replaced shows up as deleted first; wait for the new version
+            changed = [path for path in changed if os.path.exists(path)]
+            if not changed:
+                continue
+            log.info("Knowledge base changed", files=",".join(os.path.basename(path) for path in changed))
+            try:
+                self.on_change(changed)
+                self.reloads += 1
+            except Exception as e:
+                # Keep serving the current index and keep watching
+                self.failures += 1
+                log.error("Reload failed; still serving the previous index", error=str(e))
+
+    def start(self) -> "KnowledgeBaseWatcher":
+        """Start watching in a daemon thread (no-op if already running)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rag-kb-watcher", daemon=True)
+            self._thread.start()
+            log.info("Watching knowledge base for changes", files=len(self.paths))
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop watching and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
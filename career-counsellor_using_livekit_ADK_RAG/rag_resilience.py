@@ -0,0 +1,365 @@
+"""
+Deadline-aware calls to the embedding provider.
+
+- Latency budget: every call gets a total time budget. Each attempt's timeout
+  and each backoff sleep are capped by what is left of it, so a voice turn
+  never waits out a long exponential backoff.
+- Circuit breaker: after consecutive transient failures, calls fail fast for
+  a cool-down period; one probe call is then let through to test recovery.
+- Hedging: optionally, a duplicate request is sent when the first has not
+  answered after a delay, and the first success wins (trims tail latency).
+
+A call that cannot produce a vector raises EmbeddingUnavailable. Callers
+degrade explicitly (lexical-only retrieval for queries; documents are left
+out of the vector index and re-embedded later) instead of using zero vectors.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions as api_exceptions
+
+from rag_telemetry import EMBEDDING_CIRCUIT_STATE, EMBEDDING_HEDGES, EMBEDDING_RETRIES, get_logger
+
+log = get_logger("resilience")
+
+T = TypeVar("T")
+
+_RETRYABLE_ERRORS = (
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    TimeoutError,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+class EmbeddingUnavailable(RuntimeError):
+    """The provider could not embed the text within its budget (or the circuit is open)."""
+
+
+class CircuitOpenError(EmbeddingUnavailable):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for transient provider errors (timeouts, overload, 5xx, rate limits),
+    judged by exception type only. Everything else, e.g. an invalid argument,
+    a bad key or a bug in the caller, fails immediately.
+    """
+    return isinstance(error, _RETRYABLE_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. Thread-safe.
+
+    closed:    calls go through; `failure_threshold` transient failures in a row open it
+    open:      calls fail fast until `reset_seconds` have passed
+    half_open: one probe call goes through; success closes the circuit, failure re-opens it
+    """
+
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 kind: str = "query"):
+        """
+        Args:
+            name: Provider name (metrics label)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: How long the circuit stays open before a probe is allowed
+            kind: Traffic the breaker guards, 'query' or 'documents' (metrics label)
+        """
+        self.name = name
+        self.kind = kind
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "rejected": 0}
+        self._publish()
+
+    def _publish(self) -> None:
+        EMBEDDING_CIRCUIT_STATE.labels(provider=self.name, kind=self.kind).set(self.STATES[self._state])
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go to the provider now (counts a rejection otherwise)."""
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = "half_open"
+                self._probe_in_flight = False
+                self._publish()
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                log.info("Embedding circuit closed", provider=self.name, kind=self.kind)
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+            self._publish()
+
+    def release_probe(self) -> None:
+        """
+        Free the half-open probe slot without judging the provider, for a call
+        that was abandoned (cancelled) before it answered; the next call probes.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a transient failure; opens the circuit at the threshold or when a probe fails."""
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or \
+                    (self._state == "closed" and self._failures >= self.failure_threshold):
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                self._stats["opened"] += 1
+                self._publish()
+                log.warning("Embedding circuit opened; failing fast", provider=self.name, kind=self.kind,
+                            consecutive_failures=self._failures, reset_s=self.reset_seconds)
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, **self._stats}
+
+
+class DeadlineRetrier:
+    """
+    Runs provider calls under a latency budget, a circuit breaker and optional hedging.
+    Calls receive the per-attempt timeout in seconds, to pass on as the request deadline.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, attempt_timeout: float = 10.0,
+                 base_backoff: float = 0.1, max_backoff: float = 2.0, hedge_after: float = 0.0,
+                 max_hedge_workers: int = 8):
+        """
+        Args:
+            breaker: Circuit breaker shared by every call of this kind to the provider
+            attempt_timeout: Upper bound on a single attempt (further capped by the budget)
+            base_backoff: First backoff in seconds; doubles per attempt, with full jitter
+            max_backoff: Cap on a single backoff
+            hedge_after: Send a duplicate request after this many seconds without
+                an answer (0 disables hedging)
+            max_hedge_workers: Threads available for hedged synchronous calls
+        """
+        self.breaker = breaker
+        self.attempt_timeout = attempt_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self._executor = ThreadPoolExecutor(max_workers=max_hedge_workers,
+                                            thread_name_prefix="embed-hedge") if hedge_after > 0 else None
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                       "budget_exhausted": 0, "failures": 0}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def _backoff(self, attempt: int, remaining: float) -> Optional[float]:
+        """Sleep before the next attempt, or None if it would not fit in the budget."""
+        wait_time = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** (attempt - 1))))
+        # Leave the next attempt at least as long as the wait itself
+        return wait_time if wait_time * 2 < remaining else None
+
+    def _fail(self, kind: str, budget: float, attempts: int, error: Exception) -> EmbeddingUnavailable:
+        self._count("failures")
+        if isinstance(error, EmbeddingUnavailable):
+            return error
+        log.warning("Embedding failed", provider=self.breaker.name, kind=kind, attempts=attempts,
+                    budget_ms=round(budget * 1000), error=str(error))
+        failure = EmbeddingUnavailable(f"{kind} embedding failed after {attempts} attempt(s): {error}")
+        failure.__cause__ = error
+        return failure
+
+    # ------------------------------------------------------------------
+    # Blocking calls
+    # ------------------------------------------------------------------
+
+    def _attempt(self, fn: Callable[[float], T], timeout: float, hedge: bool) -> T:
+        """One attempt, with a hedged duplicate if the first request is slow."""
+        if not hedge or self._executor is None or self.hedge_after >= timeout:
+            return fn(timeout)
+        deadline = time.monotonic() + timeout
+        primary = self._executor.submit(fn, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        if not self.breaker.allow():
+            return primary.result(timeout=max(0.0, deadline - time.monotonic()))
+        self._count("hedges")
+        EMBEDDING_HEDGES.labels(provider=self.breaker.name).inc()
+        secondary = self._executor.submit(fn, max(0.0, deadline - time.monotonic()))
+        pending = {primary, secondary}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"Embedding request timed out after {timeout:.2f}s")
+            for future in done:
+                if future.exception() is None:
+                    if future is secondary:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, fn: Callable[[float], T], budget: float, kind: str = "query", hedge: bool = False) -> T:
+        """
+        Call `fn(timeout)` until it succeeds or the budget is spent.
+
+        Args:
+            fn: Provider request taking the attempt's timeout in seconds
+            budget: Total seconds for all attempts and backoff
+            kind: 'query' or 'documents' (metrics and logs)
+            hedge: Allow a hedged duplicate request per attempt
+
+        Returns:
+            The provider result
+
+        Raises:
+            CircuitOpenError: The circuit is open; the provider was not called
+            EmbeddingUnavailable: Non-retryable error, or the budget ran out
+        """
+        self._count("calls")
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("failures")
+                raise CircuitOpenError(f"{self.breaker.name} {self.breaker.kind} embedding circuit is open")
+            remaining = deadline - time.monotonic()
+            try:
+                result = self._attempt(fn, min(self.attempt_timeout, remaining), hedge)
+            except Exception as e:
+                attempt += 1
+                if not is_retryable(e):
+                    # The provider answered, so it is reachable (this also ends a half-open probe)
+                    self.breaker.record_success()
+                    raise self._fail(kind, budget, attempt, e)
+                self.breaker.record_failure()
+                wait_time = self._backoff(attempt, deadline - time.monotonic())
+                if wait_time is None:
+                    self._count("budget_exhausted")
+                    raise self._fail(kind, budget, attempt, e)
+                self._count("retries")
+                EMBEDDING_RETRIES.labels(provider=self.breaker.name, kind=kind).inc()
+                time.sleep(wait_time)
+                continue
+            except BaseException:
+                # Cancelled mid-request (e.g. an interrupted voice turn): a probe
+                # must not stay in flight forever, or the circuit never closes
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    # ------------------------------------------------------------------
+    # Async calls
+    # ------------------------------------------------------------------
+
+    async def _aattempt(self, fn: Callable[[float], Awaitable[T]], timeout: float, hedge: bool) -> T:
+        if not hedge or self.hedge_after <= 0 or self.hedge_after >= timeout:
+            return await asyncio.wait_for(fn(timeout), timeout)
+        deadline = time.monotonic() + timeout
+        primary = asyncio.ensure_future(fn(timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done and self.breaker.allow():
+                self._count("hedges")
+                EMBEDDING_HEDGES.labels(provider=self.breaker.name).inc()
+                tasks.add(asyncio.ensure_future(fn(max(0.0, deadline - time.monotonic()))))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError(f"Embedding request timed out after {timeout:.2f}s")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def acall(self, fn: Callable[[float], Awaitable[T]], budget: float, kind: str = "query",
+                    hedge: bool = False) -> T:
+        """
+        Async counterpart of call: `fn(timeout)` returns an awaitable, backoff
+        uses asyncio.sleep and losing hedged requests are cancelled.
+        """
+        self._count("calls")
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("failures")
+                raise CircuitOpenError(f"{self.breaker.name} {self.breaker.kind} embedding circuit is open")
+            remaining = deadline - time.monotonic()
+            try:
+                result = await self._aattempt(fn, min(self.attempt_timeout, remaining), hedge)
+            except Exception as e:
+                attempt += 1
+                if not is_retryable(e):
+                    # The provider answered, so it is reachable (this also ends a half-open probe)
+                    self.breaker.record_success()
+                    raise self._fail(kind, budget, attempt, e)
+                self.breaker.record_failure()
+                wait_time = self._backoff(attempt, deadline - time.monotonic())
+                if wait_time is None:
+                    self._count("budget_exhausted")
+                    raise self._fail(kind, budget, attempt, e)
+                self._count("retries")
+                EMBEDDING_RETRIES.labels(provider=self.breaker.name, kind=kind).inc()
+                await asyncio.sleep(wait_time)
+                continue
+            except BaseException:
+                # Cancelled mid-request (e.g. an interrupted voice turn): a probe
+                # must not stay in flight forever, or the circuit never closes
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["circuit"] = self.breaker.stats()
+        return stats
@@ -0,0 +1,354 @@
+"""
+Multi-corpus shard registry for the Career RAG System.
+Each named shard (tech careers, government exams, college data, interview
+notes, ...) is its own CareerRAGSystem with its own knowledge base and index
+directory, so it can be indexed and rebuilt independently. A query fans out
+to the selected shards in parallel and the per-shard rankings are merged by
+score into one global top-k. Shards can be hot-reloaded one at a time when
+their knowledge base changes.
+
+The registry is a library and CLI for building and searching corpora; it is
+not yet wired into serving. get_career_advice / aget_career_advice and the
+LiveKit agent still answer from the single career_rag instance, so a shard
+only reaches users once a caller passes registry results in itself (e.g. as
+context_docs). Serving from shards would also need the answer cache and
+context-cache pinning to be scoped per shard set, which is out of scope here.
+
+Shards are declared in a JSON file (RAG_SHARDS_CONFIG):
+
+    {
+      "index_root": "career_rag_shards",
+      "shards": {
+        "tech": {"knowledge_base": "corpora/tech_careers.txt"},
+        "government": {"knowledge_base": "corpora/government_exams.txt", "index_type": "flat"}
+      }
+    }
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from career_rag import MIN_SIMILARITY, RELATIVE_SIMILARITY_CUTOFF, CareerRAGSystem
+from rag_filters import RetrievalFilter
+from rag_lexical import reciprocal_rank_fusion
+from rag_postprocess import apply_similarity_cutoff
+from rag_reload import KnowledgeBaseWatcher
+from rag_telemetry import get_logger, span
+
+log = get_logger("shards")
+
+SHARDS_CONFIG_PATH = os.getenv("RAG_SHARDS_CONFIG", "career_rag_shards.json")
+SHARD_INDEX_ROOT = os.getenv("RAG_SHARD_INDEX_ROOT", "career_rag_shards")
+SHARD_FANOUT_WORKERS = int(os.getenv("RAG_SHARD_WORKERS", "8"))
+
+_SHARD_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+# (shard name, document id within the shard)
+ShardDocId = Tuple[str, int]
+
+
+@dataclass
+class ShardHit:
+    """A retrieved chunk and the shard it came from."""
+    shard: str
+    doc_id: int
+    text: str
+    score: float
+
+
+def merge_shard_rankings(rankings: Dict[str, Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]],
+                         k: int) -> List[Tuple[ShardDocId, float]]:
+    """
+    Merge per-shard vector and lexical rankings into one global top-k.
+    Vector hits from all shards are ranked by similarity and lexical hits by
+    BM25 score; the two global rankings are fused by reciprocal rank, the same
+    way a single corpus fuses them.
+
+    Args:
+        rankings: Shard name -> (vector ranking, lexical ranking) from
+            CareerRAGSystem.ranked_candidates
+        k: Number of results
+
+    Returns:
+        List of ((shard, document_id), relevance), best first, relevance in (0, 1]
+    """
+    vector = [((name, idx), score) for name, (hits, _) in rankings.items() for idx, score in hits]
+    vector.sort(key=lambda item: item[1], reverse=True)
+    vector = apply_similarity_cutoff(vector, MIN_SIMILARITY, RELATIVE_SIMILARITY_CUTOFF)
+    lexical = [((name, idx), score) for name, (_, hits) in rankings.items() for idx, score in hits]
+    lexical.sort(key=lambda item: item[1], reverse=True)
+
+    if not lexical:
+        return vector[:k]
+    if not vector:
+        top = lexical[0][1]
+        return [(key, score / top) for key, score in lexical[:k]]
+
+    fused = reciprocal_rank_fusion([[key for key, _ in vector], [key for key, _ in lexical]])[:k]
+    top = fused[0][1]
+    return [(key, score / top) for key, score in fused]
+
+
+class ShardRegistry:
+    """
+    Named corpora, each with its own index, searched together.
+    """
+
+    def __init__(self, index_root: str = SHARD_INDEX_ROOT, max_workers: int = SHARD_FANOUT_WORKERS):
+        """
+        Args:
+            index_root: Directory holding one index directory per shard
+            max_workers: Threads used to fan a query out to shards
+        """
+        self.index_root = index_root
+        self._shards: Dict[str, CareerRAGSystem] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-shard")
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[KnowledgeBaseWatcher] = None
+
+    @classmethod
+    def from_config(cls, path: str = SHARDS_CONFIG_PATH) -> "ShardRegistry":
+        """
+        Registry declared in a JSON file. Without the file, the single career
+        knowledge base is registered as shard "career" with its existing index files.
+        """
+        if not os.path.exists(path):
+            registry = cls()
+            registry.register("career", "career_knowledge_base.txt", index_dir=None)
+            return registry
+
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        registry = cls(index_root=config.get("index_root", SHARD_INDEX_ROOT))
+        for name, spec in config["shards"].items():
+            spec = dict(spec)
+            registry.register(name, spec.pop("knowledge_base"), index_dir=spec.pop("index_dir", ""), **spec)
+        return registry
+
+    def register(self, name: str, knowledge_base_path: str, index_dir: Optional[str] = "",
+                 **system_kwargs) -> CareerRAGSystem:
+        """
+        Add a shard.
+
+        Args:
+            name: Shard name (lowercase letters, digits, '-' and '_')
+            knowledge_base_path: Text file with the shard's corpus
+            index_dir: Index directory ("" = <index_root>/<name>, None = working-directory
+                career_rag_* files of the single-corpus setup)
+            **system_kwargs: Further CareerRAGSystem arguments (index_type, ...)
+
+        Returns:
+            The shard's RAG system (not yet built)
+        """
+        if not _SHARD_NAME_RE.match(name):
+            raise ValueError(f"Invalid shard name '{name}'")
+        if name in self._shards:
+            raise ValueError(f"Shard '{name}' is already registered")
+        if index_dir == "":
+            index_dir = os.path.join(self.index_root, name)
+        self._shards[name] = CareerRAGSystem(knowledge_base_path, index_dir=index_dir, **system_kwargs)
+        return self._shards[name]
+
+    def names(self) -> List[str]:
+        return list(self._shards)
+
+    def get(self, name: str) -> CareerRAGSystem:
+        if name not in self._shards:
+            raise KeyError(f"Unknown shard '{name}'. Registered: {self.names()}")
+        return self._shards[name]
+
+    def _select(self, shards: Optional[Sequence[str]]) -> Dict[str, CareerRAGSystem]:
+        names = self.names() if shards is None else list(shards)
+        return {name: self.get(name) for name in names}
+
+    def build(self, shards: Optional[Sequence[str]] = None, force_rebuild: bool = False) -> Dict[str, bool]:
+        """
+        Load or build shard indexes, one shard at a time.
+        A shard that fails to build is reported and skipped; the others still load.
+
+        Args:
+            shards: Shards to build (default: all)
+            force_rebuild: Rebuild even if a valid index exists
+
+        Returns:
+            Shard name -> whether its index is ready
+        """
+        status = {}
+        for name, system in self._select(shards).items():
+            start = time.time()
+            try:
+                log.info("Loading shard", shard=name, knowledge_base=system.knowledge_base_path)
+                system.load_knowledge_base()
+                status[name] = system.build_index(force_rebuild=force_rebuild)
+                log.info("Shard ready", shard=name, documents=system.index.ntotal,
+                         elapsed_ms=round((time.time() - start) * 1000))
+            except Exception as e:
+                log.error("Could not build shard", shard=name, error=str(e))
+                status[name] = False
+
+        models = {system.embedding_provider.model_id for system in self._shards.values()}
+        if len(models) > 1:
+            log.warning("Shards use different embedding models; merged vector scores are only "
+                        "approximately comparable", models=",".join(sorted(models)))
+        return status
+
+    def reload(self, name: str, force_rebuild: bool = False) -> bool:
+        """
+        Rebuild one shard in the background and swap it in atomically.
+        Searches already running keep the shard instance they started with.
+
+        Returns:
+            True if a new index was swapped in
+        """
+        with self._reload_lock:
+            current = self.get(name)
+            if not force_rebuild and current.index is not None and current.is_current():
+                log.info("Knowledge base unchanged; keeping the live index", shard=name)
+                return False
+            fresh = current.replacement()
+            fresh.load_knowledge_base()
+            fresh.build_index(force_rebuild=force_rebuild)
+            if fresh.embedding_provider.model_id == current.embedding_provider.model_id:
+                fresh.query_cache = current.query_cache
+            self._shards[name] = fresh
+            log.info("Swapped in reloaded index", shard=name, documents=fresh.index.ntotal)
+            return True
+
+    def watch(self, debounce_ms: int = 1600) -> KnowledgeBaseWatcher:
+        """Hot-reload each shard whenever its knowledge base file changes."""
+        if self._watcher is None:
+            shard_paths = {name: os.path.abspath(system.knowledge_base_path)
+                           for name, system in self._shards.items()}
+
+            def on_change(paths: List[str]) -> None:
+                for name, path in shard_paths.items():
+                    if path in paths:
+                        self.reload(name)
+
+            self._watcher = KnowledgeBaseWatcher(list(shard_paths.values()), on_change, debounce_ms)
+        return self._watcher.start()
+
+    def _ready(self, shards: Optional[Sequence[str]]) -> Dict[str, CareerRAGSystem]:
+        selected = {name: system for name, system in self._select(shards).items() if system.index is not None}
+        if not selected:
+            raise ValueError("No selected shard has a built index. Call build() first.")
+        return selected
+
+    def _embed(self, query: str, selected: Dict[str, CareerRAGSystem]) -> Dict[str, np.ndarray]:
+        """Query embedding per shard, computed once per embedding model (in parallel across models)."""
+        groups: Dict[str, List[str]] = {}
+        for name, system in selected.items():
+            groups.setdefault(system.embedding_provider.model_id, []).append(name)
+        futures = {
+            model_id: self._executor.submit(selected[names[0]].embed_query, query)
+            for model_id, names in groups.items()
+        }
+        return {name: futures[model_id].result() for model_id, names in groups.items() for name in names}
+
+    def _hits(self, selected: Dict[str, CareerRAGSystem],
+              merged: List[Tuple[ShardDocId, float]]) -> List[ShardHit]:
+        return [ShardHit(name, idx, selected[name].chunks[idx], score) for (name, idx), score in merged]
+
+    def search(self, query: str, k: int = 5, shards: Optional[Sequence[str]] = None,
+               filters: Optional[RetrievalFilter] = None) -> List[ShardHit]:
+        """
+        Search the selected shards in parallel and merge into one global top-k.
+
+        Args:
+            query: User query
+            k: Number of results overall
+            shards: Shard names to search (default: all built shards)
+            filters: Section / topic tag / role filter applied inside every shard
+
+        Returns:
+            Hits, best first
+        """
+        selected = self._ready(shards)
+        with span("rag.shards.search", shards=",".join(selected), k=k):
+            embeddings = self._embed(query, selected)
+            # Each worker runs in a copy of this context so its spans nest under this one
+            futures = {
+                name: self._executor.submit(contextvars.copy_context().run, system.ranked_candidates,
+                                            query, embeddings[name], k, filters)
+                for name, system in selected.items()
+            }
+            rankings = {name: future.result() for name, future in futures.items()}
+
+        if filters is not None and not any(vector or lexical for vector, lexical in rankings.values()):
+            log.warning("Filter matches no chunks in any shard; searching all documents", filter=filters.describe())
+            return self.search(query, k, shards)
+        return self._hits(selected, merge_shard_rankings(rankings, k))
+
+    async def asearch(self, query: str, k: int = 5, shards: Optional[Sequence[str]] = None,
+                      filters: Optional[RetrievalFilter] = None) -> List[ShardHit]:
+        """
+        Async counterpart of search: embeddings are awaited, shard searches run in worker threads.
+        """
+        selected = self._ready(shards)
+        groups: Dict[str, List[str]] = {}
+        for name, system in selected.items():
+            groups.setdefault(system.embedding_provider.model_id, []).append(name)
+        vectors = await asyncio.gather(*(selected[names[0]].aembed_query(query) for names in groups.values()))
+        embeddings = {name: vector for names, vector in zip(groups.values(), vectors) for name in names}
+
+        results = await asyncio.gather(*(
+            asyncio.to_thread(system.ranked_candidates, query, embeddings[name], k, filters)
+            for name, system in selected.items()
+        ))
+        rankings = dict(zip(selected, results))
+
+        if filters is not None and not any(vector or lexical for vector, lexical in rankings.values()):
+            log.warning("Filter matches no chunks in any shard; searching all documents", filter=filters.describe())
+            return await self.asearch(query, k, shards)
+        return self._hits(selected, merge_shard_rankings(rankings, k))
+
+    def retrieve_relevant_documents(self, query: str, k: int = 5, shards: Optional[Sequence[str]] = None,
+                                    filters: Optional[RetrievalFilter] = None) -> List[Tuple[str, float]]:
+        """
+        Same result shape as CareerRAGSystem.retrieve_relevant_documents, across shards.
+
+        Returns:
+            List of (document_text, relevance_score) tuples
+        """
+        return [(hit.text, hit.score) for hit in self.search(query, k, shards, filters)]
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query career RAG shards")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build_parser = subcommands.add_parser("build", help="Index shards (default: all)")
+    build_parser.add_argument("shards", nargs="*")
+    build_parser.add_argument("--force", action="store_true", help="Rebuild even if the index is current")
+    query_parser = subcommands.add_parser("query", help="Search shards")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--shards", nargs="*")
+    query_parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = ShardRegistry.from_config()
+    if args.command == "build":
+        registry.build(args.shards or None, force_rebuild=args.force)
+    else:
+        registry.build(args.shards)
+        start = time.time()
+        hits = registry.search(args.query, k=args.k, shards=args.shards)
+        print(f"\n{len(hits)} results in {(time.time() - start) * 1000:.2f}ms")
+        for hit in hits:
+            print(f"[{hit.shard} #{hit.doc_id}] {hit.score:.3f} {hit.text[:100]!r}")
+    registry.close()
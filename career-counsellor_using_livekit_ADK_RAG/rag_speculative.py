@@ -0,0 +1,280 @@
+"""
+Speculative retrieval on user transcripts for the Career RAG System.
+Retrieval normally starts only once the LLM calls the RAG tool, after the
+user's turn has ended and the LLM has decided what to do with it. A
+SpeculativeRetriever is fed every transcript event of a voice session
+(interim and final) and starts embedding and hybrid retrieval for the
+utterance so far while the user is still speaking or the LLM is still
+thinking. The results are kept in a small session-scoped buffer; when the
+tool's query matches a buffered utterance closely enough, its embedding and
+selected context are reused instead of being computed again.
+
+Matching is lexical: the tool query is the LLM's rewording of the user's
+words, so an utterance matches when it covers nearly all of the query's
+content words. A miss only costs the speculative work; the tool then
+retrieves as usual.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from rag_cache import normalize_query
+from rag_lexical import tokenize
+from rag_telemetry import get_logger
+
+log = get_logger("speculative")
+
+# Utterances shorter than this (content words) are not worth a retrieval
+SPECULATIVE_MIN_WORDS = int(os.getenv("RAG_SPECULATIVE_MIN_WORDS", "2"))
+# Fraction of the tool query's content words the utterance must contain
+SPECULATIVE_MATCH_THRESHOLD = float(os.getenv("RAG_SPECULATIVE_MATCH", "0.75"))
+# Buffered results older than this are dropped
+SPECULATIVE_TTL_SECONDS = float(os.getenv("RAG_SPECULATIVE_TTL", "30"))
+# How long the tool waits for a matching speculation that is still running
+SPECULATIVE_WAIT_MS = float(os.getenv("RAG_SPECULATIVE_WAIT_MS", "1500"))
+SPECULATIVE_MAX_ENTRIES = int(os.getenv("RAG_SPECULATIVE_MAX_ENTRIES", "4"))
+
+# Words the LLM adds when turning speech into a tool query; they say nothing about the topic
+QUERY_FILLER_WORDS = {
+    "career", "careers", "advice", "tips", "help", "guidance", "information", "info",
+    "details", "question", "want", "need", "needed", "required", "know", "tell", "like", "please", "user",
+}
+# Tokens are compared on a short prefix so "becoming" matches "become" and "salaries" "salary"
+STEM_LENGTH = 5
+
+
+@dataclass
+class SpeculativeContext:
+    """Retrieval done ahead of the tool call for one utterance."""
+    query: str
+    embedding: Optional[np.ndarray]       # None when the lexical fast path answered or embedding failed
+    documents: Optional[List[Tuple[str, float]]]  # packed context as selected for generation
+    scope: str                            # filters.describe() of the retrieval filter, "" if none
+    source: object = None                 # the RAG instance that produced it (stale after a reload)
+
+
+def _utterance_key(text: str) -> str:
+    return normalize_query(text) or text.strip()
+
+
+@dataclass
+class _Speculation:
+    text: str                             # the utterance as transcribed (what is embedded)
+    terms: FrozenSet[str]
+    started_at: float
+    task: "asyncio.Task[Optional[SpeculativeContext]]"
+    used: bool = False
+
+
+def content_terms(text: str) -> FrozenSet[str]:
+    """Stemmed content words of a transcript or query (stopwords and query filler removed)."""
+    return frozenset(
+        token[:STEM_LENGTH] for token in tokenize(normalize_query(text)) if token not in QUERY_FILLER_WORDS
+    )
+
+
+def query_coverage(query_terms: FrozenSet[str], utterance_terms: FrozenSet[str]) -> float:
+    """Fraction of the query's content words that appear in the utterance."""
+    if not query_terms:
+        return 0.0
+    return len(query_terms & utterance_terms) / len(query_terms)
+
+
+class SpeculativeRetriever:
+    """
+    Session-scoped speculative retrieval buffer.
+    Runs on the session's event loop: transcript callbacks and lookups are not thread-safe.
+    At most one speculation runs at a time; transcripts that arrive meanwhile
+    collapse into a single follow-up for the latest text. A speculation is never
+    cancelled once started (that would abort an embedding request mid-flight):
+    evicted ones run to completion and their result is discarded.
+    """
+
+    def __init__(self, prefetch: Callable[[str], Awaitable[Optional[SpeculativeContext]]],
+                 min_words: int = SPECULATIVE_MIN_WORDS,
+                 match_threshold: float = SPECULATIVE_MATCH_THRESHOLD,
+                 ttl_seconds: float = SPECULATIVE_TTL_SECONDS,
+                 wait_ms: float = SPECULATIVE_WAIT_MS,
+                 max_entries: int = SPECULATIVE_MAX_ENTRIES):
+        """
+        Args:
+            prefetch: Embeds and retrieves for an utterance (see career_rag.aprefetch_career_context)
+            min_words: Minimum content words before an utterance is speculated on
+            match_threshold: Minimum query_coverage for a buffered utterance to be reused
+            ttl_seconds: Lifetime of buffered results
+            wait_ms: Longest wait for a matching speculation that has not finished
+            max_entries: Buffered utterances kept per session
+        """
+        self.prefetch = prefetch
+        self.min_words = min_words
+        self.match_threshold = match_threshold
+        self.ttl_seconds = ttl_seconds
+        self.wait_ms = wait_ms
+        self.max_entries = max_entries
+        self._finals: List[str] = []
+        self._interim = ""
+        self._entries: "OrderedDict[str, _Speculation]" = OrderedDict()
+        self._running: Optional[_Speculation] = None
+        self._next: Optional[str] = None
+        # Evicted speculations still running, referenced until they finish
+        self._detached: Set[asyncio.Task] = set()
+        self._closed = False
+        self._stats = {"transcripts": 0, "started": 0, "failed": 0, "hits": 0,
+                       "hits_in_flight": 0, "misses": 0, "scope_mismatches": 0, "unused": 0}
+
+    def on_transcript(self, transcript: str, is_final: bool) -> None:
+        """
+        Feed one STT transcript event of the current user turn.
+        Final transcripts accumulate (a turn can span several speech segments);
+        an interim transcript replaces the previous interim one.
+        """
+        self._stats["transcripts"] += 1
+        if self._closed:
+            return
+        if is_final:
+            self._finals.append(transcript)
+            self._interim = ""
+        else:
+            self._interim = transcript
+        text = " ".join(self._finals + [self._interim]).strip()
+        if len(content_terms(text)) < self.min_words or _utterance_key(text) in self._entries:
+            return
+
+        if self._running is not None and not self._running.task.done():
+            self._next = text
+            return
+        self._start(text)
+
+    def end_turn(self) -> None:
+        """
+        Start a new utterance. Buffered results stay available until they expire,
+        and a follow-up queued for the finished utterance still runs.
+        """
+        self._finals = []
+        self._interim = ""
+
+    def _start(self, text: str) -> None:
+        self._evict()
+        speculation = _Speculation(text, content_terms(text), time.time(),
+                                   asyncio.ensure_future(self._run(text)))
+        # Keyed on the normalized text so repeated interim transcripts start one speculation
+        self._entries[_utterance_key(text)] = speculation
+        self._running = speculation
+        self._stats["started"] += 1
+        speculation.task.add_done_callback(self._on_done)
+
+    async def _run(self, text: str) -> Optional[SpeculativeContext]:
+        try:
+            return await self.prefetch(text)
+        except Exception as e:
+            self._stats["failed"] += 1
+            log.warning("Speculative retrieval failed", error=str(e))
+            return None
+
+    def _on_done(self, _task: asyncio.Task) -> None:
+        pending, self._next = self._next, None
+        if pending is not None and not self._closed and _utterance_key(pending) not in self._entries:
+            self._start(pending)
+
+    def _evict(self) -> None:
+        """Drop expired entries and keep at most max_entries - 1 before adding one."""
+        now = time.time()
+        for key, speculation in list(self._entries.items()):
+            expired = now - speculation.started_at > self.ttl_seconds
+            if expired or len(self._entries) >= self.max_entries:
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        speculation = self._entries.pop(key)
+        if not speculation.used:
+            self._stats["unused"] += 1
+        if not speculation.task.done():
+            self._detached.add(speculation.task)
+            speculation.task.add_done_callback(self._detached.discard)
+
+    async def lookup(self, query: str, scope: str = "") -> Optional[SpeculativeContext]:
+        """
+        Buffered retrieval for the tool's query, if an utterance matches it.
+        A matching speculation that is still running is awaited for up to wait_ms.
+
+        Args:
+            query: Query the LLM passed to the RAG tool
+            scope: Retrieval filter of the tool call (filters.describe(), "" if none)
+
+        Returns:
+            The speculation's result, or None on a miss. When its filter differs
+            from `scope`, only the embedding is reusable (documents is None).
+        """
+        now = time.time()
+        query_terms = content_terms(query)
+        best, best_coverage = None, 0.0
+        # Later (longer) utterances win ties
+        for speculation in self._entries.values():
+            if now - speculation.started_at > self.ttl_seconds:
+                continue
+            coverage = query_coverage(query_terms, speculation.terms)
+            if coverage >= self.match_threshold and coverage >= best_coverage:
+                best, best_coverage = speculation, coverage
+        if self._next is not None:
+            # The utterance queued behind the running speculation may be the one the LLM is answering
+            coverage = query_coverage(query_terms, content_terms(self._next))
+            if coverage >= self.match_threshold and coverage >= best_coverage:
+                pending, self._next = self._next, None
+                self._start(pending)
+                best, best_coverage = self._entries[_utterance_key(pending)], coverage
+        if best is None:
+            self._stats["misses"] += 1
+            log.debug("Speculative retrieval miss", query=query, buffered=len(self._entries))
+            return None
+
+        in_flight = not best.task.done()
+        if in_flight:
+            try:
+                await asyncio.wait_for(asyncio.shield(best.task), self.wait_ms / 1000)
+            except asyncio.TimeoutError:
+                self._stats["misses"] += 1
+                log.info("Speculative retrieval still running; retrieving directly", wait_ms=self.wait_ms)
+                return None
+        result = best.task.result()
+        if result is None:
+            self._stats["misses"] += 1
+            return None
+
+        best.used = True
+        self._stats["hits"] += 1
+        if in_flight:
+            self._stats["hits_in_flight"] += 1
+        log.info("Speculative retrieval hit", coverage=round(best_coverage, 2), in_flight=in_flight,
+                 age_ms=round((time.time() - best.started_at) * 1000), docs=len(result.documents))
+        if result.scope != scope:
+            self._stats["scope_mismatches"] += 1
+            if result.embedding is None:
+                return None
+            return SpeculativeContext(result.query, result.embedding, None, result.scope, result.source)
+        return result
+
+    async def aclose(self) -> None:
+        """
+        Clear the buffer (call when the session closes). No new speculation starts;
+        one still in flight is given up to wait_ms to finish instead of being cancelled.
+        """
+        self._closed = True
+        self._next = None
+        for key in list(self._entries):
+            self._drop(key)
+        self._running = None
+        if self._detached:
+            await asyncio.wait(set(self._detached), timeout=self.wait_ms / 1000)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["buffered"] = len(self._entries)
+        return stats
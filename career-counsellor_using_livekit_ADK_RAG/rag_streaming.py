@@ -0,0 +1,86 @@
+"""
+Sentence chunking for streamed RAG answers.
+Turns a token stream from the LLM into sentence-sized pieces that TTS can
+start speaking while the rest of the answer is still being generated.
+"""
+
+import re
+from typing import Iterator, List, Optional
+
+# Sentence end: terminal punctuation followed by whitespace, or a line break.
+# A digit before the period ("1. Learn Python", "4.5 LPA") is not a sentence end.
+_SENTENCE_END_RE = re.compile(r"(?<=[^\d\s][.!?])\s+|\n+")
+_TRAILING_WORD_RE = re.compile(r"([A-Za-z][A-Za-z.]*)\.$")
+# Abbreviations common in career answers; the period after them does not end a sentence
+ABBREVIATIONS = {
+    "e.g", "i.e", "vs", "rs", "approx", "avg", "incl", "esp", "govt", "dept",
+    "dr", "mr", "mrs", "ms", "prof", "sr", "jr",
+}
+
+
+def _sentence_ends(text: str) -> Iterator["re.Match"]:
+    """Sentence breaks in `text`, skipping periods that close an abbreviation ("e.g.", "Rs.")."""
+    for match in _SENTENCE_END_RE.finditer(text):
+        if "\n" not in match.group():
+            word = _TRAILING_WORD_RE.search(text, 0, match.start())
+            if word is not None and word.group(1).lower() in ABBREVIATIONS:
+                continue
+        yield match
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split complete text into sentences and lines, dropping empty pieces.
+    """
+    pieces, start = [], 0
+    for match in _sentence_ends(text):
+        pieces.append(text[start:match.start()])
+        start = match.end()
+    pieces.append(text[start:])
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+class SentenceChunker:
+    """
+    Incremental splitter that buffers streamed text and emits complete sentences.
+    Sentences shorter than `min_chars` are merged with the next one so TTS is
+    not fed tiny fragments.
+    """
+
+    def __init__(self, min_chars: int = 40):
+        """
+        Args:
+            min_chars: Minimum length of an emitted chunk (except the final one)
+        """
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return any sentence chunks now complete.
+        """
+        self._buffer += text
+        chunks = []
+        while True:
+            match = next(_sentence_ends(self._buffer), None)
+            if match is None:
+                break
+            sentence = self._buffer[:match.start()].strip()
+            self._buffer = self._buffer[match.end():]
+            if not sentence:
+                continue
+            self._pending = f"{self._pending} {sentence}".strip()
+            if len(self._pending) >= self.min_chars:
+                chunks.append(self._pending)
+                self._pending = ""
+        return chunks
+
+    def flush(self) -> Optional[str]:
+        """
+        Return whatever text remains once the stream has ended.
+        """
+        remainder = f"{self._pending} {self._buffer.strip()}".strip()
+        self._pending = ""
+        self._buffer = ""
+        return remainder or None
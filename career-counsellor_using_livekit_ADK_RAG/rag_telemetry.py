@@ -0,0 +1,284 @@
+"""
+Metrics, tracing and structured logging for the Career RAG System.
+
+- Prometheus histograms and counters for the hot path: embedding latency,
+  retries, hedged requests, failures and circuit state, FAISS search, context selection,
+  generation, end-to-end advice latency, cache hits and index size.
+  Served by start_metrics_server (RAG_METRICS_PORT); with
+  PROMETHEUS_MULTIPROC_DIR set, one server reports every worker process.
+- OpenTelemetry spans that nest under whatever span is current, e.g. the
+  LiveKit tool call. Without a configured tracer provider they are no-ops;
+  configure_tracing installs an OTLP exporter when OTEL_EXPORTER_OTLP_ENDPOINT
+  is set.
+- A structured logger: each record carries a message plus key/value fields
+  and the active trace / span ids. RAG_LOG_FORMAT=json emits one JSON object
+  per line, RAG_LOG_LEVEL sets the level.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess, start_http_server
+
+LOG_FORMAT = os.getenv("RAG_LOG_FORMAT", "text").lower()
+LOG_LEVEL = os.getenv("RAG_LOG_LEVEL", "INFO").upper()
+METRICS_PORT = int(os.getenv("RAG_METRICS_PORT", "0"))
+
+# Seconds; from sub-millisecond FAISS searches to multi-second generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+EMBEDDING_LATENCY = Histogram(
+    "rag_embedding_seconds", "Embedding call latency, retries included",
+    ["provider", "kind"], buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_RETRIES = Counter(
+    "rag_embedding_retries_total", "Embedding requests retried after an error", ["provider", "kind"]
+)
+EMBEDDING_FAILURES = Counter(
+    "rag_embedding_failures_total", "Embeddings that failed within their budget (never replaced by a vector)",
+    ["provider", "kind"]
+)
+EMBEDDING_HEDGES = Counter(
+    "rag_embedding_hedged_requests_total", "Duplicate embedding requests sent for a slow request", ["provider"]
+)
+EMBEDDING_CIRCUIT_STATE = Gauge(
+    "rag_embedding_circuit_state", "Embedding circuit breaker state (0 closed, 1 half open, 2 open)",
+    ["provider", "kind"], multiprocess_mode="livemax"
+)
+SEARCH_LATENCY = Histogram(
+    "rag_faiss_search_seconds", "FAISS search latency per call (a batch search is one call)",
+    ["index_type", "filtered"], buckets=LATENCY_BUCKETS,
+)
+RETRIEVAL_LATENCY = Histogram(
+    "rag_context_selection_seconds", "Hybrid search, MMR and context packing for one query",
+    ["path"], buckets=LATENCY_BUCKETS,
+)
+GENERATION_LATENCY = Histogram(
+    "rag_generation_seconds", "Gemini generation latency (a stream is timed to its last chunk)",
+    ["mode"], buckets=LATENCY_BUCKETS,
+)
+FIRST_SENTENCE_LATENCY = Histogram(
+    "rag_first_sentence_seconds", "Time from request to the first streamed sentence", buckets=LATENCY_BUCKETS,
+)
+GENERATION_ERRORS = Counter(
+    "rag_generation_errors_total", "Failed generation calls", ["reason"]
+)
+REQUEST_LATENCY = Histogram(
+    "rag_advice_seconds", "End-to-end career advice latency", ["mode", "outcome"], buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total", "Cache lookups by result", ["cache", "result"]
+)
+CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens", "Prompt tokens of packed context per query",
+    buckets=(50, 100, 200, 300, 450, 600, 800, 1200, 2000),
+)
+INDEX_DOCUMENTS = Gauge(
+    "rag_index_documents", "Vectors in the loaded index", ["index"], multiprocess_mode="livemax"
+)
+INDEX_BYTES = Gauge(
+    "rag_index_bytes", "Size of the index bundle on disk", ["index"], multiprocess_mode="livemax"
+)
+
+tracer = trace.get_tracer("career_rag")
+
+
+class _StructuredFormatter(logging.Formatter):
+    """Formats records as `message key=value ...` or as one JSON object."""
+
+    def __init__(self, as_json: bool):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = dict(getattr(record, "fields", {}))
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            fields["trace_id"] = format(span_context.trace_id, "032x")
+            fields["span_id"] = format(span_context.span_id, "016x")
+        if record.exc_info:
+            fields["exception"] = self.formatException(record.exc_info)
+
+        if self.as_json:
+            return json.dumps({
+                "ts": round(record.created, 6),
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }, default=str, ensure_ascii=False)
+        suffix = " ".join(f"{key}={value}" for key, value in fields.items() if key != "exception")
+        line = f"{record.levelname:<7} {record.name}: {record.getMessage()}"
+        if suffix:
+            line += f" | {suffix}"
+        if "exception" in fields:
+            line += "\n" + fields["exception"]
+        return line
+
+
+class StructuredLogger:
+    """
+    Logger whose calls take a message plus structured fields:
+    `log.info("Generation finished", generation_ms=812.4, cached=True)`.
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"rag.{name}")
+
+    def _log(self, level: int, message: str, fields: dict, exc_info: bool = False) -> None:
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, extra={"fields": fields}, exc_info=exc_info)
+
+    def debug(self, message: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message: str, **fields: Any) -> None:
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message: str, **fields: Any) -> None:
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message: str, exc_info: bool = False, **fields: Any) -> None:
+        self._log(logging.ERROR, message, fields, exc_info)
+
+
+def _configure_logging() -> None:
+    """One handler on the `rag` logger namespace, independent of the host's root logging."""
+    root = logging.getLogger("rag")
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_StructuredFormatter(LOG_FORMAT == "json"))
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+_configure_logging()
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Structured logger for a module (records go to the `rag.<name>` logger)."""
+    return StructuredLogger(name)
+
+
+log = get_logger("telemetry")
+
+
+@contextmanager
+def span(name: str, parent: Optional[otel_context.Context] = None, **attributes: Any) -> Iterator[trace.Span]:
+    """
+    Span around a block, child of the current span (or of `parent`).
+    Exceptions are recorded on the span and re-raised.
+    """
+    with tracer.start_as_current_span(
+        name, context=parent, attributes={key: value for key, value in attributes.items() if value is not None}
+    ) as current:
+        yield current
+
+
+def traced(name: str):
+    """Decorator: run a function (sync or async) inside a span named `name`."""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def detached_span(name: str, parent: Optional[otel_context.Context] = None, **attributes: Any) -> trace.Span:
+    """
+    Span that is started now and ended explicitly, child of the current span (or of `parent`).
+    For async generators: a span can't stay current across a yield, so enter it with
+    `activate` around each step and call `end()` when the generator finishes.
+    """
+    return tracer.start_span(
+        name, context=parent, attributes={key: value for key, value in attributes.items() if value is not None}
+    )
+
+
+def activate(current: trace.Span):
+    """Make a detached span current for a block without ending it."""
+    return trace.use_span(current, end_on_exit=False)
+
+
+def current_trace_context() -> otel_context.Context:
+    """The active trace context, for work that runs later (e.g. a stream consumed after the tool returns)."""
+    return otel_context.get_current()
+
+
+@contextmanager
+def timed(histogram, **labels: str) -> Iterator[None]:
+    """Observe the block's wall time (seconds) on a histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - start)
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> bool:
+    """
+    Serve Prometheus metrics over HTTP (no-op when port is 0).
+    With several worker processes, set PROMETHEUS_MULTIPROC_DIR: the first
+    process to bind the port reports the metrics of all of them.
+
+    Returns:
+        True if this process is now serving metrics
+    """
+    if not port:
+        return False
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    try:
+        start_http_server(port, registry=registry)
+    except OSError as e:
+        log.info("Metrics port already served by another process", port=port, reason=str(e))
+        return False
+    log.info("Serving Prometheus metrics", port=port)
+    return True
+
+
+def configure_tracing(service_name: str = "career-rag") -> bool:
+    """
+    Export spans over OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set and no
+    tracer provider has been installed yet (e.g. by the host application).
+
+    Returns:
+        True if a tracer provider was installed
+    """
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+    if not isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        return False
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    log.info("Exporting traces over OTLP", endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
+    return True
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The RAG modules are flat modules next to this directory
+sys.path.insert(0, ROOT)
+
+KNOWLEDGE_BASE = os.path.join(ROOT, "career_knowledge_base.txt")
+
+
+def build_test_rag(index_dir, knowledge_base=KNOWLEDGE_BASE):
+    """A CareerRAGSystem over the career knowledge base with the offline hashing embedder."""
+    from career_rag import CareerRAGSystem
+    from rag_providers import create_embedding_provider
+
+    rag = CareerRAGSystem(knowledge_base, embedding_provider=create_embedding_provider("test"),
+                          index_dir=str(index_dir))
+    rag.load_knowledge_base()
+    rag.build_index()
+    return rag
+
+
+@pytest.fixture(scope="session")
+def career_rag_system(tmp_path_factory):
+    """Built system shared by tests that only read from it."""
+    return build_test_rag(tmp_path_factory.mktemp("career_rag"))
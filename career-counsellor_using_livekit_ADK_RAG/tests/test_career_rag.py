@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import career_rag
+from conftest import build_test_rag
+
+
+@pytest.fixture
+def served_rag(tmp_path, monkeypatch):
+    """A built system installed as the global instance, with generation stubbed out."""
+    rag = build_test_rag(tmp_path)
+
+    async def generate(user_message, context=None):
+        await asyncio.sleep(0.01)
+        return "advice"
+
+    async def no_embedding(query):
+        raise AssertionError("the lexical fast path must not embed")
+
+    monkeypatch.setattr(rag, "_agenerate_text", generate)
+    monkeypatch.setattr(rag, "aembed_query", no_embedding)
+    monkeypatch.setattr(career_rag, "_rag_instance", rag)
+    return rag
+
+
+def test_concurrent_callers_initialize_once(monkeypatch):
+    calls = []
+
+    def slow_initialize():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        career_rag._rag_instance = object()
+
+    monkeypatch.setattr(career_rag, "_rag_instance", None)
+    monkeypatch.setattr(career_rag, "initialize_career_rag", slow_initialize)
+    threads = [threading.Thread(target=career_rag._ensure_rag_instance) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_async_advice_on_the_lexical_fast_path(served_rag):
+    async def ask_all():
+        return await asyncio.gather(*(
+            career_rag.aget_career_advice("clinical research coordinator") for _ in range(8)
+        ))
+
+    results = asyncio.run(ask_all())
+    assert all(result["success"] and result["advice"] == "advice" for result in results)
+    assert any("Clinical Research Coordinator" in source for source in results[0]["sources"])
+    assert served_rag.lexical_fast_path_hits == 8
+
+
+def test_async_advice_without_retrieval(served_rag):
+    result = asyncio.run(career_rag.aget_career_advice("Any general tips?", use_rag=False))
+    assert result["success"] and result["sources"] == []
+
+
+def test_prewarm_loads_index_and_client_once(served_rag, monkeypatch):
+    warmups = []
+    monkeypatch.setattr(served_rag.generation_pool, "warmup", lambda: warmups.append(1))
+    timings = career_rag.prewarm_career_rag()
+    assert set(timings) == {"rag_ms", "gemini_client_ms", "index_warmup_ms"}
+    assert warmups == [1]
+    assert career_rag._rag_instance is served_rag
+
+
+def test_prewarm_raises_when_the_index_cannot_load(monkeypatch):
+    def broken_initialize():
+        raise FileNotFoundError("career_knowledge_base.txt")
+
+    monkeypatch.setattr(career_rag, "_rag_instance", None)
+    monkeypatch.setattr(career_rag, "initialize_career_rag", broken_initialize)
+    with pytest.raises(FileNotFoundError):
+        career_rag.prewarm_career_rag()
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from conftest import build_test_rag
+from rag_batch import BatchEngine
+
+QUERIES = [
+    "How do I become a data scientist?",
+    "UPSC civil services preparation",
+    "um how do I become a data scientist",
+    "Salary of a product manager in Bangalore",
+]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    rag = build_test_rag(tmp_path)
+    prompts = []
+
+    async def generate(user_message, context=None):
+        prompts.append(user_message)
+        # Later queries finish first, so completion order differs from input order
+        await asyncio.sleep(0.01 * (len(QUERIES) - len(prompts)))
+        return f"advice {len(prompts)}"
+
+    monkeypatch.setattr(rag, "_agenerate_text", generate)
+    return rag
+
+
+def test_results_follow_input_order(rag, tmp_path):
+    engine = BatchEngine(rag, candidates=8, generation_concurrency=4)
+    results = engine.run(QUERIES, output_path=str(tmp_path / "out.jsonl"))
+    assert [record["query"] for record in results] == QUERIES
+    assert all(record["success"] and record["sources"] for record in results)
+    assert (tmp_path / "out.jsonl").read_text().count("\n") == len(QUERIES)
+    report = engine.last_report
+    assert report["succeeded"] == len(QUERIES)
+    # The filler-only difference makes queries 0 and 2 one embedding
+    assert report["embedding"]["unique_queries"] == 3
+
+
+def test_failed_embedding_falls_back_to_lexical_context(rag, monkeypatch):
+    embed_documents = rag.embedding_provider.embed_documents
+
+    def embed(texts):
+        if any("UPSC" in text for text in texts):
+            raise RuntimeError("quota exceeded")
+        return embed_documents(texts)
+
+    monkeypatch.setattr(rag.embedding_provider, "embed_documents", embed)
+    engine = BatchEngine(rag, candidates=8)
+    results = engine.run(QUERIES)
+    assert engine.last_report["embedding"]["failed"] == 1
+    assert results[1]["success"]
+    assert any("UPSC" in source for source in results[1]["sources"])
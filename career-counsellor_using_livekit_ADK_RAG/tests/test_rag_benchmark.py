@@ -0,0 +1,30 @@
+from rag_benchmark import compare_reports
+
+
+def _report(**metrics) -> dict:
+    return {"metrics": metrics}
+
+
+def test_latency_regresses_upwards_beyond_tolerance_and_noise_floor():
+    baseline = _report(**{"e2e.sync.p50_ms": 100.0, "retrieval.n82.k5.vector_p50_ms": 0.2})
+    current = _report(**{"e2e.sync.p50_ms": 140.0, "retrieval.n82.k5.vector_p50_ms": 0.6})
+    regressed = [r["metric"] for r in compare_reports(current, baseline, latency_tolerance=0.25)]
+    # 0.2ms -> 0.6ms is +200% but under the 0.5ms floor
+    assert regressed == ["e2e.sync.p50_ms"]
+    tail = compare_reports(_report(**{"context.n82.p99_ms": 2.5}), _report(**{"context.n82.p99_ms": 1.0}))
+    assert tail == []               # p99 has its own, wider floor
+    faster = _report(**{"e2e.sync.p50_ms": 10.0, "retrieval.n82.k5.vector_p50_ms": 0.1})
+    assert compare_reports(faster, baseline) == []
+
+
+def test_quality_regresses_downwards_by_absolute_tolerance():
+    baseline = _report(**{"retrieval.n82.k5.hybrid_recall": 0.9, "retrieval.n82.k5.hybrid_mrr": 0.7})
+    current = _report(**{"retrieval.n82.k5.hybrid_recall": 0.89, "retrieval.n82.k5.hybrid_mrr": 0.6})
+    assert [r["metric"] for r in compare_reports(current, baseline)] == ["retrieval.n82.k5.hybrid_mrr"]
+    better = _report(**{"retrieval.n82.k5.hybrid_recall": 1.0, "retrieval.n82.k5.hybrid_mrr": 0.9})
+    assert compare_reports(better, baseline) == []
+
+
+def test_metrics_missing_from_current_report_are_skipped():
+    baseline = _report(**{"chunking.chars_per_s": 1e7, "e2e.sync.p50_ms": 100.0})
+    assert compare_reports(_report(**{"e2e.sync.p50_ms": 100.0}), baseline) == []
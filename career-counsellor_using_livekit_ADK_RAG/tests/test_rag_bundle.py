@@ -0,0 +1,64 @@
+import faiss
+import numpy as np
+import pytest
+
+import rag_bundle
+from rag_bundle import ChunkStore, MANIFEST_FILE, open_bundle, write_bundle
+
+TEXTS = ["IAS officers are recruited through UPSC.", "Salaire moyen: 12 LPA ₹", ""]
+
+
+def _index(n, dim=4):
+    index = faiss.IndexFlatL2(dim)
+    index.add(np.random.default_rng(0).random((n, dim), dtype=np.float32))
+    return index
+
+
+def _write(directory, texts):
+    arrays = {"chunks.section_ids": np.arange(len(texts), dtype=np.int64)}
+    return write_bundle(str(directory), _index(len(texts)), texts, arrays, {"embedding_model": "test"})
+
+
+def _fail_on_manifest(write_atomic):
+    def write(path, write_fn):
+        if path.endswith(MANIFEST_FILE):
+            raise OSError("killed")
+        return write_atomic(path, write_fn)
+    return write
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_bundle_round_trip(tmp_path, use_mmap):
+    _write(tmp_path, TEXTS)
+    index, chunks, manifest, arrays = open_bundle(str(tmp_path), verify_checksums=True, use_mmap=use_mmap)
+    assert list(chunks) == TEXTS
+    assert chunks[-2] == TEXTS[1]
+    assert index.ntotal == len(TEXTS)
+    assert manifest["embedding_model"] == "test"
+    assert arrays["chunks.section_ids"].tolist() == [0, 1, 2]
+    chunks.close()
+
+
+def test_chunk_store_from_texts_matches_input():
+    store = ChunkStore.from_texts(TEXTS)
+    assert len(store) == 3 and store[0:2] == TEXTS[:2]
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_crash_before_manifest_is_detected(tmp_path, monkeypatch):
+    _write(tmp_path, TEXTS)
+    monkeypatch.setattr(rag_bundle, "_write_atomic", _fail_on_manifest(rag_bundle._write_atomic))
+    with pytest.raises(OSError):
+        _write(tmp_path, TEXTS * 3)
+    # New data files sit next to the old manifest: the bundle must not open as valid
+    with pytest.raises(ValueError):
+        open_bundle(str(tmp_path))
+
+
+def test_directory_without_manifest_is_not_a_bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_bundle, "_write_atomic", _fail_on_manifest(rag_bundle._write_atomic))
+    with pytest.raises(OSError):
+        _write(tmp_path, TEXTS)
+    with pytest.raises(ValueError, match="no index bundle"):
+        open_bundle(str(tmp_path))
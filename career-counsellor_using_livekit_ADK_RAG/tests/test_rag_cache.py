@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import rag_cache
+from rag_cache import QueryEmbeddingCache, SemanticAnswerCache, normalize_query
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rag_cache, "time", clock)
+    return clock
+
+
+def test_transcripts_normalize_to_one_key():
+    assert normalize_query("Um, how do I become a  Data Scientist?") == "how do i become a data scientist"
+    # Meaningful words and language names survive
+    assert normalize_query("Jobs that pay well in C++ / C#") == "jobs that pay well in c++ c#"
+
+
+def test_query_cache_expires_after_ttl(clock):
+    cache = QueryEmbeddingCache(ttl_seconds=60)
+    cache.put("q", np.ones(3))
+    clock.now += 59
+    assert cache.get("q") is not None
+    clock.now += 2
+    assert cache.get("q") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_query_cache_evicts_least_recently_used(clock):
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", np.ones(3))
+    cache.put("b", np.ones(3))
+    cache.get("a")
+    cache.put("c", np.ones(3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def _vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_answer_cache_hits_near_identical_queries_only():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.put(_vector(1, 0, 0), "advice", ["doc"])
+    advice, sources, similarity = cache.lookup(_vector(1, 0.1, 0))
+    assert (advice, sources) == ("advice", ["doc"]) and similarity >= 0.95
+    assert cache.lookup(_vector(1, 1, 0)) is None
+
+
+def test_answer_cache_is_partitioned_by_scope():
+    cache = SemanticAnswerCache()
+    cache.put(_vector(1, 0), "filtered advice", [], scope="section=13")
+    assert cache.lookup(_vector(1, 0)) is None
+    assert cache.lookup(_vector(1, 0), scope="section=13")[0] == "filtered advice"
+
+
+def test_answer_cache_expires_and_evicts(clock):
+    cache = SemanticAnswerCache(max_size=2, ttl_seconds=60)
+    cache.put(_vector(1, 0, 0), "a", [])
+    clock.now += 1
+    cache.put(_vector(0, 1, 0), "b", [])
+    clock.now += 1
+    cache.lookup(_vector(1, 0, 0))
+    cache.put(_vector(0, 0, 1), "c", [])
+    assert cache.lookup(_vector(0, 1, 0)) is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.now += 61
+    assert cache.lookup(_vector(1, 0, 0)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_drops_every_answer():
+    cache = SemanticAnswerCache()
+    cache.put(_vector(1, 0), "advice", [])
+    cache.invalidate()
+    assert cache.lookup(_vector(1, 0)) is None
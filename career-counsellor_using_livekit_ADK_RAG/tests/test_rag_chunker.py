@@ -0,0 +1,44 @@
+from rag_chunker import StructuredChunker
+from rag_postprocess import estimate_tokens
+
+KNOWLEDGE_BASE = "career_knowledge_base.txt"
+
+
+def _assert_within_budget(chunker: StructuredChunker, content: str):
+    chunks = chunker.chunk(content)
+    assert chunks
+    for chunk in chunks:
+        assert estimate_tokens(chunk.text) <= chunker.max_tokens
+        # Offsets point at the chunk's last line in the source document
+        assert content[chunk.char_start:chunk.char_end].split("\n")[-1] == chunk.text.split("\n")[-1]
+    return chunks
+
+
+def test_oversized_paragraph_is_split_between_words():
+    chunker = StructuredChunker()
+    content = "Notes\n\n" + "word " * 2000
+    chunks = _assert_within_budget(chunker, content)
+    # Every word ends up in some chunk
+    assert sum(chunk.text.count("word") for chunk in chunks) >= 2000
+
+
+def test_oversized_line_is_split_at_sentence_ends():
+    chunker = StructuredChunker(max_tokens=60, overlap_tokens=10)
+    sentences = [f"Sentence number {i} talks about interview preparation for engineers." for i in range(40)]
+    content = " ".join(sentences)
+    chunks = _assert_within_budget(chunker, content)
+    for chunk in chunks:
+        assert chunk.text.rstrip().endswith(".")
+
+
+def test_giant_word_is_sliced():
+    chunker = StructuredChunker(max_tokens=50, overlap_tokens=10)
+    _assert_within_budget(chunker, "x" * 5000)
+
+
+def test_knowledge_base_chunks_respect_budget():
+    chunker = StructuredChunker()
+    with open(KNOWLEDGE_BASE, encoding="utf-8") as f:
+        content = f.read()
+    chunks = _assert_within_budget(chunker, content)
+    assert {chunk.section_id for chunk in chunks} >= {"2.1", "13.3"}
@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pytest
+
+from career_rag import CONTEXT_CACHE_PINNED_SECTIONS, SYSTEM_PROMPT
+from rag_chunker import StructuredChunker
+from rag_context_cache import GEMINI_MIN_CACHE_TOKENS, ContextCache, ContextCacheBackend, LocalContextCacheBackend
+
+
+def test_backend_must_implement_every_operation():
+    class Incomplete(ContextCacheBackend):
+        def create(self, model_name, system_instruction, texts, ttl_seconds, key):
+            raise AssertionError
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_disabled_cache_never_creates():
+    cache = ContextCache(LocalContextCacheBackend(), "model", "system prompt")
+    assert cache.acquire() is not None
+    assert cache.disable()
+    assert not cache.disable()      # only the first call reports (and warns)
+    assert cache.acquire() is None
+    assert cache.stats()["creates"] == 1
+    assert cache.stats()["disabled"]
+
+
+def test_prefix_estimate_includes_system_prompt_and_pinned_chunks():
+    cache = ContextCache(LocalContextCacheBackend(), "model", "x" * 400)
+    assert cache.estimate_tokens([]) == 100
+    assert cache.estimate_tokens(["y" * 4000]) > 1100
+
+
+class _SlowBackend(LocalContextCacheBackend):
+    def __init__(self, started, release):
+        super().__init__()
+        self.started, self.release, self.creates = started, release, 0
+
+    def create(self, *args, **kwargs):
+        self.creates += 1
+        self.started.set()
+        self.release.wait(5)
+        return super().create(*args, **kwargs)
+
+
+def test_slow_create_does_not_block_other_callers():
+    started, release = threading.Event(), threading.Event()
+    backend = _SlowBackend(started, release)
+    cache = ContextCache(backend, "model", "system prompt")
+    creator = threading.Thread(target=cache.acquire)
+    creator.start()
+    assert started.wait(5)
+    # While the create is in flight: no second create, no waiting on it, and stats stay readable
+    assert cache.acquire() is None
+    assert cache.stats()["live"] is False
+    release.set()
+    creator.join(5)
+    assert backend.creates == 1
+    assert cache.acquire() is not None
+
+
+def test_default_pinned_sections_clear_the_gemini_minimum():
+    kb = os.path.join(os.path.dirname(os.path.dirname(__file__)), "career_knowledge_base.txt")
+    with open(kb, "r", encoding="utf-8") as f:
+        chunks = StructuredChunker().chunk(f.read())
+    pinned = [chunk.text for chunk in chunks
+              if chunk.section_id.split(".")[0] in CONTEXT_CACHE_PINNED_SECTIONS]
+    cache = ContextCache(LocalContextCacheBackend(), "model", SYSTEM_PROMPT)
+    assert cache.estimate_tokens(pinned) >= GEMINI_MIN_CACHE_TOKENS
@@ -0,0 +1,36 @@
+import numpy as np
+
+from rag_embedding_store import EmbeddingStore
+
+TASK = "RETRIEVAL_DOCUMENT"
+
+
+def _store_with_two_models(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.sqlite"))
+    vector = np.ones(4, dtype=np.float32)
+    gemini = {EmbeddingStore.make_key(text, "gemini", TASK): vector for text in "abc"}
+    local = {EmbeddingStore.make_key(text, "local-fit-1", TASK): vector for text in "abc"}
+    store.put_many(gemini, "gemini", TASK)
+    store.put_many(local, "local-fit-1", TASK)
+    return store, gemini, local
+
+
+def test_garbage_collect_leaves_other_models_alone(tmp_path):
+    store, gemini, local = _store_with_two_models(tmp_path)
+    keep = list(local)[:2]
+    # A build with the local provider must not wipe the Gemini process's vectors
+    assert store.garbage_collect(keep, "local-fit-1", TASK) == 1
+    assert set(store.get_many(list(gemini) + list(local))) == set(gemini) | set(keep)
+    store.close()
+
+
+def test_prune_evicts_only_idle_models(tmp_path):
+    store, gemini, local = _store_with_two_models(tmp_path)
+    store.garbage_collect(list(gemini), "gemini", TASK)
+    store.garbage_collect(list(local), "local-fit-1", TASK)
+    assert store.prune_idle_models(3600, "local-fit-2", TASK) == 0
+
+    # Everything is idle with a zero window, except the model being built
+    assert store.prune_idle_models(0, "local-fit-1", TASK) == 3
+    assert set(store.get_many(list(gemini) + list(local))) == set(local)
+    store.close()
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+from rag_embeddings import EmbeddingPipeline, TokenBucket, make_batches
+
+
+def test_token_bucket_holds_the_sustained_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # The first token is free; the other five are refilled at 50/s
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_token_bucket_allows_a_burst_up_to_capacity():
+    bucket = TokenBucket(rate=1, capacity=5)
+    assert sum(bucket.acquire() for _ in range(5)) == 0.0
+
+
+def _embed(texts):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_pipeline_preserves_order_across_concurrent_batches():
+    texts = [f"text {'x' * i}" for i in range(25)]
+    pipeline = EmbeddingPipeline(_embed, requests_per_second=1000, max_concurrency=4, max_batch_size=3)
+    embeddings = pipeline.embed(texts, dim=2, progress=False)
+    assert embeddings[:, 0].tolist() == [len(text) for text in texts]
+    assert pipeline.last_stats.requests == 9
+    assert pipeline.last_stats.items == 25
+
+
+def test_failed_text_is_isolated_and_reported():
+    def embed(texts):
+        if "bad" in texts:
+            raise RuntimeError("rejected")
+        return _embed(texts)
+
+    texts = ["a", "b", "bad", "c", "d"]
+    pipeline = EmbeddingPipeline(embed, requests_per_second=1000, max_batch_size=5)
+    embeddings = pipeline.embed(texts, dim=2, progress=False)
+    assert pipeline.last_stats.failed_indices == [2]
+    assert not embeddings[2].any()
+    assert embeddings[[0, 1, 3, 4], 1].tolist() == [1.0] * 4
+
+
+def test_batches_are_bounded_by_count():
+    assert make_batches(["a"] * 7, max_batch_size=3, max_payload_chars=100) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_are_bounded_by_payload_size():
+    texts = ["x" * 40, "x" * 40, "x" * 40, "x" * 150, "x"]
+    # An oversized text still gets a request of its own
+    assert make_batches(texts, max_batch_size=10, max_payload_chars=100) == [[0, 1], [2], [3], [4]]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from rag_filters import RetrievalFilter, chunk_tag_mask, classify_query, extract_roles, tag_bits
+
+
+def test_chunk_tags_and_tag_bits_agree():
+    assert chunk_tag_mask("Government jobs via UPSC. Average salary: 10 LPA") == tag_bits(["salary", "government"])
+    assert chunk_tag_mask("Nothing to see here") == 0
+    with pytest.raises(ValueError):
+        tag_bits(["astrology"])
+
+
+def test_roles_come_from_entry_headers():
+    text = "Data Scientist:\n- Python\nDoctor (MBBS + Specialization):\n- NEET\nSkills:\n- SQL"
+    assert extract_roles(text) == ["data scientist", "doctor"]
+
+
+def test_classify_query_picks_topics_and_longest_role():
+    roles = ["product manager", "fintech product manager", "data scientist"]
+    result = classify_query("How much do fintech product managers earn?", roles)
+    assert result.tags == ["salary"]
+    assert result.roles == ["fintech product manager"]
+    assert classify_query("Is sarkari naukri better than remote work?").tags == ["government", "remote"]
+    assert classify_query("tell me something interesting", roles) is None
+
+
+def test_section_filter_matches_subsections(career_rag_system):
+    rag = career_rag_system
+    mask = rag.filter_mask(RetrievalFilter(sections=["13"]))
+    sections = {rag.sections[rag.chunk_sections[i]]["id"] for i in np.flatnonzero(mask)}
+    assert sections and all(section.startswith("13.") for section in sections)
+
+
+def test_filter_fields_combine_with_and(career_rag_system):
+    rag = career_rag_system
+    salary = rag.filter_mask(RetrievalFilter(tags=["salary"]))
+    role = rag.filter_mask(RetrievalFilter(roles=["data scientist"]))
+    both = rag.filter_mask(RetrievalFilter(tags=["salary"], roles=["data scientist"]))
+    assert np.array_equal(both, salary & role)
+    assert rag.filter_mask(RetrievalFilter()) is None
+
+
+def test_filter_without_matches_falls_back_to_all(career_rag_system):
+    unmatched = RetrievalFilter(roles=["astronaut"])
+    assert career_rag_system.filter_mask(unmatched) is None
+    assert not career_rag_system.filter_mask(unmatched, fallback_to_all=False).any()
+
+
+def test_filtered_retrieval_stays_inside_the_mask(career_rag_system):
+    rag = career_rag_system
+    filters = RetrievalFilter(sections=["13"])
+    allowed = {rag.chunks[i] for i in np.flatnonzero(rag.filter_mask(filters))}
+    docs = rag.retrieve_relevant_documents("How do I switch careers?", k=3, filters=filters)
+    assert docs and all(doc in allowed for doc, _ in docs)
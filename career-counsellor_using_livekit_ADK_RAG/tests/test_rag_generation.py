@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+
+import rag_generation
+from rag_generation import GenerationPool
+
+
+class _FakeModel:
+    def __init__(self, error=None):
+        self.error = error
+        self.prompts = []
+
+    def generate_content(self, user_message, **kwargs):
+        self.prompts.append(user_message)
+        if self.error is not None:
+            raise self.error
+        return f"answer to {user_message}"
+
+    async def generate_content_async(self, user_message, **kwargs):
+        return self.generate_content(user_message, **kwargs)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(rag_generation, "CLIENT_REUSE_SUPPORTED", False)
+    pool = GenerationPool("model", "system prompt", timeout=1.0)
+    models = []
+
+    def new_model():
+        models.append(_FakeModel())
+        return models[-1]
+
+    monkeypatch.setattr(pool, "_new_model", new_model)
+    pool.models = models
+    return pool
+
+
+def test_sync_model_is_created_once(pool):
+    pool.generate("first")
+    pool.generate("second")
+    stats = pool.stats()
+    assert len(pool.models) == 1
+    assert (stats["clients_created"], stats["calls"], stats["reused_calls"]) == (1, 2, 1)
+
+
+def test_one_async_model_per_event_loop(pool):
+    async def two_calls():
+        await pool.agenerate("a")
+        await pool.agenerate("b")
+
+    asyncio.run(two_calls())
+    asyncio.run(two_calls())
+    assert len(pool.models) == 2
+    assert pool.stats()["reused_calls"] == 2
+
+
+def test_deadline_errors_are_counted_and_raised(pool):
+    pool._model = _FakeModel(api_exceptions.DeadlineExceeded("slow"))
+    with pytest.raises(api_exceptions.DeadlineExceeded):
+        pool.generate("question")
+    assert pool.stats()["deadline_exceeded"] == 1
+
+
+def test_dropped_cache_is_retried_with_the_prefix_inline(pool):
+    cache = pool.enable_context_cache("local", "model-001", ttl_seconds=3600)
+    cache.set_pinned(["pinned chunk"])
+    handle = pool.context_handle()
+    cache.backend.delete(handle)   # the provider dropped it
+    assert pool.generate("question", context=handle).endswith("question")
+    prompt = pool.models[0].prompts[-1]
+    assert "pinned chunk" in prompt and prompt.endswith("question")
+    assert pool.stats()["cache_misses"] == 1
+
+
+@pytest.mark.parametrize("supported", [True, False])
+def test_share_clients_only_touches_supported_internals(monkeypatch, supported):
+    monkeypatch.setattr(rag_generation, "CLIENT_REUSE_SUPPORTED", supported)
+    base, model = _FakeModel(), _FakeModel()
+    base._client = base._async_client = object()
+    rag_generation.share_clients(model, base)
+    assert (getattr(model, "_client", None) is base._client) == supported
@@ -0,0 +1,30 @@
+import numpy as np
+
+from rag_index import benchmark_index, build_faiss_index, choose_index_type
+
+
+def _vectors(n: int = 300, dim: int = 16) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_auto_selection_by_corpus_size():
+    assert choose_index_type(100) == "flat"
+    assert choose_index_type(50_000) == "hnsw"
+    assert choose_index_type(500_000) == "ivf_flat"
+    assert choose_index_type(5_000_000) == "ivf_pq"
+
+
+def test_exact_index_has_full_recall():
+    embeddings = _vectors()
+    index, config = build_faiss_index(embeddings, "flat")
+    assert config["ntotal"] == len(embeddings)
+    assert benchmark_index(index, embeddings, k=5)["recall@5"] == 1.0
+
+
+def test_recall_baseline_only_covers_indexed_ids():
+    embeddings = _vectors()
+    # Rows 0..99 failed to embed and are left out of the index
+    ids = np.arange(100, len(embeddings))
+    index, config = build_faiss_index(embeddings[ids], "flat", ids=ids)
+    assert config["ntotal"] == len(ids)
+    assert benchmark_index(index, embeddings[ids], k=5, ids=ids)["recall@5"] == 1.0
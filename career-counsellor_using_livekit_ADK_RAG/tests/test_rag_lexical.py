@@ -0,0 +1,46 @@
+import numpy as np
+
+from rag_lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCUMENTS = [
+    "UPSC civil services: IAS and IPS officers are recruited through UPSC.",
+    "GATE scores open PSU jobs for engineers.",
+    "Software engineers in Bangalore earn 12 LPA.",
+    "IAS preparation takes one to two years of study.",
+]
+
+
+def test_tokenize_keeps_language_names_and_drops_stopwords():
+    assert tokenize("What is the C++ and C# salary?") == ["c++", "c#", "salary"]
+
+
+def test_bm25_ranks_keyword_matches_first():
+    index = BM25Index(DOCUMENTS)
+    ranking = index.search("IAS UPSC", k=4)
+    assert [doc_id for doc_id, _ in ranking] == [0, 3]
+    assert ranking[0][1] > ranking[1][1]
+    assert index.search("astronaut") == []
+
+
+def test_bm25_search_respects_mask():
+    index = BM25Index(DOCUMENTS)
+    mask = np.array([False, True, True, True])
+    assert [doc_id for doc_id, _ in index.search("IAS UPSC", mask=mask)] == [3]
+
+
+def test_arrays_round_trip_gives_same_scores():
+    index = BM25Index(DOCUMENTS)
+    restored = BM25Index.from_arrays(index.to_arrays())
+    assert np.allclose(index.scores("PSU engineers")[0], restored.scores("PSU engineers")[0])
+
+
+def test_confidence_is_high_for_a_decisive_match():
+    index = BM25Index(DOCUMENTS)
+    assert index.confidence("GATE PSU")["coverage"] == 1.0
+    assert index.confidence("GATE astronaut")["coverage"] < 0.5
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]])
+    assert [doc_id for doc_id, _ in fused] == [1, 3, 2, 4]
+    assert fused[0][1] == 1 / 61 + 1 / 62
@@ -0,0 +1,26 @@
+import numpy as np
+
+from rag_memory import memory_delta, memory_report
+
+
+def test_built_index_is_served_from_the_mapped_bundle(career_rag_system):
+    rag = career_rag_system
+    assert rag.shared_index
+    # The building process drops its private vectors and reads everything through the mappings
+    assert rag.embeddings is None
+    assert rag.chunks._mapped is not None
+    assert all(isinstance(ids, np.memmap) for ids, _ in rag.lexical_index.postings.values())
+    rag.retrieve_relevant_documents("data scientist salary", k=2)
+    assert rag.memory_report()["index_mapped_rss_mb"] > 0
+
+
+def test_memory_delta_skips_pid_and_missing_fields():
+    before = {"pid": 1, "uss_mb": 100.0, "rss_mb": 150.0}
+    after = {"pid": 1, "uss_mb": 112.5, "rss_mb": 151.0, "pss_mb": 120.0}
+    assert memory_delta(before, after) == {"uss_mb": 12.5, "rss_mb": 1.0}
+
+
+def test_report_without_shared_dir_has_no_mapping_fields():
+    report = memory_report()
+    assert report["rss_mb"] > 0
+    assert "index_mapped_rss_mb" not in report
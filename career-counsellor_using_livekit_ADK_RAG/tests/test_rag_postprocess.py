@@ -0,0 +1,43 @@
+import numpy as np
+
+from rag_postprocess import ContextPacker, apply_similarity_cutoff, estimate_tokens, mmr_rerank
+
+
+def test_similarity_cutoff_keeps_the_best_candidate():
+    candidates = [(3, 0.8), (1, 0.7), (2, 0.3)]
+    assert apply_similarity_cutoff(candidates, min_similarity=0.5) == [(3, 0.8), (1, 0.7)]
+    assert apply_similarity_cutoff(candidates, relative_cutoff=0.9) == [(3, 0.8)]
+    assert apply_similarity_cutoff([(3, 0.1)], min_similarity=0.5) == [(3, 0.1)]
+
+
+def test_mmr_skips_near_duplicates():
+    embeddings = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]], dtype=np.float32)
+    relevance = [0.9, 0.89, 0.6]
+    assert mmr_rerank(embeddings, relevance, k=2, lambda_mult=1.0) == [0, 1]
+    assert mmr_rerank(embeddings, relevance, k=2, lambda_mult=0.5) == [0, 2]
+
+
+def test_mmr_without_embeddings_keeps_rank_order():
+    assert mmr_rerank(None, [0.9, 0.8, 0.7], k=2) == [0, 1]
+
+
+def test_packer_stays_within_token_budget():
+    documents = [
+        "Data Scientist. Data scientists earn 12 LPA on average. The office has a canteen.",
+        "Teacher. Teachers plan lessons. Data science teachers are in demand.",
+    ]
+    packer = ContextPacker(token_budget=25)
+    packed, stats = packer.pack(documents, "data scientist salary")
+    assert stats["tokens_after"] <= 25
+    assert sum(estimate_tokens(sentence) for doc in packed for sentence in doc.split("\n") if sentence) \
+        == stats["tokens_after"]
+    # Query-matching sentences win over the filler sentence of the top chunk
+    assert "canteen" not in packed[0]
+    assert "12 LPA" in packed[0]
+    assert stats["tokens_saved"] > 0
+
+
+def test_packer_drops_duplicate_sentences():
+    packed, stats = ContextPacker(token_budget=100).pack(["Heading. Same line.", "Other. Same line."], "line")
+    assert packed == ["Heading.\nSame line.", "Other."]
+    assert stats["sentences_total"] == 3
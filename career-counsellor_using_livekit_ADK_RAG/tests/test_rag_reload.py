@@ -0,0 +1,29 @@
+import shutil
+
+import career_rag
+from conftest import KNOWLEDGE_BASE, build_test_rag
+
+NEW_FACT = "Zorbonaut roles pay about 99 LPA in Pune."
+
+
+def test_reload_swaps_in_a_new_index_and_leaves_the_old_one_serving(tmp_path, monkeypatch):
+    knowledge_base = tmp_path / "kb.txt"
+    shutil.copy(KNOWLEDGE_BASE, knowledge_base)
+    old = build_test_rag(tmp_path / "index", knowledge_base=str(knowledge_base))
+    monkeypatch.setattr(career_rag, "_rag_instance", old)
+    assert not career_rag.reload_career_rag()
+
+    text = knowledge_base.read_text(encoding="utf-8")
+    # Inside the last section: the footer after the end marker is not indexed
+    knowledge_base.write_text(text.replace("Timeline varies by domain, company.",
+                                           f"Timeline varies by domain, company. {NEW_FACT}"), encoding="utf-8")
+    assert career_rag.reload_career_rag()
+
+    fresh = career_rag._rag_instance
+    assert fresh is not old
+    assert any(NEW_FACT in chunk for chunk in fresh.chunks)
+    assert fresh.is_current()
+    # Queries holding the previous instance still read its (replaced-on-disk) bundle
+    assert not any(NEW_FACT in chunk for chunk in old.chunks)
+    assert old.retrieve_relevant_documents("data scientist salary", k=2)
+    assert fresh.query_cache is old.query_cache
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from rag_resilience import CircuitBreaker, CircuitOpenError, DeadlineRetrier, EmbeddingUnavailable
+
+
+def _open_breaker(reset_seconds: float = 0.0) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=reset_seconds)
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_and_probes_after_reset():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=60.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    breaker.reset_seconds = 0.0
+    assert breaker.allow()          # the probe
+    assert not breaker.allow()      # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_retrier_gives_up_within_budget():
+    retrier = DeadlineRetrier(CircuitBreaker("test", failure_threshold=100), base_backoff=0.01)
+
+    def fail(timeout):
+        raise TimeoutError("slow")
+
+    with pytest.raises(EmbeddingUnavailable):
+        retrier.call(fail, budget=0.2)
+    assert retrier.stats()["retries"] >= 1
+
+
+def test_cancelled_probe_releases_the_circuit():
+    breaker = _open_breaker()
+    retrier = DeadlineRetrier(breaker)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(10)
+
+        probe = asyncio.ensure_future(retrier.acall(hang, budget=5.0))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok(timeout):
+            return "vector"
+
+        return [await retrier.acall(ok, budget=1.0) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["vector"] * 3
+    assert breaker.state == "closed"
+
+
+def test_interrupted_sync_probe_releases_the_circuit():
+    breaker = _open_breaker()
+    retrier = DeadlineRetrier(breaker)
+
+    def interrupted(timeout):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        retrier.call(interrupted, budget=1.0)
+    assert retrier.call(lambda timeout: "vector", budget=1.0) == "vector"
+    assert breaker.state == "closed"
+
+
+def test_open_circuit_fails_fast():
+    retrier = DeadlineRetrier(_open_breaker(reset_seconds=60.0))
+    with pytest.raises(CircuitOpenError):
+        retrier.call(lambda timeout: "vector", budget=1.0)
+
+
+def test_retryable_by_exception_type_only():
+    from google.api_core import exceptions as api_exceptions
+
+    from rag_resilience import is_retryable
+
+    assert is_retryable(api_exceptions.DeadlineExceeded("slow"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(api_exceptions.InvalidArgument("bad request"))
+    # Messages are not parsed: "5000" is not a 500 and "timeout" in text is not a timeout
+    assert not is_retryable(ValueError("batch of 5000 texts exceeds the request timeout"))
@@ -0,0 +1,66 @@
+import pytest
+
+from rag_providers import create_embedding_provider
+from rag_shards import ShardRegistry, merge_shard_rankings
+
+CORPORA = {
+    "exams": [
+        "UPSC civil services recruit IAS and IPS officers through a three-stage exam.",
+        "GATE scores open PSU jobs for engineers at NTPC, ONGC and BHEL.",
+        "SSC CGL fills clerical and inspector posts in central ministries.",
+    ],
+    "tech": [
+        "Backend developers in Bangalore earn 8 to 25 LPA with three years of experience.",
+        "Data scientists need Python, SQL and statistics; ML engineers add deployment skills.",
+        "Cloud architects design AWS and Azure systems and earn 30 LPA or more.",
+    ],
+}
+
+
+def test_merge_with_one_retriever_keeps_its_order():
+    vector = {"a": ([(0, 0.9), (1, 0.8), (2, 0.3)], []), "b": ([(4, 0.85)], [])}
+    # Weak vector hits fall under the relative similarity cutoff, whichever shard they come from
+    assert [key for key, _ in merge_shard_rankings(vector, k=4)] == [("a", 0), ("b", 4), ("a", 1)]
+    lexical = {"a": ([], [(2, 4.0)]), "b": ([], [(1, 8.0)])}
+    assert merge_shard_rankings(lexical, k=2) == [(("b", 1), 1.0), (("a", 2), 0.5)]
+
+
+def test_merge_fuses_vector_and_lexical_rankings_across_shards():
+    rankings = {"a": ([(0, 0.9)], [(3, 2.0)]), "b": ([(1, 0.8)], [(1, 9.0)])}
+    merged = merge_shard_rankings(rankings, k=3)
+    # ("b", 1) is ranked by both retrievers, so it beats each single-list top hit
+    assert merged[0] == (("b", 1), 1.0)
+    assert {key for key, _ in merged} == {("a", 0), ("a", 3), ("b", 1)}
+
+
+@pytest.fixture(scope="module")
+def registry(tmp_path_factory):
+    root = tmp_path_factory.mktemp("shards")
+    registry = ShardRegistry(index_root=str(root))
+    for name, paragraphs in CORPORA.items():
+        knowledge_base = root / f"{name}.txt"
+        knowledge_base.write_text("\n\n".join(paragraphs), encoding="utf-8")
+        registry.register(name, str(knowledge_base), embedding_provider=create_embedding_provider("test"))
+    assert registry.build() == {"exams": True, "tech": True}
+    yield registry
+    registry.close()
+
+
+def test_search_merges_hits_from_every_shard(registry):
+    hits = registry.search("UPSC IAS officers", k=3)
+    assert hits[0].shard == "exams" and "UPSC" in hits[0].text
+    assert hits[0].score == 1.0
+
+
+def test_search_only_selected_shards(registry):
+    hits = registry.search("UPSC IAS officers", k=3, shards=["tech"])
+    assert hits and all(hit.shard == "tech" for hit in hits)
+    with pytest.raises(KeyError):
+        registry.search("UPSC", shards=["medicine"])
+
+
+def test_invalid_or_duplicate_shard_names_are_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.register("Tech Careers", "kb.txt")
+    with pytest.raises(ValueError):
+        registry.register("tech", "kb.txt")
@@ -0,0 +1,39 @@
+import asyncio
+
+from rag_speculative import SpeculativeContext, SpeculativeRetriever
+
+
+def _retriever(delay: float, finished: list, **kwargs) -> SpeculativeRetriever:
+    async def prefetch(text):
+        await asyncio.sleep(delay)
+        finished.append(text)
+        return SpeculativeContext(text, None, [], "")
+    return SpeculativeRetriever(prefetch, **kwargs)
+
+
+def test_evicted_speculation_finishes_instead_of_being_cancelled():
+    async def scenario():
+        finished = []
+        speculator = _retriever(0.05, finished, max_entries=1)
+        speculator.on_transcript("how do I become a data scientist", is_final=True)
+        first = speculator._running.task
+        speculator._evict()         # what starting the next utterance does
+        assert not speculator._entries
+        await asyncio.sleep(0.1)
+        assert not first.cancelled()
+        assert finished == ["how do I become a data scientist"]
+    asyncio.run(scenario())
+
+
+def test_aclose_waits_for_in_flight_prefetch():
+    async def scenario():
+        finished = []
+        speculator = _retriever(0.05, finished, wait_ms=1000)
+        speculator.on_transcript("salary of a product manager", is_final=False)
+        speculator.on_transcript("salary of a product manager in bangalore", is_final=False)
+        await speculator.aclose()
+        # The running prefetch completed; the queued follow-up never started
+        assert finished == ["salary of a product manager"]
+        speculator.on_transcript("data engineer roadmap", is_final=True)
+        assert speculator.stats()["started"] == 1
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+from rag_streaming import SentenceChunker, split_sentences
+
+ANSWER = ("Entry-level roles pay approx. Rs. 6 LPA, e.g. at TCS or Infosys. "
+          "Senior engineers earn more, i.e. 20 LPA or above!\n"
+          "1. Learn Python. 2. Build projects.")
+
+
+def _stream(text: str, piece: int, min_chars: int = 10):
+    chunker = SentenceChunker(min_chars=min_chars)
+    chunks = []
+    for i in range(0, len(text), piece):
+        chunks.extend(chunker.feed(text[i:i + piece]))
+    return chunks, chunker.flush()
+
+
+def test_abbreviations_do_not_end_sentences():
+    assert split_sentences(ANSWER) == [
+        "Entry-level roles pay approx. Rs. 6 LPA, e.g. at TCS or Infosys.",
+        "Senior engineers earn more, i.e. 20 LPA or above!",
+        "1. Learn Python.",
+        "2. Build projects.",
+    ]
+
+
+def test_streamed_chunks_match_whole_text_split_for_any_token_size():
+    for piece in (1, 3, 7, len(ANSWER)):
+        chunks, tail = _stream(ANSWER, piece)
+        assert chunks + [tail] == split_sentences(ANSWER)
+
+
+def test_short_sentences_merge_until_min_chars():
+    chunks, tail = _stream("Yes. It pays well. Apply now and prepare for interviews.", 4, min_chars=15)
+    assert chunks == ["Yes. It pays well."]
+    assert tail == "Apply now and prepare for interviews."
+
+
+def test_incomplete_sentence_waits_for_more_text():
+    chunker = SentenceChunker(min_chars=1)
+    assert chunker.feed("Data scientists earn") == []
+    assert chunker.feed(" well. Next") == ["Data scientists earn well."]
+    assert chunker.flush() == "Next"
+    assert chunker.flush() is None
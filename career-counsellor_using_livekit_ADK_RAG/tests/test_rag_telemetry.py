@@ -0,0 +1,61 @@
+import json
+import logging
+
+import pytest
+from opentelemetry import trace
+from prometheus_client import REGISTRY
+
+from rag_telemetry import SEARCH_LATENCY, _StructuredFormatter, get_logger, timed
+
+
+@pytest.fixture
+def records():
+    captured = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record)
+
+    handler = Capture()
+    logger = logging.getLogger("rag.test")
+    logger.addHandler(handler)
+    yield captured
+    logger.removeHandler(handler)
+
+
+def test_fields_travel_with_a_constant_message(records):
+    get_logger("test").info("Generation finished", generation_ms=812.4, cached=True)
+    record = records[-1]
+    assert record.getMessage() == "Generation finished"
+    assert record.fields == {"generation_ms": 812.4, "cached": True}
+
+    text = _StructuredFormatter(as_json=False).format(record)
+    assert text == "INFO    rag.test: Generation finished | generation_ms=812.4 cached=True"
+    data = json.loads(_StructuredFormatter(as_json=True).format(record))
+    assert (data["level"], data["logger"], data["message"]) == ("info", "rag.test", "Generation finished")
+    assert data["generation_ms"] == 812.4
+
+
+def test_log_lines_carry_the_current_trace_ids(records):
+    context = trace.SpanContext(trace_id=0xABC, span_id=0xDEF, is_remote=False,
+                                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED))
+    with trace.use_span(trace.NonRecordingSpan(context)):
+        get_logger("test").warning("Retrying")
+        data = json.loads(_StructuredFormatter(as_json=True).format(records[-1]))
+    assert data["trace_id"] == format(0xABC, "032x")
+    assert data["span_id"] == format(0xDEF, "016x")
+
+
+def test_timed_observes_the_block_even_when_it_raises():
+    labels = {"index_type": "test", "filtered": "false"}
+
+    def count():
+        return REGISTRY.get_sample_value("rag_faiss_search_seconds_count", labels) or 0.0
+
+    before = count()
+    with timed(SEARCH_LATENCY, **labels):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed(SEARCH_LATENCY, **labels):
+            raise RuntimeError("search failed")
+    assert count() == before + 2
@@ -1,3 +1,6 @@
+import os
+import time
+
 from dotenv import load_dotenv
 
 from livekit import agents
@@ -43,12 +46,22 @@ Keep it natural and conversational. Wait for their response before continuing.
         )
 
 
+def prewarm(proc: agents.JobProcess):
+    """
+    Load the VAD model once per worker process instead of once per job.
+    LiveKit only hands jobs to processes whose prewarm has finished.
+    """
+    start = time.perf_counter()
+    proc.userdata["vad"] = silero.VAD.load()
+    print(f"✓ Worker process {os.getpid()} prewarmed in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
 async def entrypoint(ctx: agents.JobContext):
     session = AgentSession(
         stt=groq.STT(model="whisper-large-v3",detect_language=True,),
         llm="openai/gpt-4.1-mini",
         tts="cartesia/sonic-3",
-        vad=silero.VAD.load(),
+        vad=ctx.proc.userdata["vad"],
        
     )
 
@@ -66,4 +79,4 @@ async def entrypoint(ctx: agents.JobContext):
     )
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file